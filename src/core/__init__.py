@@ -1,21 +1,65 @@
 """Core层 - 业务逻辑核心
 
 包含登录管理、直播操作、推流码获取、配置管理、弹幕获取等核心功能。
+
+导出的名称在第一次访问时才导入所在模块，导入本包不会加载aiohttp等网络依赖。
 """
 
-from .auth import AuthManager
-from .config import ConfigManager
-from .live import LiveManager
-from .danmaku_fetcher import DanmakuClient
-from .danmaku_models import DanmakuMessage
-from .danmaku_handler import HandlerInterface, BaseHandler
-
-__all__ = [
-    "AuthManager",
-    "ConfigManager", 
-    "LiveManager",
-    "DanmakuClient",
-    "DanmakuMessage",
-    "HandlerInterface",
-    "BaseHandler",
-]
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .auth import AuthManager
+    from .config import ConfigManager
+    from .live import AsyncLiveManager, LiveManager
+    from .http_session import (
+        clear_http_cookies,
+        close_http_session,
+        get_http_session,
+        update_http_cookies,
+    )
+    from .http_cache import HttpCache, get_http_cache
+    from .danmaku_fetcher import DanmakuClient
+    from .danmaku_hub import DanmakuHub
+    from .danmaku_archive import DanmakuArchive, ArchiveHandler, read_archive
+    from .danmaku_service import DanmakuService
+    from .danmaku_models import DanmakuMessage
+    from .danmaku_handler import HandlerInterface, BaseHandler
+
+# 导出名称 -> 所在模块
+_EXPORTS = {
+    "AuthManager": ".auth",
+    "ConfigManager": ".config",
+    "LiveManager": ".live",
+    "AsyncLiveManager": ".live",
+    "get_http_session": ".http_session",
+    "close_http_session": ".http_session",
+    "clear_http_cookies": ".http_session",
+    "update_http_cookies": ".http_session",
+    "HttpCache": ".http_cache",
+    "get_http_cache": ".http_cache",
+    "DanmakuClient": ".danmaku_fetcher",
+    "DanmakuHub": ".danmaku_hub",
+    "DanmakuArchive": ".danmaku_archive",
+    "ArchiveHandler": ".danmaku_archive",
+    "read_archive": ".danmaku_archive",
+    "DanmakuService": ".danmaku_service",
+    "DanmakuMessage": ".danmaku_models",
+    "HandlerInterface": ".danmaku_handler",
+    "BaseHandler": ".danmaku_handler",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
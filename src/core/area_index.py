@@ -0,0 +1,189 @@
+"""分区索引模块
+
+把配置中的分区列表（主分区 -> 子分区的两层结构）建立成索引：
+- 分区ID -> 分区条目、主分区ID -> 子分区列表，查找为O(1)
+- 名称的所有子串 -> 分区条目，前缀/子串匹配为一次字典查找
+- 子串没有匹配时按字符顺序做模糊匹配（如"英联"匹配"英雄联盟"）
+"""
+
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Optional
+
+logger = getLogger(__name__)
+
+__all__ = (
+    "AreaEntry",
+    "AreaIndex",
+)
+
+# 默认返回的搜索结果数
+DEFAULT_SEARCH_LIMIT = 20
+
+
+@dataclass(frozen=True)
+class AreaEntry:
+    """分区条目"""
+
+    id: int
+    """分区ID"""
+    name: str
+    """分区名"""
+    parent_id: int = 0
+    """主分区ID，主分区本身为0"""
+    parent_name: str = ""
+    """主分区名，主分区本身为空"""
+    order: int = 0
+    """在分区列表中的遍历顺序（每个主分区先子分区后主分区）"""
+
+    @property
+    def is_root(self) -> bool:
+        """是否为主分区"""
+        return self.parent_id == 0
+
+    @property
+    def full_name(self) -> str:
+        """"主分区/子分区"格式的名称"""
+        return f"{self.parent_name}/{self.name}" if self.parent_name else self.name
+
+    def to_dict(self) -> dict:
+        """与分区列表中相同格式的字典"""
+        return {"id": self.id, "name": self.name}
+
+
+class AreaIndex:
+    """分区列表索引
+
+    索引建立后不跟踪分区列表的修改，列表变化时需要重新建立，
+    可以用 is_built_from() 判断是否仍然对应当前的列表。
+
+    Args:
+        area_list: 分区列表 [{"id", "name", "list": [{"id", "name"}]}]
+    """
+
+    def __init__(self, area_list: list):
+        self._source = area_list
+        self._source_len = len(area_list)
+
+        self.roots: list[AreaEntry] = []
+        """所有主分区"""
+        self._children: dict[int, list[AreaEntry]] = {}
+        """主分区ID -> 子分区"""
+        self._by_id: dict[int, AreaEntry] = {}
+        """子分区ID -> 子分区"""
+        self._entries: list[AreaEntry] = []
+        """所有分区，按遍历顺序"""
+        self._substrings: dict[str, list[AreaEntry]] = {}
+        """名称子串（小写）-> 分区，按遍历顺序"""
+
+        for root in area_list:
+            root_id = int(root.get("id", 0))
+            root_name = root.get("name", "")
+            children = []
+            for child in root.get("list", []):
+                entry = AreaEntry(
+                    int(child.get("id", 0)),
+                    child.get("name", ""),
+                    root_id,
+                    root_name,
+                    len(self._entries),
+                )
+                children.append(entry)
+                self._entries.append(entry)
+                self._by_id.setdefault(entry.id, entry)
+            root_entry = AreaEntry(root_id, root_name, order=len(self._entries))
+            self._entries.append(root_entry)
+            self.roots.append(root_entry)
+            self._children[root_id] = children
+
+        for entry in self._entries:
+            key = entry.name.lower()
+            seen = set()
+            for start in range(len(key)):
+                for end in range(start + 1, len(key) + 1):
+                    substring = key[start:end]
+                    if substring not in seen:
+                        seen.add(substring)
+                        self._substrings.setdefault(substring, []).append(entry)
+
+        logger.debug(
+            "area index built: roots=%d children=%d keys=%d",
+            len(self.roots),
+            len(self._by_id),
+            len(self._substrings),
+        )
+
+    def is_built_from(self, area_list: list) -> bool:
+        """索引是否由该分区列表建立（且列表长度未变）"""
+        return area_list is self._source and len(area_list) == self._source_len
+
+    def get(self, area_id: int) -> Optional[AreaEntry]:
+        """根据子分区ID获取分区条目"""
+        return self._by_id.get(area_id)
+
+    def get_children(self, root_id: int) -> list[AreaEntry]:
+        """获取主分区下的子分区"""
+        return self._children.get(root_id, [])
+
+    def find_first(self, name: str) -> Optional[AreaEntry]:
+        """按遍历顺序返回第一个名称包含name的分区，忽略大小写"""
+        entries = self._substrings.get(name.lower())
+        return entries[0] if entries else None
+
+    def search(
+        self,
+        query: str,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+        include_roots: bool = False,
+    ) -> list[AreaEntry]:
+        """搜索分区
+
+        排序：名称完全相同 > 前缀匹配 > 子串匹配 > 按字符顺序的模糊匹配，
+        同一档内名称短的在前。模糊匹配同时匹配"主分区名+子分区名"，
+        如"网游英雄"可以匹配"网游/英雄联盟"。
+
+        Args:
+            query: 搜索词，忽略大小写和空白
+            limit: 最多返回的结果数
+            include_roots: 是否包含主分区
+
+        Returns:
+            list[AreaEntry]: 匹配的分区
+        """
+        key = "".join(query.lower().split())
+        if not key:
+            return []
+
+        scored: dict[AreaEntry, tuple] = {}
+        for entry in self._substrings.get(key, ()):
+            if entry.is_root and not include_roots:
+                continue
+            name = entry.name.lower()
+            rank = 0 if name == key else (1 if name.startswith(key) else 2)
+            scored[entry] = (rank, 0, len(name), entry.order)
+
+        if len(scored) < limit:
+            for entry in self._entries:
+                if entry in scored or (entry.is_root and not include_roots):
+                    continue
+                span = _subsequence_span(key, entry.name.lower())
+                if span is None:
+                    span = _subsequence_span(key, (entry.parent_name + entry.name).lower())
+                    if span is None:
+                        continue
+                scored[entry] = (3, span, len(entry.name), entry.order)
+
+        return sorted(scored, key=scored.__getitem__)[:limit]
+
+
+def _subsequence_span(key: str, text: str) -> Optional[int]:
+    """key的字符按顺序出现在text中时返回所占跨度，否则返回None"""
+    start = -1
+    pos = -1
+    for char in key:
+        pos = text.find(char, pos + 1)
+        if pos == -1:
+            return None
+        if start == -1:
+            start = pos
+    return pos - start + 1
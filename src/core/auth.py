@@ -1,21 +1,34 @@
 """登录管理模块
 
 处理二维码登录、登录状态检测和凭证刷新。
+
+- AsyncAuthManager: 基于共享aiohttp会话的异步接口，轮询间隔随扫码状态调整
+- AuthManager: 同步接口，在后台事件循环中调用AsyncAuthManager
 """
 
+import asyncio
 import logging
-from time import sleep
-from typing import Optional, Callable
+from typing import TYPE_CHECKING, Optional, Callable
 from dataclasses import dataclass
 from enum import Enum, auto
 
-import requests
-
 from ..utils.constants import ApiEndpoints, USER_AGENT
+from ..utils.json_codec import json_loads
 from .config import ConfigManager
+from .http_session import clear_http_cookies, get_http_session, network_errors, run_sync
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logger = logging.getLogger(__name__)
 
+# 等待扫码时的轮询间隔（秒）
+QR_POLL_INTERVAL_PENDING = 2.0
+# 已扫码等待确认时的轮询间隔（秒），确认后尽快完成登录
+QR_POLL_INTERVAL_SCANNED = 0.5
+# 连续网络错误达到此次数时放弃轮询
+QR_POLL_MAX_ERRORS = 3
+
 
 class LoginStatus(Enum):
     """登录状态"""
@@ -35,11 +48,31 @@ class QRLoginResult:
     message: str = ""
 
 
-class AuthManager:
-    """登录管理器 - 处理B站二维码登录流程"""
+class AsyncAuthManager:
+    """异步登录管理器 - 处理B站二维码登录流程
 
-    def __init__(self, config_manager: ConfigManager):
+    请求通过当前事件循环共享的aiohttp会话发送，轮询时复用同一个连接。
+    取消登录时直接取消运行login_with_qr()或wait_for_login()的任务。
+
+    Args:
+        config_manager: 配置管理器
+        session: 使用的会话，None表示使用get_http_session()
+    """
+
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        session: Optional["aiohttp.ClientSession"] = None,
+    ):
         self.config_manager = config_manager
+        self._session = session
+
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        """请求使用的会话"""
+        if self._session is not None:
+            return self._session
+        return get_http_session()
 
     @classmethod
     def _get_headers(cls) -> dict[str, str]:
@@ -50,7 +83,7 @@ class AuthManager:
             "Accept-Language": "zh-CN,zh;q=0.9",
         }
 
-    def generate_qr(self) -> tuple[str, str]:
+    async def generate_qr(self) -> tuple[str, str]:
         """生成二维码
 
         Returns:
@@ -60,13 +93,12 @@ class AuthManager:
             Exception: 生成失败时抛出
         """
         try:
-            response = requests.get(
+            async with self.session.get(
                 ApiEndpoints.GENERATE_QR,
                 headers=self._get_headers(),
-                timeout=10,
-            )
-            response.raise_for_status()
-            data = response.json()
+            ) as response:
+                response.raise_for_status()
+                data = json_loads(await response.read())
 
             if data.get("code") != 0:
                 raise Exception(f"生成二维码失败: {data.get('message')}")
@@ -77,14 +109,14 @@ class AuthManager:
             logger.info("二维码已生成")
             return qr_url, qr_key
 
-        except requests.RequestException as e:
+        except network_errors() as e:
             logger.error(f"网络请求失败: {e}")
             raise Exception(f"网络请求失败: {e}")
         except Exception as e:
             logger.error(f"生成二维码失败: {e}")
             raise
 
-    def poll_login_status(self, qr_key: str, scanned_callback: Optional[Callable] = None) -> QRLoginResult:
+    async def poll_login_status(self, qr_key: str, scanned_callback: Optional[Callable] = None) -> QRLoginResult:
         """轮询登录状态
 
         Args:
@@ -95,20 +127,19 @@ class AuthManager:
             QRLoginResult: 登录结果
         """
         try:
-            response = requests.get(
+            async with self.session.get(
                 ApiEndpoints.GET_QR_RES,
                 headers=self._get_headers(),
                 params={"qrcode_key": qr_key},
-                timeout=10,
-            )
-            response.raise_for_status()
-            data = response.json()
+            ) as response:
+                response.raise_for_status()
+                data = json_loads(await response.read())
 
             code = data["data"]["code"]
 
             if code == 0:
                 # 登录成功
-                cookies = response.cookies.get_dict()
+                cookies = {key: morsel.value for key, morsel in response.cookies.items()}
                 refresh_token = data["data"].get("refresh_token", "")
                 logger.info("二维码登录成功")
                 return QRLoginResult(
@@ -141,7 +172,7 @@ class AuthManager:
                 message="等待扫码...",
             )
 
-        except requests.RequestException as e:
+        except network_errors() as e:
             logger.error(f"轮询登录状态失败: {e}")
             return QRLoginResult(
                 status=LoginStatus.ERROR,
@@ -154,11 +185,57 @@ class AuthManager:
                 message=f"未知错误: {e}",
             )
 
-    def login_with_qr(self, status_callback: Optional[Callable[[str], None]] = None) -> bool:
+    async def wait_for_login(
+        self, qr_key: str, status_callback: Optional[Callable[[str], None]] = None
+    ) -> QRLoginResult:
+        """轮询登录状态，直到登录成功、二维码过期或出错
+
+        等待扫码时每 QR_POLL_INTERVAL_PENDING 秒轮询一次，
+        扫码后改为每 QR_POLL_INTERVAL_SCANNED 秒，尽快完成登录。
+        偶发的网络错误会重试，连续 QR_POLL_MAX_ERRORS 次出错才返回。
+
+        Args:
+            qr_key: 二维码key
+            status_callback: 状态更新回调，接收状态消息字符串
+
+        Returns:
+            QRLoginResult: 最终的登录结果（SUCCESS、EXPIRED或ERROR）
+        """
+        scanned_notified = False
+        errors = 0
+
+        while True:
+            result = await self.poll_login_status(qr_key)
+
+            if result.status in (LoginStatus.SUCCESS, LoginStatus.EXPIRED):
+                return result
+
+            if result.status == LoginStatus.ERROR:
+                errors += 1
+                if errors >= QR_POLL_MAX_ERRORS:
+                    return result
+            else:
+                errors = 0
+
+            if result.status == LoginStatus.SCANNED:
+                if not scanned_notified:
+                    scanned_notified = True
+                    if status_callback:
+                        status_callback("二维码已扫描，请在手机上确认")
+                await asyncio.sleep(QR_POLL_INTERVAL_SCANNED)
+            else:
+                await asyncio.sleep(QR_POLL_INTERVAL_PENDING)
+
+    async def login_with_qr(
+        self,
+        status_callback: Optional[Callable[[str], None]] = None,
+        qr_callback: Optional[Callable[[str], None]] = None,
+    ) -> bool:
         """完整的二维码登录流程
 
         Args:
             status_callback: 状态更新回调，接收状态消息字符串
+            qr_callback: 二维码生成后的回调，接收二维码URL
 
         Returns:
             bool: 登录是否成功
@@ -171,47 +248,38 @@ class AuthManager:
         try:
             # 生成二维码
             notify("正在生成二维码...")
-            qr_url, qr_key = self.generate_qr()
+            qr_url, qr_key = await self.generate_qr()
+            if qr_callback:
+                qr_callback(qr_url)
             notify("二维码已生成，请使用B站APP扫码")
 
             # 轮询等待登录
-            scanned_notified = False
-
-            while True:
-                result = self.poll_login_status(qr_key)
-
-                if result.status == LoginStatus.SUCCESS:
-                    # 保存登录信息
-                    if result.cookies is None:
-                        notify("登录失败：未获取到凭证")
-                        return False
-                    self.config_manager.update_cookies(
-                        result.cookies,
-                        result.refresh_token or "",
-                    )
-                    notify("登录成功！")
-                    return True
-
-                if result.status == LoginStatus.EXPIRED:
-                    notify("二维码已过期，请重试")
-                    return False
+            result = await self.wait_for_login(qr_key, notify)
 
-                if result.status == LoginStatus.SCANNED and not scanned_notified:
-                    notify("二维码已扫描，请在手机上确认")
-                    scanned_notified = True
-
-                if result.status == LoginStatus.ERROR:
-                    notify(f"登录出错: {result.message}")
+            if result.status == LoginStatus.SUCCESS:
+                # 保存登录信息
+                if result.cookies is None:
+                    notify("登录失败：未获取到凭证")
                     return False
+                self.config_manager.update_cookies(
+                    result.cookies,
+                    result.refresh_token or "",
+                )
+                notify("登录成功！")
+                return True
 
-                sleep(1)
+            if result.status == LoginStatus.EXPIRED:
+                notify("二维码已过期，请重试")
+            else:
+                notify(f"登录出错: {result.message}")
+            return False
 
         except Exception as e:
             logger.error(f"登录流程异常: {e}")
             notify(f"登录失败: {e}")
             return False
 
-    def check_auth(self) -> bool:
+    async def check_auth(self) -> bool:
         """检查登录态是否有效
 
         Returns:
@@ -224,14 +292,13 @@ class AuthManager:
             return False
 
         try:
-            response = requests.get(
+            async with self.session.get(
                 ApiEndpoints.GET_USER_STATUS,
                 headers=self._get_headers(),
                 cookies=config.cookies,
-                timeout=10,
-            )
-            response.raise_for_status()
-            data = response.json()
+            ) as response:
+                response.raise_for_status()
+                data = json_loads(await response.read())
 
             # code == -101 表示未登录或cookie过期
             if data.get("code") == -101:
@@ -245,7 +312,7 @@ class AuthManager:
             logger.warning(f"登录态检查返回未知状态: {data}")
             return False
 
-        except requests.RequestException:
+        except network_errors():
             # 网络错误时不判定为未登录，避免频繁要求重新登录
             logger.warning("检查登录态网络错误，假设登录态有效")
             return True
@@ -253,6 +320,14 @@ class AuthManager:
             logger.error(f"检查登录态异常: {e}")
             return False
 
+    def logout(self):
+        """退出登录：清空配置中的登录信息和会话中保存的cookie"""
+        self.config_manager.clear()
+        if self._session is not None and not self._session.closed:
+            self._session.cookie_jar.clear()
+        clear_http_cookies()
+        logger.info("已退出登录")
+
     def get_user_id(self) -> int:
         """获取当前用户ID"""
         return self.config_manager.get_config().user_id
@@ -263,4 +338,49 @@ class AuthManager:
 
     def get_csrf(self) -> str:
         """获取csrf token"""
-        return self.config_manager.get_config().csrf
\ No newline at end of file
+        return self.config_manager.get_config().csrf
+
+
+class AuthManager:
+    """登录管理器 - 处理B站二维码登录流程
+
+    AsyncAuthManager的同步接口，请求在后台事件循环中执行，回调也在该线程中调用。
+    不能在事件循环所在的线程中调用，在事件循环中请直接使用 aio 属性的异步接口。
+    """
+
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+        self.aio = AsyncAuthManager(config_manager)
+        """异步接口"""
+
+    def generate_qr(self) -> tuple[str, str]:
+        """生成二维码，见AsyncAuthManager.generate_qr"""
+        return run_sync(self.aio.generate_qr())
+
+    def poll_login_status(self, qr_key: str, scanned_callback: Optional[Callable] = None) -> QRLoginResult:
+        """轮询一次登录状态，见AsyncAuthManager.poll_login_status"""
+        return run_sync(self.aio.poll_login_status(qr_key, scanned_callback))
+
+    def login_with_qr(self, status_callback: Optional[Callable[[str], None]] = None) -> bool:
+        """完整的二维码登录流程，见AsyncAuthManager.login_with_qr"""
+        return run_sync(self.aio.login_with_qr(status_callback))
+
+    def check_auth(self) -> bool:
+        """检查登录态是否有效，见AsyncAuthManager.check_auth"""
+        return run_sync(self.aio.check_auth())
+
+    def logout(self):
+        """退出登录，见AsyncAuthManager.logout"""
+        self.aio.logout()
+
+    def get_user_id(self) -> int:
+        """获取当前用户ID"""
+        return self.aio.get_user_id()
+
+    def get_cookies(self) -> dict:
+        """获取当前cookies"""
+        return self.aio.get_cookies()
+
+    def get_csrf(self) -> str:
+        """获取csrf token"""
+        return self.aio.get_csrf()
@@ -1,24 +1,53 @@
 """配置管理模块
 
 使用dataclasses和pathlib管理配置文件的读写。
+配置文件原子写入（临时文件+替换），频繁的修改合并为一次延迟的后台写入，内容未变化时不写入。
+
+版本3起配置分为两个文件：
+- config.json: 登录凭证、直播设置等启动时就需要的小字段
+- config_cache.json: 分区列表、直播间数据等大块数据，紧凑JSON，第一次访问时才读取
 """
 
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
+import asyncio
 import json
 import logging
-
-from ..utils.constants import CONFIG_DEFAULT_VERSION, CONFIG_FILE, LIVEHIME_BUILD, LIVEHIME_VERSION
+import threading
+
+from ..utils.constants import (
+    CONFIG_CACHE_FILE,
+    CONFIG_CACHE_VERSION,
+    CONFIG_DEFAULT_VERSION,
+    CONFIG_FILE,
+    LIVEHIME_BUILD,
+    LIVEHIME_VERSION,
+)
+from ..utils.fileio import atomic_write
+from ..utils.json_codec import JSONDecodeError, json_dumps, json_loads
+from .area_index import DEFAULT_SEARCH_LIMIT, AreaEntry, AreaIndex
 
 logger = logging.getLogger(__name__)
 
+# 冷数据字段，修改时记录在Config._cold_modified中
+_COLD_FIELDS = frozenset({"room_data", "area_list"})
+# 缓存文件中冷数据的key和默认值
+_CACHE_PARTS = (("room", {}), ("area", []))
+# 保存时生成的文件内容：(序号, 配置文件内容, 修改过的冷数据的内容)
+_Snapshot = tuple[int, bytes, Optional[dict[str, bytes]]]
+
+# schedule_save()的默认延迟（秒），期间的多次修改只写入一次
+SAVE_DEBOUNCE_DELAY = 1.0
+
 
 @dataclass
 class Config:
     """配置数据类
 
     存储用户登录态、直播间配置等信息。
+    room_data和area_list是冷数据，第一次访问时通过_cold_loader从缓存文件读取。
+    修改字段会记录修改标记，保存时只重新生成修改过的文件内容。
     """
 
     # 用户信息
@@ -33,17 +62,20 @@ class Config:
     title: str = ""
     area_id: int = -1
 
+    # 弹幕设置（是否写入弹幕归档，默认关闭）
+    danmaku_archive: bool = False
+
     # 推流信息
     rtmp_addr: str = ""
     rtmp_code: str = ""
     rtmp_code_old: str = ""
 
-    # 直播间数据
-    room_data: dict = field(default_factory=dict)
+    # 直播间数据（冷数据）
+    _room_data: Optional[dict] = field(default=None, repr=False)
     live_status: int = -1
 
-    # 分区数据
-    area_list: list = field(default_factory=list)
+    # 分区数据（冷数据）
+    _area_list: Optional[list] = field(default=None, repr=False)
 
     # 直播姬版本
     live_version: str = LIVEHIME_VERSION
@@ -51,6 +83,92 @@ class Config:
 
     config_version: int = CONFIG_DEFAULT_VERSION
 
+    # 读取冷数据的函数，读取一次后置为None
+    _cold_loader: Optional[Callable[["Config"], None]] = field(
+        default=None, repr=False, compare=False
+    )
+
+    # 修改标记：配置文件中的字段是否修改过、修改过的冷数据（缓存文件中的key）
+    _modified: bool = field(default=True, repr=False, compare=False)
+    _cold_modified: set = field(default_factory=set, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if not name.startswith("_") and name not in _COLD_FIELDS:
+            object.__setattr__(self, "_modified", True)
+        object.__setattr__(self, name, value)
+
+    @property
+    def room_data(self) -> dict:
+        """直播间数据（第一次访问时读取缓存文件）"""
+        if self._room_data is None:
+            self.load_cold_data()
+        return self._room_data
+
+    @room_data.setter
+    def room_data(self, value: dict) -> None:
+        self._room_data = value
+        self._cold_modified.add("room")
+
+    @property
+    def area_list(self) -> list:
+        """分区列表（第一次访问时读取缓存文件）"""
+        if self._area_list is None:
+            self.load_cold_data()
+        return self._area_list
+
+    @area_list.setter
+    def area_list(self, value: list) -> None:
+        self._area_list = value
+        self._cold_modified.add("area")
+
+    @property
+    def has_cold_data(self) -> bool:
+        """冷数据是否已经读取或设置过"""
+        return self._room_data is not None or self._area_list is not None
+
+    def set_cold_loader(self, loader: Callable[["Config"], None]) -> None:
+        """清除冷数据，之后第一次访问时调用loader读取"""
+        self._room_data = None
+        self._area_list = None
+        self._cold_modified.clear()
+        self._cold_loader = loader
+
+    @property
+    def is_modified(self) -> bool:
+        """配置文件中的字段在上次clear_modified()之后是否修改过"""
+        return self._modified or (CONFIG_DEFAULT_VERSION < 3 and bool(self._cold_modified))
+
+    def clear_modified(self) -> None:
+        """清除配置文件字段的修改标记"""
+        self._modified = False
+        if CONFIG_DEFAULT_VERSION < 3:
+            # 版本3之前冷数据保存在配置文件中
+            self._cold_modified.clear()
+
+    def take_cold_modified(self) -> dict[str, Any]:
+        """取出修改过的冷数据并清除修改标记，不会读取缓存文件
+
+        Returns:
+            dict: 缓存文件中的key（"room"、"area"） -> 修改后的数据
+        """
+        modified = {}
+        if "room" in self._cold_modified:
+            modified["room"] = self._room_data
+        if "area" in self._cold_modified:
+            modified["area"] = self._area_list
+        self._cold_modified.clear()
+        return modified
+
+    def load_cold_data(self) -> None:
+        """读取冷数据，已设置的字段不会被覆盖"""
+        loader, self._cold_loader = self._cold_loader, None
+        if loader is not None:
+            loader(self)
+        if self._room_data is None:
+            self._room_data = {}
+        if self._area_list is None:
+            self._area_list = []
+
     def to_dict(self) -> dict:
         """转换为字典，默认使用 CONFIG_DEFAULT_VERSION"""
         if CONFIG_DEFAULT_VERSION == 1:
@@ -58,7 +176,7 @@ class Config:
         elif CONFIG_DEFAULT_VERSION == 2:
             return self.to_dict_v2()
         else:
-            return self.to_dict_v2()
+            return self.to_dict_v3()
 
     def to_dict_v1(self) -> dict:
         """转换为字典"""
@@ -105,8 +223,57 @@ class Config:
         }
         return result
 
+    def to_dict_v3(self) -> dict:
+        """转换为字典（不含冷数据，冷数据见to_cache_dict）"""
+        result = {
+            "version": 3,
+            "user": {
+                "uid": self.user_id,
+                "cookies_str": self.cookies_str,
+                "csrf": self.csrf,
+                "refresh_token": self.refresh_token,
+                "refresh_time": 0,
+            },
+            "live": {
+                "room_id": self.room_id,
+                "title": self.title,
+                "area_id": self.area_id,
+                "live_status": self.live_status,
+                "rtmp_addr": self.rtmp_addr,
+                "rtmp_code": self.rtmp_code,
+            },
+            "danmaku": {
+                "archive": self.danmaku_archive,
+            },
+            "live_version": self.live_version,
+            "live_build": self.live_build,
+        }
+        return result
+
+    def to_cache_dict(self) -> dict:
+        """冷数据转换为字典"""
+        return {
+            "version": CONFIG_CACHE_VERSION,
+            "room": self.room_data,
+            "area": self.area_list,
+        }
+
+    def from_cache_dict(self, data: dict) -> bool:
+        """从冷数据字典加载，已设置的字段不会被覆盖
+
+        Returns:
+            bool: 版本是否符合
+        """
+        if data.get("version") != CONFIG_CACHE_VERSION:
+            return False
+        if self._room_data is None:
+            self._room_data = data.get("room", {})
+        if self._area_list is None:
+            self._area_list = data.get("area", [])
+        return True
+
     def from_dict(self, data: dict) -> None:
-        """从字典加载，支持版本1和版本2
+        """从字典加载，支持版本1、2、3
         没有版本标识或版本标识不符合时默认为版本1，读取结果不符合时视为版本2
         """
         version = data.get("version", 1)
@@ -114,6 +281,8 @@ class Config:
             success = self.from_dict_v1(data)
         elif version == 2:
             success = self.from_dict_v2(data)
+        elif version == 3:
+            success = self.from_dict_v3(data)
         else:
             # 未知版本，尝试版本1
             success = self.from_dict_v1(data)
@@ -186,6 +355,38 @@ class Config:
                 self.cookies = {}
         return True
 
+    def from_dict_v3(self, data: dict) -> bool:
+        """从版本3字典加载（冷数据在缓存文件中），不符合时尝试版本2"""
+        if "user" not in data or "data" in data:
+            return self.from_dict_v2(data)
+        self.config_version = 3
+        user_data = data.get("user", {})
+        live_data = data.get("live", {})
+        # 用户信息
+        self.user_id = int(user_data.get("uid", -1))
+        self.csrf = user_data.get("csrf", "")
+        self.refresh_token = user_data.get("refresh_token", "")
+        self.cookies_str = user_data.get("cookies_str", "")
+        # 直播设置
+        self.room_id = int(live_data.get("room_id", -1))
+        self.title = live_data.get("title", "")
+        self.area_id = int(live_data.get("area_id", -1))
+        self.live_status = int(live_data.get("live_status", -1))
+        self.rtmp_addr = live_data.get("rtmp_addr", "")
+        self.rtmp_code = live_data.get("rtmp_code", "")
+        # 弹幕设置
+        self.danmaku_archive = bool(data.get("danmaku", {}).get("archive", False))
+        # 直播姬版本
+        self.live_version = data.get("live_version", LIVEHIME_VERSION)
+        self.live_build = data.get("live_build", LIVEHIME_BUILD)
+        # 恢复cookies对象
+        if self.cookies_str and not self.cookies:
+            try:
+                self.cookies = json.loads(self.cookies_str)
+            except json.JSONDecodeError:
+                self.cookies = {}
+        return True
+
     def is_valid(self) -> bool:
         """检查配置是否有效"""
         return (
@@ -204,12 +405,36 @@ class ConfigManager:
     """配置管理器
 
     负责配置的持久化存储和读取。
+
+    - save(): 立即在当前线程写入
+    - save_async(): 在事件循环线程生成文件内容，在线程池中写入，不阻塞事件循环
+    - schedule_save(): 在调用线程生成文件内容，延迟后在后台线程写入，延迟内的多次调用合并为一次
+    - flush(): 立即写入还未执行的延迟写入，退出前调用
+
+    load()只读取配置文件，分区列表和直播间数据在第一次访问时从缓存文件读取。
+
+    Args:
+        config_path: 配置文件路径
+        cache_path: 缓存文件路径，默认与配置文件在同一目录
     """
 
-    def __init__(self, config_path: Optional[Path] = None):
+    def __init__(self, config_path: Optional[Path] = None, cache_path: Optional[Path] = None):
         self.config_path = config_path or CONFIG_FILE
-        self.config = Config()
+        self.cache_path = cache_path or self.config_path.with_name(CONFIG_CACHE_FILE.name)
+        self.config = self._new_config()
         self._has_loaded = False  # 标记是否成功加载过配置
+        self._area_index: Optional[AreaIndex] = None  # 分区索引，分区列表变化后重新建立
+        self._saved_content: Optional[bytes] = None  # 上次读取或写入的文件内容
+        self._saved_cache_content: Optional[bytes] = None  # 上次读取或写入的缓存文件内容
+        self._content: Optional[bytes] = None  # 最近生成的配置文件内容，配置没有修改时重复使用
+        self._cold_parts: dict[str, bytes] = {}  # 修改过的冷数据最近生成的内容
+        # 缓存文件中各部分的内容，只在写入线程中使用
+        self._file_cache_parts: Optional[dict[str, bytes]] = None
+        self._save_lock = threading.Lock()  # 保证同时只有一个线程在写入
+        self._timer_lock = threading.Lock()
+        self._snapshot_seq = 0  # 最近生成的文件内容的序号
+        self._written_seq = 0  # 最近写入的文件内容的序号，避免旧内容覆盖新内容
+        self._save_timer: Optional[threading.Timer] = None  # 等待执行的延迟写入
 
     def load(self) -> bool:
         """从文件加载配置
@@ -223,10 +448,15 @@ class ConfigManager:
                 self._has_loaded = False
                 return False
 
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            content = self.config_path.read_bytes()
+            data = json.loads(content)
 
+            # 冷数据重新从缓存文件读取，旧版本配置中带有的冷数据优先
+            self.config.set_cold_loader(self._load_cache)
+            self._cold_parts = {}
             self.config.from_dict(data)
+            self._saved_content = content
+            self._area_index = None
             self._has_loaded = True
             logger.info("配置加载成功")
             return True
@@ -241,29 +471,80 @@ class ConfigManager:
             return False
 
     def save(self) -> bool:
-        """保存配置到文件
+        """立即保存配置到文件（取代等待中的延迟保存）
+
+        Returns:
+            bool: 保存是否成功，内容未变化时不写入，也返回True
+        """
+        self._cancel_scheduled_save()
+        snapshot = self._take_snapshot()
+        if snapshot is None:
+            return False
+        return self._write_snapshot(snapshot)
+
+    async def save_async(self) -> bool:
+        """立即保存配置到文件，只把写入放到线程池（取代等待中的延迟保存）
 
         Returns:
-            bool: 保存是否成功
+            bool: 保存是否成功，内容未变化时不写入，也返回True
+        """
+        self._cancel_scheduled_save()
+        snapshot = self._take_snapshot()
+        if snapshot is None:
+            return False
+        return await asyncio.to_thread(self._write_snapshot, snapshot)
+
+    def _take_snapshot(self) -> Optional[_Snapshot]:
+        """在调用线程中生成要写入的文件内容
+
+        配置只在修改它的线程中读取，写入线程只接触生成好的bytes。
+        只重新生成修改过的部分，不会读取缓存文件。
+
+        Returns:
+            (序号, 配置文件内容, 修改过的冷数据的内容)，冷数据没有修改过时为None；
+            没有有效数据或生成失败时返回None
         """
         # 检查是否有有效数据可以保存（已登录或已加载过配置）
         has_valid_data = self._has_loaded or self.config.is_logged_in()
         if not has_valid_data:
             logger.debug("没有有效配置数据，跳过保存")
-            return False
+            return None
 
         try:
-            # 更新cookies_str
-            if self.config.cookies:
-                self.config.cookies_str = json.dumps(
-                    self.config.cookies, separators=(",", ":"), ensure_ascii=False
-                )
+            cold_parts = self._serialize_cold_parts()
+            content = self._serialize()
+        except Exception as e:
+            logger.error(f"保存配置失败: {e}")
+            return None
+
+        with self._timer_lock:
+            self._snapshot_seq += 1
+            seq = self._snapshot_seq
+        return seq, content, cold_parts
+
+    def _write_snapshot(self, snapshot: _Snapshot) -> bool:
+        """写入_take_snapshot()生成的文件内容，内容未变化的文件不写入
+
+        Returns:
+            bool: 保存是否成功，已经写入过更新的内容时跳过，也返回True
+        """
+        seq, content, cold_parts = snapshot
+        try:
+            with self._save_lock:
+                if seq < self._written_seq:
+                    logger.debug("已写入更新的配置，跳过保存")
+                    return True
+                self._written_seq = seq
 
-            # 确保目录存在
-            self.config_path.parent.mkdir(parents=True, exist_ok=True)
+                if cold_parts is not None:
+                    self._write_cache(cold_parts)
+
+                if content == self._saved_content:
+                    logger.debug("配置未变化，跳过保存")
+                    return True
 
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(self.config.to_dict(), f, ensure_ascii=False, indent=4)
+                atomic_write(self.config_path, content)
+                self._saved_content = content
 
             logger.info("配置保存成功")
             return True
@@ -272,9 +553,157 @@ class ConfigManager:
             logger.error(f"保存配置失败: {e}")
             return False
 
+    def _write_cache(self, cold_parts: dict[str, bytes]) -> None:
+        """写入缓存文件，没有修改过的冷数据使用缓存文件中现有的内容（持有_save_lock）"""
+        if len(cold_parts) < len(_CACHE_PARTS):
+            if self._file_cache_parts is None:
+                self._file_cache_parts = self._read_cache_parts()
+            cold_parts = {**self._file_cache_parts, **cold_parts}
+        # 与json_dumps(Config.to_cache_dict())的结构相同
+        content = b'{"version":%d,"room":%s,"area":%s}' % (
+            CONFIG_CACHE_VERSION,
+            cold_parts["room"],
+            cold_parts["area"],
+        )
+        if content != self._saved_cache_content:
+            atomic_write(self.cache_path, content)
+            self._saved_cache_content = content
+        self._file_cache_parts = cold_parts
+
+    def _read_cache_parts(self) -> dict[str, bytes]:
+        """读取缓存文件中各部分的内容，文件不存在或格式不符时为默认值"""
+        data = {}
+        try:
+            loaded = json_loads(self.cache_path.read_bytes())
+            if isinstance(loaded, dict) and loaded.get("version") == CONFIG_CACHE_VERSION:
+                data = loaded
+        except FileNotFoundError:
+            pass
+        except (OSError, JSONDecodeError) as e:
+            logger.warning(f"读取缓存文件失败: {e}")
+        return {key: json_dumps(data.get(key, default)) for key, default in _CACHE_PARTS}
+
+    def _serialize(self) -> bytes:
+        """生成配置文件内容，配置文件中的字段没有修改时使用上次生成的内容"""
+        if self._content is not None and not self.config.is_modified:
+            return self._content
+        # 更新cookies_str
+        if self.config.cookies:
+            self.config.cookies_str = json.dumps(
+                self.config.cookies, separators=(",", ":"), ensure_ascii=False
+            )
+        content = json.dumps(self.config.to_dict(), ensure_ascii=False, indent=4).encode(
+            "utf-8"
+        )
+        self.config.clear_modified()
+        self._content = content
+        return content
+
+    def _new_config(self) -> Config:
+        """创建冷数据从缓存文件读取的空配置"""
+        config = Config()
+        config.set_cold_loader(self._load_cache)
+        return config
+
+    def _load_cache(self, config: Config) -> None:
+        """从缓存文件读取冷数据（Config._cold_loader）"""
+        try:
+            content = self.cache_path.read_bytes()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"读取缓存文件失败: {e}")
+            return
+
+        try:
+            data = json_loads(content)
+        except JSONDecodeError as e:
+            logger.warning(f"缓存文件格式错误: {e}")
+            return
+
+        if not isinstance(data, dict) or not config.from_cache_dict(data):
+            logger.info("缓存文件版本不符，已忽略")
+            return
+        self._saved_cache_content = content
+        logger.debug("缓存文件读取成功")
+
+    def _serialize_cold_parts(self) -> Optional[dict[str, bytes]]:
+        """重新生成修改过的冷数据的内容（版本3起），冷数据没有修改过时返回None
+
+        没有修改过的冷数据不读取也不重新生成，写入时使用缓存文件中现有的内容。
+        """
+        if CONFIG_DEFAULT_VERSION < 3:
+            return None
+        for key, value in self.config.take_cold_modified().items():
+            self._cold_parts[key] = json_dumps(value)
+        return dict(self._cold_parts) if self._cold_parts else None
+
+    def schedule_save(self, delay: float = SAVE_DEBOUNCE_DELAY) -> None:
+        """延迟保存配置
+
+        在当前线程生成文件内容（只重新生成修改过的部分），delay秒后在后台线程写入；
+        delay秒内再次调用会重新计时，只写入最后一次生成的内容。
+        后台线程不读取配置，修改配置的线程不需要加锁。
+
+        Args:
+            delay: 延迟时间（秒）
+        """
+        snapshot = self._take_snapshot()
+        if snapshot is None:
+            self._cancel_scheduled_save()
+            return
+        with self._timer_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            timer = self._save_timer = threading.Timer(
+                delay, self._run_scheduled_save, args=(snapshot,)
+            )
+            timer.daemon = True
+            timer.start()
+
+    def _run_scheduled_save(self, snapshot: _Snapshot) -> None:
+        with self._timer_lock:
+            if self._save_timer is not threading.current_thread():
+                # 已被取消或重新计时
+                return
+            self._save_timer = None
+        self._write_snapshot(snapshot)
+
+    def _cancel_scheduled_save(self) -> bool:
+        """取消等待中的延迟保存
+
+        Returns:
+            bool: 是否有等待中的延迟保存
+        """
+        with self._timer_lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is None:
+            return False
+        timer.cancel()
+        return True
+
+    def flush(self) -> bool:
+        """立即执行等待中的延迟保存
+
+        Returns:
+            bool: 保存是否成功，没有等待中的保存时返回True
+        """
+        if not self._cancel_scheduled_save():
+            return True
+        return self.save()
+
+    @property
+    def has_pending_save(self) -> bool:
+        """是否有等待中的延迟保存"""
+        return self._save_timer is not None
+
     def clear(self) -> None:
-        """清空配置"""
-        self.config = Config()
+        """清空配置（取消等待中的延迟保存）"""
+        self._cancel_scheduled_save()
+        self.config = self._new_config()
+        self._cold_parts = {}
+        # 直播间数据属于之前的账号，分区列表可以继续使用
+        self.config.room_data = {}
         logger.info("配置已清空")
 
     def get_config(self) -> Config:
@@ -291,6 +720,7 @@ class ConfigManager:
         if refresh_token:
             self.config.refresh_token = refresh_token
         logger.info(f"Cookies已更新, uid={self.config.user_id}")
+        self.schedule_save()
 
     def update_room_info(self, room_id: int, room_data: dict) -> None:
         """更新直播间信息"""
@@ -300,6 +730,7 @@ class ConfigManager:
         self.config.area_id = room_data.get("area_id", -1)
         self.config.live_status = room_data.get("live_status", -1)
         logger.info(f"直播间信息已更新, room_id={room_id}")
+        self.schedule_save()
 
     def update_stream_info(self, rtmp_addr: str, rtmp_code: str) -> None:
         """更新推流信息"""
@@ -307,10 +738,21 @@ class ConfigManager:
         self.config.rtmp_addr = rtmp_addr
         self.config.rtmp_code = rtmp_code
         logger.info("推流信息已更新")
+        self.schedule_save()
 
     def update_area_list(self, area_list: list) -> None:
-        """更新分区列表"""
+        """更新分区列表并重建分区索引"""
         self.config.area_list = area_list
+        self._area_index = AreaIndex(area_list)
+        self.schedule_save()
+
+    @property
+    def area_index(self) -> AreaIndex:
+        """分区索引，分区列表被替换或修改后自动重建"""
+        index = self._area_index
+        if index is None or not index.is_built_from(self.config.area_list):
+            index = self._area_index = AreaIndex(self.config.area_list)
+        return index
 
     def get_parent_area_id(self, area_id: int) -> Optional[int]:
         """根据分区ID获取主分区ID
@@ -321,11 +763,8 @@ class ConfigManager:
         if area_id <= 0:
             return None
 
-        for root_area in self.config.area_list:
-            for child in root_area.get("list", []):
-                if child.get("id") == area_id:
-                    return root_area.get("id", 0)
-        return None
+        entry = self.area_index.get(area_id)
+        return entry.parent_id if entry else None
 
     def get_area_name_by_id(self, area_id: int) -> Optional[tuple[str, str]]:
         """根据分区ID获取分区名称
@@ -336,17 +775,14 @@ class ConfigManager:
         if area_id <= 0:
             return None
 
-        for root_area in self.config.area_list:
-            for child in root_area.get("list", []):
-                if child.get("id") == area_id:
-                    return (root_area.get("name", ""), child.get("name", ""))
-        return None
+        entry = self.area_index.get(area_id)
+        return (entry.parent_name, entry.name) if entry else None
 
     def get_area_id_by_name(self, name: str) -> int:
         """根据分区名称获取分区ID
 
         Args:
-            name: 分区名称（支持部分匹配）
+            name: 分区名称（支持部分匹配，忽略大小写）
 
         Returns:
             int: 分区ID，未找到返回0
@@ -354,43 +790,36 @@ class ConfigManager:
         if not name:
             return 0
 
-        for root_area in self.config.area_list:
-            # 搜索子分区
-            for child in root_area.get("list", []):
-                if name in child.get("name", ""):
-                    return child.get("id", 0)
-            # 搜索主分区
-            if name in root_area.get("name", ""):
-                return root_area.get("id", 0)
+        # 每个主分区先搜索子分区，再搜索主分区本身
+        entry = self.area_index.find_first(name)
+        return entry.id if entry else 0
+
+    def search_areas(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[AreaEntry]:
+        """模糊搜索子分区
 
-        return 0
+        Args:
+            query: 搜索词（支持前缀、子串和按字符顺序的模糊匹配）
+            limit: 最多返回的结果数
+
+        Returns:
+            list[AreaEntry]: 按匹配程度排序的子分区
+        """
+        return self.area_index.search(query, limit)
 
     def is_valid_area_id(self, area_id: int) -> bool:
         """检查分区ID是否有效"""
         if area_id <= 0:
             return False
 
-        for root_area in self.config.area_list:
-            for child in root_area.get("list", []):
-                if child.get("id") == area_id:
-                    return True
-        return False
+        return self.area_index.get(area_id) is not None
 
     def get_root_areas(self) -> list[dict]:
         """获取所有主分区"""
-        return [
-            {"id": a.get("id"), "name": a.get("name")} for a in self.config.area_list
-        ]
+        return [entry.to_dict() for entry in self.area_index.roots]
 
     def get_child_areas(self, root_id: int) -> list[dict]:
         """获取指定主分区下的子分区"""
-        for root_area in self.config.area_list:
-            if root_area.get("id") == root_id:
-                return [
-                    {"id": c.get("id"), "name": c.get("name")}
-                    for c in root_area.get("list", [])
-                ]
-        return []
+        return [entry.to_dict() for entry in self.area_index.get_children(root_id)]
 
     def is_valid_title(self, title: str) -> bool:
         """检查标题是否有效"""
@@ -0,0 +1,372 @@
+"""弹幕归档模块
+
+将收到的命令按房间、按时间分段追加写入压缩文件：
+- 默认归档所有命令（完整的消息流），也可以只归档指定的命令，其他命令不解码，也不写入
+- 每个分段是一个多成员gzip文件，每次批量写入追加一个gzip成员
+- 旁边的索引文件记录每个成员的时间范围和偏移，按时间读取时不需要解压整个文件
+- 命令在事件循环中只做序列化，压缩、写入和fsync在单独的线程中定时批量执行
+- 磁盘跟不上时合并批次，缓冲区满后丢弃新记录并计数，内存占用有上限
+
+目录结构::
+
+    <archive_dir>/<room_id>/<分段开始时间戳>.ndjson.gz
+    <archive_dir>/<room_id>/<分段开始时间戳>.idx
+"""
+
+import asyncio
+import gzip
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, AbstractSet, Iterator, Optional
+
+from .danmaku_handler import BaseHandler
+from ..utils.json_codec import json_dumps, json_loads
+
+if TYPE_CHECKING:
+    from .danmaku_fetcher import DanmakuClient
+
+logger = getLogger(__name__)
+
+__all__ = (
+    "DEFAULT_ARCHIVE_CMDS",
+    "DanmakuArchive",
+    "ArchiveHandler",
+    "read_archive",
+)
+
+# 默认归档目录
+DEFAULT_ARCHIVE_DIR = Path("danmaku_archive")
+# 默认分段时长（秒）
+DEFAULT_SEGMENT_DURATION = 3600
+# 默认批量写入间隔（秒）
+DEFAULT_FLUSH_INTERVAL = 1.0
+# 压缩等级，归档以吞吐量为主
+DEFAULT_COMPRESS_LEVEL = 6
+# 默认最多同时等待写入的批次数，超过后定时写入推迟，缓冲区合并到下一批
+DEFAULT_MAX_PENDING_BATCHES = 4
+# 默认缓冲区最多保存的记录数（所有房间合计），超过后丢弃新记录
+DEFAULT_MAX_BUFFERED_RECORDS = 100_000
+# 只归档常用消息时使用的命令：弹幕、礼物、醒目留言、上舰
+DEFAULT_ARCHIVE_CMDS = frozenset(
+    {
+        "DANMU_MSG",
+        "DANMU_MSG_MIRROR",
+        "SEND_GIFT",
+        "COMBO_SEND",
+        "SUPER_CHAT_MESSAGE",
+        "GUARD_BUY",
+        "USER_TOAST_MSG",
+    }
+)
+
+DATA_SUFFIX = ".ndjson.gz"
+INDEX_SUFFIX = ".idx"
+
+# 索引项：成员第一条记录时间戳、最后一条记录时间戳、成员在数据文件中的偏移、成员长度
+INDEX_STRUCT = struct.Struct("<ddQQ")
+
+
+class _Segment:
+    """当前正在写入的分段"""
+
+    __slots__ = ("start", "data_file", "index_file")
+
+    def __init__(self, start: int, data_file: IO[bytes], index_file: IO[bytes]):
+        self.start = start
+        self.data_file = data_file
+        self.index_file = index_file
+
+    def close(self):
+        self.data_file.close()
+        self.index_file.close()
+
+
+class DanmakuArchive:
+    """弹幕归档存储
+
+    append()只把记录放进内存缓冲区，定时器到期后整批交给写入线程，
+    写入线程是单线程的，保证同一房间的记录按顺序落盘。
+
+    fsync变慢时等待写入的批次会堆积：达到max_pending_batches后定时写入推迟，
+    缓冲区合并到下一批；缓冲区达到max_buffered_records后丢弃新记录，计入dropped_records。
+
+    :param archive_dir: 归档目录
+    :param segment_duration: 每个分段文件覆盖的时长（秒）
+    :param flush_interval: 批量写入并fsync的间隔（秒）
+    :param compress_level: gzip压缩等级
+    :param max_pending_batches: 最多同时等待写入的批次数
+    :param max_buffered_records: 缓冲区最多保存的记录数
+    """
+
+    def __init__(
+        self,
+        archive_dir: Path = DEFAULT_ARCHIVE_DIR,
+        *,
+        segment_duration: int = DEFAULT_SEGMENT_DURATION,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        compress_level: int = DEFAULT_COMPRESS_LEVEL,
+        max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES,
+        max_buffered_records: int = DEFAULT_MAX_BUFFERED_RECORDS,
+    ):
+        self._archive_dir = Path(archive_dir)
+        self._segment_duration = segment_duration
+        self._flush_interval = flush_interval
+        self._compress_level = compress_level
+        self._max_pending_batches = max_pending_batches
+        self._max_buffered_records = max_buffered_records
+
+        self._buffers: dict[int, list[tuple[float, bytes]]] = {}
+        """房间ID -> 等待写入的(时间戳, 序列化后的行)"""
+        self._buffered_records = 0
+        """缓冲区中的记录数"""
+        self._pending_batches = 0
+        """已交给写入线程、还没有写完的批次数"""
+        self.dropped_records = 0
+        """缓冲区满时丢弃的记录数"""
+        self._dropping = False
+        """正在丢弃记录（只在开始和恢复时记录日志）"""
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        """定时写入的句柄"""
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="danmaku-archive"
+        )
+        self._segments: dict[int, _Segment] = {}
+        """房间ID -> 当前分段（只在写入线程中访问）"""
+        self._closed = False
+
+    @property
+    def archive_dir(self) -> Path:
+        """归档目录"""
+        return self._archive_dir
+
+    def append(self, room_id: int, command: dict, ts: Optional[float] = None):
+        """追加一条命令，需要在事件循环中调用
+
+        :param room_id: 房间ID
+        :param command: 命令数据
+        :param ts: 接收时间戳，None表示当前时间
+        """
+        if self._closed:
+            logger.debug("room=%d archive is closed, record dropped", room_id)
+            return
+        if self._buffered_records >= self._max_buffered_records:
+            if not self._dropping:
+                self._dropping = True
+                logger.warning(
+                    "archive buffer is full (%d records, %d batches pending), dropping records",
+                    self._buffered_records,
+                    self._pending_batches,
+                )
+            self.dropped_records += 1
+            return
+        if ts is None:
+            ts = time.time()
+        line = json_dumps({"ts": ts, "command": command}) + b"\n"
+        self._buffers.setdefault(room_id, []).append((ts, line))
+        self._buffered_records += 1
+
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self._flush_interval, self._on_flush_timer
+            )
+
+    def flush(self) -> "asyncio.Future[None]":
+        """把缓冲区整批交给写入线程，返回写入完成的future"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        buffers, self._buffers = self._buffers, {}
+        self._buffered_records = 0
+        self._pending_batches += 1
+        future = asyncio.wrap_future(self._executor.submit(self._write_buffers, buffers))
+        future.add_done_callback(self._on_batch_written)
+        return future
+
+    async def close(self):
+        """写入剩余的记录并释放资源，调用后append()不再接收记录"""
+        if self._closed:
+            return
+        # 先拒绝新的记录，等待写入期间追加的记录不会留在缓冲区中丢失
+        self._closed = True
+        await self.flush()
+        await asyncio.wrap_future(self._executor.submit(self._close_segments))
+        self._executor.shutdown(wait=False)
+
+    def _on_flush_timer(self):
+        self._flush_handle = None
+        if self._pending_batches >= self._max_pending_batches:
+            # 写入线程跟不上，推迟到下一次定时写入，缓冲区合并成一批
+            logger.debug("%d archive batches pending, flush deferred", self._pending_batches)
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self._flush_interval, self._on_flush_timer
+            )
+            return
+        self.flush()
+
+    def _on_batch_written(self, future: "asyncio.Future[None]"):
+        self._pending_batches -= 1
+        if self._dropping and self._pending_batches == 0:
+            self._dropping = False
+            logger.warning("archive writer caught up, %d records dropped in total", self.dropped_records)
+
+    # ===== 写入线程 =====
+
+    def _write_buffers(self, buffers: dict[int, list[tuple[float, bytes]]]):
+        """写入一批记录（写入线程）"""
+        for room_id, records in buffers.items():
+            try:
+                self._write_room(room_id, records)
+            except Exception:
+                logger.exception("room=%d archive write failed", room_id)
+
+    def _write_room(self, room_id: int, records: list[tuple[float, bytes]]):
+        # 一批记录可能跨越分段边界，按分段拆开写入
+        batch_start = 0
+        segment_start = self._get_segment_start(records[0][0])
+        for i in range(1, len(records)):
+            start = self._get_segment_start(records[i][0])
+            if start != segment_start:
+                self._write_member(room_id, segment_start, records[batch_start:i])
+                batch_start = i
+                segment_start = start
+        self._write_member(room_id, segment_start, records[batch_start:])
+
+    def _write_member(
+        self, room_id: int, segment_start: int, records: list[tuple[float, bytes]]
+    ):
+        """把记录压缩成一个gzip成员追加到分段，再写入索引"""
+        segment = self._open_segment(room_id, segment_start)
+        data = gzip.compress(
+            b"".join(line for _, line in records),
+            compresslevel=self._compress_level,
+            mtime=0,
+        )
+
+        data_file = segment.data_file
+        offset = data_file.seek(0, os.SEEK_END)
+        data_file.write(data)
+        data_file.flush()
+        os.fsync(data_file.fileno())
+
+        # 数据落盘后再写索引，索引中的成员总是完整的
+        index_file = segment.index_file
+        index_file.write(
+            INDEX_STRUCT.pack(records[0][0], records[-1][0], offset, len(data))
+        )
+        index_file.flush()
+        os.fsync(index_file.fileno())
+
+    def _open_segment(self, room_id: int, segment_start: int) -> _Segment:
+        segment = self._segments.get(room_id)
+        if segment is not None:
+            if segment.start == segment_start:
+                return segment
+            segment.close()
+
+        room_dir = self._archive_dir / str(room_id)
+        room_dir.mkdir(parents=True, exist_ok=True)
+        segment = _Segment(
+            segment_start,
+            open(room_dir / f"{segment_start}{DATA_SUFFIX}", "ab"),
+            open(room_dir / f"{segment_start}{INDEX_SUFFIX}", "ab"),
+        )
+        self._segments[room_id] = segment
+        return segment
+
+    def _close_segments(self):
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+
+    def _get_segment_start(self, ts: float) -> int:
+        return int(ts // self._segment_duration) * self._segment_duration
+
+
+class ArchiveHandler(BaseHandler):
+    """归档处理器
+
+    把订阅的命令原样写入归档，不做消息类型转换。
+
+    :param archive: 归档存储，可以被多个房间的处理器共用
+    :param cmds: 归档的命令，None表示所有命令（所有消息都需要解码）
+    """
+
+    def __init__(
+        self,
+        archive: DanmakuArchive,
+        cmds: Optional[AbstractSet[str]] = None,
+    ):
+        self._archive = archive
+        self._cmds = cmds
+
+    @property
+    def archive(self) -> DanmakuArchive:
+        return self._archive
+
+    def get_subscribed_cmds(self) -> Optional[AbstractSet[str]]:
+        """只订阅归档的命令"""
+        return self._cmds
+
+    def handle(self, client: "DanmakuClient", command: dict):
+        """记录命令"""
+        # 同一房间的其他处理器订阅的命令也会交给这里，需要再过滤一次
+        if self._cmds is not None:
+            cmd = command.get("cmd", "").partition(":")[0]
+            if cmd not in self._cmds:
+                return
+        self._archive.append(client.room_id or client.tmp_room_id, command)
+
+
+def read_archive(
+    room_id: int,
+    start_ts: float = 0,
+    end_ts: float = float("inf"),
+    archive_dir: Path = DEFAULT_ARCHIVE_DIR,
+) -> Iterator[dict]:
+    """按时间范围读取归档
+
+    只解压索引中时间范围有重叠的gzip成员。
+
+    :param room_id: 房间ID（真实ID）
+    :param start_ts: 开始时间戳（包含）
+    :param end_ts: 结束时间戳（不包含）
+    :param archive_dir: 归档目录
+    :return: {"ts": 接收时间戳, "command": 命令数据}
+    """
+    room_dir = Path(archive_dir) / str(room_id)
+    if not room_dir.is_dir():
+        return
+
+    segment_starts = sorted(
+        int(path.name[: -len(INDEX_SUFFIX)])
+        for path in room_dir.glob(f"*{INDEX_SUFFIX}")
+    )
+    for segment_start in segment_starts:
+        if segment_start >= end_ts:
+            break
+
+        index_data = (room_dir / f"{segment_start}{INDEX_SUFFIX}").read_bytes()
+        # 忽略写入中断导致的不完整索引项
+        usable = len(index_data) - len(index_data) % INDEX_STRUCT.size
+        members = [
+            (offset, length)
+            for first_ts, last_ts, offset, length in INDEX_STRUCT.iter_unpack(
+                index_data[:usable]
+            )
+            if last_ts >= start_ts and first_ts < end_ts
+        ]
+        if not members:
+            continue
+
+        with open(room_dir / f"{segment_start}{DATA_SUFFIX}", "rb") as f:
+            for offset, length in members:
+                f.seek(offset)
+                for line in gzip.decompress(f.read(length)).splitlines():
+                    record = json_loads(line)
+                    if start_ts <= record["ts"] < end_ts:
+                        yield record
@@ -7,32 +7,44 @@
 """
 
 import asyncio
-import json
 import struct
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
 from logging import getLogger
-from typing import Callable, Optional
+from typing import AbstractSet, Callable, Optional
 from zlib import decompress as zlib_decompress
 
 import aiohttp
 import yarl
-from brotli import decompress as brotli_decompress
 
 from .danmaku_handler import HandlerInterface
+from .danmaku_metrics import PipelineMetrics
 from .danmaku_protocol import (
-    HEADER_STRUCT,
     AuthError,
     AuthReplyCode,
     HeaderTuple,
     InitError,
     Operation,
     ProtoVer,
+    iter_packets,
     make_packet,
+    peek_cmd,
 )
 from .danmaku_wbi import USER_AGENT, get_wbi_signer
+from .http_cache import DANMAKU_SERVER_CONF_TTL, HttpCache
+from ..utils.constants import ApiEndpoints
+from ..utils.json_codec import json_loads
 
 logger = getLogger(__name__)
 
-__all__ = ("DanmakuClient",)
+__all__ = (
+    "DanmakuClient",
+    "DanmakuEndpoints",
+    "fetch_uid",
+    "get_buvid",
+    "init_buvid",
+)
 
 # API地址
 UID_INIT_URL = "https://api.bilibili.com/x/web-interface/nav"
@@ -53,6 +65,95 @@ DEFAULT_DANMAKU_SERVER_LIST = [
 ]
 
 
+@dataclass(frozen=True)
+class DanmakuEndpoints:
+    """客户端访问的地址，连接本地模拟服务器时替换"""
+
+    uid_init_url: str = UID_INIT_URL
+    buvid_init_url: str = BUVID_INIT_URL
+    room_init_url: str = ROOM_INIT_URL
+    danmaku_server_conf_url: str = DANMAKU_SERVER_CONF_URL
+    wbi_key_url: str = ApiEndpoints.GET_WBI_KEY
+    secure: bool = True
+    """True使用wss连接弹幕服务器，False使用ws"""
+
+
+DEFAULT_DANMAKU_ENDPOINTS = DanmakuEndpoints()
+
+
+# ===== 会话级初始化 =====
+# uid和buvid只取决于会话的cookie，共用会话的客户端（DanmakuHub）只需要初始化一次
+
+
+async def fetch_uid(
+    session: aiohttp.ClientSession,
+    endpoints: DanmakuEndpoints = DEFAULT_DANMAKU_ENDPOINTS,
+) -> Optional[int]:
+    """获取会话cookie对应的用户ID
+
+    :return: 用户ID，未登录为0，请求失败为None
+    """
+    cookies = session.cookie_jar.filter_cookies(yarl.URL(endpoints.uid_init_url))
+    sessdata_cookie = cookies.get("SESSDATA", None)
+    if sessdata_cookie is None or sessdata_cookie.value == "":
+        # 没有cookie，直接设置为未登录
+        return 0
+
+    try:
+        async with session.get(
+            endpoints.uid_init_url,
+            headers={"User-Agent": USER_AGENT},
+        ) as res:
+            if res.status != 200:
+                logger.warning("fetch_uid() failed, status=%d", res.status)
+                return None
+            data = await res.json()
+            if data["code"] != 0:
+                if data["code"] == -101:
+                    # 未登录
+                    return 0
+                logger.warning("fetch_uid() failed, message=%s", data["message"])
+                return None
+
+            data = data["data"]
+            if not data.get("isLogin", False):
+                return 0
+            return data["mid"]
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+        logger.exception("fetch_uid() failed:")
+        return None
+
+
+def get_buvid(
+    session: aiohttp.ClientSession,
+    endpoints: DanmakuEndpoints = DEFAULT_DANMAKU_ENDPOINTS,
+) -> str:
+    """获取会话cookie中的buvid，没有时返回空字符串"""
+    cookies = session.cookie_jar.filter_cookies(yarl.URL(endpoints.buvid_init_url))
+    buvid_cookie = cookies.get("buvid3", None)
+    return buvid_cookie.value if buvid_cookie else ""
+
+
+async def init_buvid(
+    session: aiohttp.ClientSession,
+    endpoints: DanmakuEndpoints = DEFAULT_DANMAKU_ENDPOINTS,
+) -> bool:
+    """访问首页，把buvid写入会话的cookie
+
+    :return: 会话cookie中是否有buvid
+    """
+    try:
+        async with session.get(
+            endpoints.buvid_init_url,
+            headers={"User-Agent": USER_AGENT},
+        ) as res:
+            if res.status != 200:
+                logger.warning("init_buvid() status error, status=%d", res.status)
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+        logger.exception("init_buvid() exception:")
+    return get_buvid(session, endpoints) != ""
+
+
 # 默认重连策略：固定1秒间隔
 def _constant_retry_policy(interval: float):
     def get_interval(_retry_count: int, _total_retry_count: int):
@@ -64,6 +165,26 @@ def _constant_retry_policy(interval: float):
 DEFAULT_RECONNECT_POLICY = _constant_retry_policy(1)
 
 
+def _brotli_decompress(data) -> bytes:
+    """brotli解压，第一次调用时导入brotli并替换为brotli.decompress"""
+    global _brotli_decompress
+    from brotli import decompress
+
+    _brotli_decompress = decompress
+    return decompress(data)
+
+
+async def _already_initialized() -> bool:
+    """init_room()中不需要初始化的步骤"""
+    return True
+
+
+# 压缩包体小于该字节数时直接在事件循环中解压，线程切换的开销比解压本身还大
+DEFAULT_DECOMPRESS_THRESHOLD = 16 * 1024
+# 解压线程池的默认线程数
+DEFAULT_DECOMPRESS_WORKERS = 1
+
+
 # ===== DanmakuClient =====
 
 
@@ -74,6 +195,12 @@ class DanmakuClient:
     :param uid: B站用户ID，0表示未登录，None表示自动获取
     :param session: cookie、连接池
     :param heartbeat_interval: 发送心跳包的间隔时间（秒）
+    :param decompress_threshold: 压缩包体达到该字节数时放到线程池解压，否则直接解压
+    :param decompress_workers: 解压线程池的线程数
+    :param decompress_executor: 解压用的线程池，None表示由客户端按需创建并负责关闭
+    :param endpoints: 访问的地址
+    :param metrics: 延迟统计，None表示不统计
+    :param http_cache: 缓存弹幕服务器列表的HTTP缓存，None表示不缓存
     """
 
     def __init__(
@@ -83,7 +210,17 @@ class DanmakuClient:
         uid: Optional[int] = None,
         session: Optional[aiohttp.ClientSession] = None,
         heartbeat_interval: float = 30,
+        decompress_threshold: int = DEFAULT_DECOMPRESS_THRESHOLD,
+        decompress_workers: int = DEFAULT_DECOMPRESS_WORKERS,
+        decompress_executor: Optional[Executor] = None,
+        endpoints: DanmakuEndpoints = DEFAULT_DANMAKU_ENDPOINTS,
+        metrics: Optional[PipelineMetrics] = None,
+        http_cache: Optional[HttpCache] = None,
     ):
+        self._endpoints = endpoints
+        self._metrics = metrics
+        self._http_cache = http_cache
+
         # session管理
         if session is None:
             self._session = aiohttp.ClientSession(
@@ -95,9 +232,18 @@ class DanmakuClient:
             self._own_session = False
             assert self._session.loop is asyncio.get_event_loop()
 
-        self._wbi_signer = get_wbi_signer(self._session)
+        self._wbi_signer = get_wbi_signer(self._session, endpoints.wbi_key_url)
         self._heartbeat_interval = heartbeat_interval
 
+        # 解压相关
+        self._decompress_threshold = decompress_threshold
+        """放到线程池解压的最小包体字节数"""
+        self._decompress_workers = decompress_workers
+        """解压线程池的线程数"""
+        self._decompress_executor = decompress_executor
+        """解压线程池"""
+        self._own_decompress_executor = decompress_executor is None
+
         # 房间相关
         self._tmp_room_id = room_id
         """临时房间ID（用于初始化）"""
@@ -123,10 +269,14 @@ class DanmakuClient:
         """心跳定时器handle"""
         self._need_init_room = True
         """是否需要初始化房间"""
+        self._frame_received_at = 0.0
+        """正在解析的帧的接收时间"""
 
         # 处理器
         self._handler: Optional[HandlerInterface] = None
         """消息处理器"""
+        self._frame_recorder: Optional[Callable[[bytes], None]] = None
+        """原始帧记录器"""
         self._get_reconnect_interval: Callable[[int, int], float] = (
             DEFAULT_RECONNECT_POLICY
         )
@@ -152,10 +302,27 @@ class DanmakuClient:
         """当前登录的用户ID"""
         return self._uid
 
+    @property
+    def metrics(self) -> Optional[PipelineMetrics]:
+        """延迟统计"""
+        return self._metrics
+
+    @property
+    def frame_received_at(self) -> float:
+        """正在解析的帧的接收时间（time.time()）"""
+        return self._frame_received_at
+
     def set_handler(self, handler: Optional[HandlerInterface]):
         """设置消息处理器"""
         self._handler = handler
 
+    def set_frame_recorder(self, frame_recorder: Optional[Callable[[bytes], None]]):
+        """设置原始帧记录器，收到的每个二进制帧解析前都会先交给它
+
+        :param frame_recorder: 输入WebSocket二进制帧，None表示不记录
+        """
+        self._frame_recorder = frame_recorder
+
     def set_reconnect_policy(self, get_reconnect_interval: Callable[[int, int], float]):
         """设置重连策略
 
@@ -212,6 +379,9 @@ class DanmakuClient:
 
         if self._own_session:
             await self._session.close()
+        if self._own_decompress_executor and self._decompress_executor is not None:
+            self._decompress_executor.shutdown(wait=False)
+            self._decompress_executor = None
 
     # ===== 网络协程 =====
 
@@ -273,6 +443,12 @@ class DanmakuClient:
                     "room=%d auth failed, trying init_room() again", self.room_id
                 )
                 self._need_init_room = True
+                # 缓存的token可能已经失效
+                if self._http_cache is not None and self._room_id is not None:
+                    self._http_cache.invalidate(
+                        self._endpoints.danmaku_server_conf_url,
+                        self._host_server_cache_params(),
+                    )
             finally:
                 self._websocket = None
                 await self._on_ws_close()
@@ -294,6 +470,9 @@ class DanmakuClient:
 
     async def _on_before_ws_connect(self, retry_count: int):
         """连接前调用，用于初始化房间"""
+        if self._uid is None:
+            # 上次获取uid失败，按未登录连接的，重新初始化（弹幕服务器的token与uid对应）
+            self._need_init_room = True
         if not self._need_init_room:
             return
 
@@ -332,6 +511,9 @@ class DanmakuClient:
             )
             return
 
+        self._frame_received_at = time.time()
+        if self._frame_recorder is not None:
+            self._frame_recorder(message.data)
         try:
             await self._parse_ws_message(message.data)
         except AuthError:
@@ -367,75 +549,122 @@ class DanmakuClient:
     # ===== 消息解析 =====
 
     async def _parse_ws_message(self, data: bytes):
-        """解析WebSocket消息"""
-        offset = 0
+        """解析WebSocket消息
 
+        压缩包解压后的子包按顺序展开处理，整个过程不递归、不复制包体。
+        """
+        subscribed_cmds = self._get_subscribed_cmds()
+        metrics = self._metrics
+        packet_iters = [iter_packets(data)]
         try:
-            header = HeaderTuple(*HEADER_STRUCT.unpack_from(data, offset))
+            while packet_iters:
+                packet = next(packet_iters[-1], None)
+                if packet is None:
+                    packet_iters.pop()
+                    continue
+                header, body = packet
+
+                if header.operation == Operation.SEND_MSG_REPLY and header.ver in (
+                    ProtoVer.BROTLI,
+                    ProtoVer.DEFLATE,
+                ):
+                    # 压缩的业务消息，解压后展开其中的子包
+                    if metrics is not None:
+                        start = time.perf_counter()
+                        decompressed = await self._decompress(header.ver, body)
+                        metrics.decompress.record(time.perf_counter() - start)
+                    else:
+                        decompressed = await self._decompress(header.ver, body)
+                    packet_iters.append(iter_packets(decompressed))
+                elif header.operation in (
+                    Operation.SEND_MSG_REPLY,
+                    Operation.AUTH_REPLY,
+                ):
+                    # 业务消息或认证回复
+                    await self._parse_business_message(
+                        header, body, subscribed_cmds
+                    )
+                elif header.operation == Operation.HEARTBEAT_REPLY:
+                    # 心跳回复，前4字节是人气值
+                    popularity = (
+                        int.from_bytes(body[:4], "big") if len(body) >= 4 else 0
+                    )
+                    # 转换为业务消息处理
+                    command = {"cmd": "_HEARTBEAT", "data": {"popularity": popularity}}
+                    self._handle_command(command)
+                else:
+                    # 未知消息
+                    logger.warning(
+                        "room=%d unknown message operation=%d",
+                        self.room_id,
+                        header.operation,
+                    )
         except struct.error:  # type: ignore
             logger.exception(
-                "room=%d parsing header failed, data=%s", self.room_id, data[:50]
+                "room=%d parsing header failed, data=%s", self.room_id, bytes(data[:50])
             )
-            return
 
-        if header.operation in (Operation.SEND_MSG_REPLY, Operation.AUTH_REPLY):
-            # 业务消息或认证回复，可能有多个包
-            while True:
-                body = data[offset + header.raw_header_size : offset + header.pack_len]
-                await self._parse_business_message(header, body)
-
-                offset += header.pack_len
-                if offset >= len(data):
-                    break
-
-                try:
-                    header = HeaderTuple(*HEADER_STRUCT.unpack_from(data, offset))
-                except struct.error:  # type: ignore
-                    logger.exception(
-                        "room=%d parsing header failed, offset=%d", self.room_id, offset
-                    )
-                    break
-
-        elif header.operation == Operation.HEARTBEAT_REPLY:
-            # 心跳回复，前4字节是人气值
-            body = data[
-                offset + header.raw_header_size : offset + header.raw_header_size + 4
-            ]
-            popularity = int.from_bytes(body, "big") if len(body) >= 4 else 0
-            # 转换为业务消息处理
-            command = {"cmd": "_HEARTBEAT", "data": {"popularity": popularity}}
-            self._handle_command(command)
+    async def _decompress(self, ver: int, body: memoryview) -> bytes:
+        """解压业务消息
 
-        else:
-            # 未知消息
-            logger.warning(
-                "room=%d unknown message operation=%d", self.room_id, header.operation
+        小包直接在事件循环中解压，大包放到专用线程池解压。
+        调用方逐个等待结果，因此消息仍按到达顺序处理。
+        """
+        decompress = _brotli_decompress if ver == ProtoVer.BROTLI else zlib_decompress
+        if len(body) < self._decompress_threshold:
+            return decompress(body)
+
+        if self._decompress_executor is None:
+            self._decompress_executor = ThreadPoolExecutor(
+                max_workers=self._decompress_workers,
+                thread_name_prefix="danmaku-decompress",
             )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._decompress_executor, decompress, body
+        )
+
+    def _get_subscribed_cmds(self) -> Optional[AbstractSet[str]]:
+        """获取处理器订阅的cmd集合，None表示全部"""
+        if self._handler is None:
+            return frozenset()
+        return self._handler.get_subscribed_cmds()
 
-    async def _parse_business_message(self, header: HeaderTuple, body: bytes):
-        """解析业务消息"""
+    async def _parse_business_message(
+        self,
+        header: HeaderTuple,
+        body: memoryview,
+        subscribed_cmds: Optional[AbstractSet[str]] = None,
+    ):
+        """解析未压缩的业务消息
+
+        :param subscribed_cmds: 需要解码的cmd集合，None表示全部
+        """
         if header.operation == Operation.SEND_MSG_REPLY:
             # 业务消息
-            if header.ver == ProtoVer.BROTLI:
-                # Brotli压缩，在后台线程解压
-                body = await asyncio.get_running_loop().run_in_executor(
-                    None, brotli_decompress, body
-                )
-                await self._parse_ws_message(body)
-            elif header.ver == ProtoVer.DEFLATE:
-                # Zlib压缩
-                body = await asyncio.get_running_loop().run_in_executor(
-                    None, zlib_decompress, body
-                )
-                await self._parse_ws_message(body)
-            elif header.ver == ProtoVer.NORMAL:
+            if header.ver == ProtoVer.NORMAL:
                 # 未压缩
                 if len(body) != 0:
+                    if subscribed_cmds is not None:
+                        # 先只读取cmd，没有处理器订阅的命令不解码
+                        cmd = peek_cmd(body)
+                        if (
+                            cmd is not None
+                            and cmd.partition(":")[0] not in subscribed_cmds
+                        ):
+                            return
                     try:
-                        command = json.loads(body.decode("utf-8"))
+                        metrics = self._metrics
+                        if metrics is not None:
+                            start = time.perf_counter()
+                            command = json_loads(body)
+                            metrics.decode.record(time.perf_counter() - start)
+                        else:
+                            command = json_loads(body)
                         self._handle_command(command)
                     except Exception:
-                        logger.error("room=%d, body=%s", self.room_id, body[:200])
+                        logger.error(
+                            "room=%d, body=%s", self.room_id, bytes(body[:200])
+                        )
                         raise
             else:
                 logger.warning(
@@ -444,7 +673,7 @@ class DanmakuClient:
 
         elif header.operation == Operation.AUTH_REPLY:
             # 认证回复
-            command = json.loads(body.decode("utf-8"))
+            command = json_loads(body)
             if command["code"] != AuthReplyCode.OK:
                 raise AuthError(
                     f"auth reply error, code={command['code']}, body={command}"
@@ -464,7 +693,13 @@ class DanmakuClient:
         if self._handler is None:
             return
         try:
-            self._handler.handle(self, command)
+            metrics = self._metrics
+            if metrics is not None:
+                start = time.perf_counter()
+                self._handler.handle(self, command)
+                metrics.dispatch.record(time.perf_counter() - start)
+            else:
+                self._handler.handle(self, command)
         except Exception as e:
             logger.exception(
                 "room=%d _handle_command() failed, command=%s",
@@ -482,19 +717,23 @@ class DanmakuClient:
         """
         result = True
 
-        # 初始化UID
-        if self._uid is None:
-            if not await self._init_uid():
-                logger.warning("room=%d _init_uid() failed", self._tmp_room_id)
-                self._uid = 0
+        # UID、buvid、房间ID互不依赖，同时请求
+        uid_ok, buvid_ok, room_ok = await asyncio.gather(
+            self._init_uid() if self._uid is None else _already_initialized(),
+            self._init_buvid() if self._get_buvid() == "" else _already_initialized(),
+            self._init_room_id_and_owner(),
+        )
+
+        # 初始化UID，失败时这次按未登录连接，uid保持未知，下次重连时再获取
+        if not uid_ok:
+            logger.warning("room=%d _init_uid() failed", self._tmp_room_id)
 
         # 初始化buvid
-        if self._get_buvid() == "":
-            if not await self._init_buvid():
-                logger.warning("room=%d _init_buvid() failed", self._tmp_room_id)
+        if not buvid_ok:
+            logger.warning("room=%d _init_buvid() failed", self._tmp_room_id)
 
         # 初始化房间ID和主播ID
-        if not await self._init_room_id_and_owner():
+        if not room_ok:
             result = False
             # 降级处理
             self._room_id = self._tmp_room_id
@@ -511,76 +750,25 @@ class DanmakuClient:
 
     async def _init_uid(self) -> bool:
         """初始化用户ID"""
-        cookies = self._session.cookie_jar.filter_cookies(yarl.URL(UID_INIT_URL))
-        sessdata_cookie = cookies.get("SESSDATA", None)
-        if sessdata_cookie is None or sessdata_cookie.value == "":
-            # 没有cookie，直接设置为未登录
-            self._uid = 0
-            return True
-
-        try:
-            async with self._session.get(
-                UID_INIT_URL,
-                headers={"User-Agent": USER_AGENT},
-            ) as res:
-                if res.status != 200:
-                    logger.warning(
-                        "room=%d _init_uid() failed, status=%d",
-                        self._tmp_room_id,
-                        res.status,
-                    )
-                    return False
-                data = await res.json()
-                if data["code"] != 0:
-                    if data["code"] == -101:
-                        # 未登录
-                        self._uid = 0
-                        return True
-                    logger.warning(
-                        "room=%d _init_uid() failed, message=%s",
-                        self._tmp_room_id,
-                        data["message"],
-                    )
-                    return False
-
-                data = data["data"]
-                if not data.get("isLogin", False):
-                    self._uid = 0
-                else:
-                    self._uid = data["mid"]
-                return True
-        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
-            logger.exception("room=%d _init_uid() failed:", self._tmp_room_id)
+        uid = await fetch_uid(self._session, self._endpoints)
+        if uid is None:
             return False
+        self._uid = uid
+        return True
 
     def _get_buvid(self) -> str:
         """获取buvid"""
-        cookies = self._session.cookie_jar.filter_cookies(yarl.URL(BUVID_INIT_URL))
-        buvid_cookie = cookies.get("buvid3", None)
-        return buvid_cookie.value if buvid_cookie else ""
+        return get_buvid(self._session, self._endpoints)
 
     async def _init_buvid(self) -> bool:
         """初始化buvid（访问首页获取）"""
-        try:
-            async with self._session.get(
-                BUVID_INIT_URL,
-                headers={"User-Agent": USER_AGENT},
-            ) as res:
-                if res.status != 200:
-                    logger.warning(
-                        "room=%d _init_buvid() status error, status=%d",
-                        self._tmp_room_id,
-                        res.status,
-                    )
-        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
-            logger.exception("room=%d _init_buvid() exception:", self._tmp_room_id)
-        return self._get_buvid() != ""
+        return await init_buvid(self._session, self._endpoints)
 
     async def _init_room_id_and_owner(self) -> bool:
         """初始化房间ID和主播ID"""
         try:
             async with self._session.get(
-                ROOM_INIT_URL,
+                self._endpoints.room_init_url,
                 headers={"User-Agent": USER_AGENT},
                 params={"room_id": self._tmp_room_id},
             ) as res:
@@ -613,45 +801,93 @@ class DanmakuClient:
         logger.debug("room=%d owner_uid=%d", self._room_id, self._room_owner_uid)
         return True
 
+    def _host_server_params(self) -> dict:
+        """获取弹幕服务器配置的参数（不含WBI签名）"""
+        return {"id": self._room_id, "type": 0}
+
+    def _host_server_cache_params(self) -> dict:
+        """区分弹幕服务器配置缓存的参数
+
+        响应中的token属于当前账号，缓存按uid区分，切换账号或退出登录后不会使用之前账号的token
+        """
+        return {**self._host_server_params(), "uid": self._uid or 0}
+
     async def _init_host_server(self) -> bool:
-        """初始化弹幕服务器配置"""
+        """初始化弹幕服务器配置
+
+        设置了http_cache时优先使用缓存，请求失败时使用过期的缓存
+        """
+        url = self._endpoints.danmaku_server_conf_url
+        params = self._host_server_params()
+        cache = self._http_cache
+        if cache is not None:
+            data = cache.get_fresh(
+                url, DANMAKU_SERVER_CONF_TTL, self._host_server_cache_params()
+            )
+            if data is not None:
+                logger.debug("room=%d using cached host servers", self._room_id)
+                return self._parse_danmaku_server_conf(data["data"])
+
         if self._wbi_signer.need_refresh_wbi_key:
             await self._wbi_signer.refresh_wbi_key()
             if self._wbi_signer.wbi_key == "":
                 logger.warning(
                     "room=%d _init_host_server() failed: no wbi key", self._room_id
                 )
-                return False
+                return self._init_host_server_from_stale_cache()
 
         try:
-            async with self._session.get(
-                DANMAKU_SERVER_CONF_URL,
-                headers={"User-Agent": USER_AGENT},
-                params=self._wbi_signer.add_wbi_sign({"id": self._room_id, "type": 0}),
-            ) as res:
-                if res.status != 200:
-                    logger.warning(
-                        "room=%d _init_host_server() failed, status=%d",
-                        self._room_id,
-                        res.status,
-                    )
-                    return False
-                data = await res.json()
-                if data["code"] != 0:
-                    if data["code"] == -352:
-                        # WBI签名错误，重置key
-                        self._wbi_signer.reset()
-                    logger.warning(
-                        "room=%d _init_host_server() failed, message=%s",
-                        self._room_id,
-                        data["message"],
-                    )
-                    return False
-                return self._parse_danmaku_server_conf(data["data"])
-        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            signed_params = self._wbi_signer.add_wbi_sign(params)
+            if cache is not None:
+                data = await cache.get_json(
+                    self._session,
+                    url,
+                    ttl=DANMAKU_SERVER_CONF_TTL,
+                    params=signed_params,
+                    key_params={"uid": self._uid or 0},
+                    headers={"User-Agent": USER_AGENT},
+                )
+            else:
+                async with self._session.get(
+                    url,
+                    headers={"User-Agent": USER_AGENT},
+                    params=signed_params,
+                ) as res:
+                    if res.status != 200:
+                        logger.warning(
+                            "room=%d _init_host_server() failed, status=%d",
+                            self._room_id,
+                            res.status,
+                        )
+                        return False
+                    data = await res.json()
+            if data["code"] != 0:
+                if data["code"] == -352:
+                    # WBI签名错误，重置key
+                    self._wbi_signer.reset()
+                logger.warning(
+                    "room=%d _init_host_server() failed, message=%s",
+                    self._room_id,
+                    data["message"],
+                )
+                return self._init_host_server_from_stale_cache()
+            return self._parse_danmaku_server_conf(data["data"])
+        except (aiohttp.ClientError, asyncio.TimeoutError):
             logger.exception("room=%d _init_host_server() failed:", self._room_id)
             return False
 
+    def _init_host_server_from_stale_cache(self) -> bool:
+        """使用过期的缓存初始化弹幕服务器配置，没有缓存时返回False"""
+        if self._http_cache is None:
+            return False
+        data = self._http_cache.get_stale(
+            self._endpoints.danmaku_server_conf_url, self._host_server_cache_params()
+        )
+        if data is None:
+            return False
+        logger.info("room=%d using stale cached host servers", self._room_id)
+        return self._parse_danmaku_server_conf(data["data"])
+
     def _parse_danmaku_server_conf(self, data: dict) -> bool:
         """解析弹幕服务器配置"""
         self._host_server_list = data["host_list"]
@@ -672,7 +908,9 @@ class DanmakuClient:
         if self._host_server_list is None:
             raise RuntimeError("room=%d host_server_list is None", self._room_id)
         host_server = self._host_server_list[retry_count % len(self._host_server_list)]
-        return f"wss://{host_server['host']}:{host_server['wss_port']}/sub"
+        if self._endpoints.secure:
+            return f"wss://{host_server['host']}:{host_server['wss_port']}/sub"
+        return f"ws://{host_server['host']}:{host_server['ws_port']}/sub"
 
     async def _send_auth(self):
         """发送认证包"""
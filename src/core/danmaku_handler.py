@@ -4,7 +4,7 @@
 """
 
 from logging import getLogger
-from typing import Optional, TYPE_CHECKING
+from typing import AbstractSet, Optional, TYPE_CHECKING
 
 from .danmaku_models import GiftMessage, DanmakuMessage, HeartbeatMessage
 
@@ -31,6 +31,16 @@ class HandlerInterface:
         """
         raise NotImplementedError
 
+    def get_subscribed_cmds(self) -> Optional[AbstractSet[str]]:
+        """获取需要处理的cmd集合（不含":"后缀参数）
+
+        客户端只解码集合中的命令，其余命令在解码JSON前就被丢弃。
+
+        Returns:
+            cmd集合，None表示处理所有命令
+        """
+        return None
+
     def on_client_stopped(
         self, client: "DanmakuClient", exception: Optional[Exception]
     ):
@@ -106,6 +116,42 @@ class BaseHandler(HandlerInterface):
         "SUPER_CHAT_MESSAGE_JPN": "_on_test_callback",
     }
 
+    # 回调方法 -> 最终调用的可重写方法，两者都没有被子类重写时回调什么也不做
+    _CALLBACK_OVERRIDABLE_DICT = {
+        "_on_heartbeat_callback": "_on_heartbeat",
+        "_on_danmaku_callback": "_on_danmaku",
+        "_on_danmaku_mirror_callback": "_on_danmaku",
+        "_on_gift_callback": "_on_gift",
+        "_on_entry_effect_callback": "_on_entry_effect",
+        "_on_notice_msg_callback": "_on_notice_msg",
+        "_on_test_callback": "_on_test",
+    }
+
+    # 处理方法被子类重写过的命令，定义子类时计算
+    _subscribed_cmds: frozenset[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._subscribed_cmds = cls._collect_subscribed_cmds()
+
+    @classmethod
+    def _collect_subscribed_cmds(cls) -> frozenset[str]:
+        """收集回调或可重写方法被重写过的命令，子类新增的回调也算在内"""
+        cmds = set()
+        for cmd, callback_name in cls._CMD_CALLBACK_DICT.items():
+            overridable_name = BaseHandler._CALLBACK_OVERRIDABLE_DICT.get(callback_name)
+            if (
+                overridable_name is None
+                or getattr(cls, callback_name) is not getattr(BaseHandler, callback_name)
+                or getattr(cls, overridable_name) is not getattr(BaseHandler, overridable_name)
+            ):
+                cmds.add(cmd)
+        return frozenset(cmds)
+
+    def get_subscribed_cmds(self) -> Optional[AbstractSet[str]]:
+        """只订阅处理方法被重写过的命令，基类空实现对应的命令（进场特效、全站消息等）不解码"""
+        return self._subscribed_cmds
+
     def handle(self, client: "DanmakuClient", command: dict):
         """处理消息"""
         cmd = command.get("cmd", "")
@@ -137,14 +183,33 @@ class BaseHandler(HandlerInterface):
 
     def _on_danmaku_callback(self, client: "DanmakuClient", command: dict):
         """弹幕回调"""
-        message = DanmakuMessage.as_danmaku(command.get("info", []), is_mirror=False)
+        message = DanmakuMessage.as_danmaku(
+            command.get("info", []),
+            is_mirror=False,
+            live_room_id=client.room_id or -1,
+            received_at=client.frame_received_at,
+        )
+        self._record_network_latency(client, message)
         self._on_danmaku(client, message)
 
     def _on_danmaku_mirror_callback(self, client: "DanmakuClient", command: dict):
         """跨房弹幕回调"""
-        message = DanmakuMessage.as_danmaku(command.get("info", []), is_mirror=True)
+        message = DanmakuMessage.as_danmaku(
+            command.get("info", []),
+            is_mirror=True,
+            live_room_id=client.room_id or -1,
+            received_at=client.frame_received_at,
+        )
+        self._record_network_latency(client, message)
         self._on_danmaku(client, message)
 
+    @staticmethod
+    def _record_network_latency(client: "DanmakuClient", message: DanmakuMessage):
+        """记录服务器时间戳到收到帧的耗时"""
+        metrics = client.metrics
+        if metrics is not None and message.timestamp and message.received_at:
+            metrics.network.record(message.received_at - message.timestamp / 1000)
+
     def _on_gift_callback(self, client: "DanmakuClient", command: dict):
         """礼物回调"""
         message = GiftMessage.as_gift(command.get("data", {}))
@@ -252,11 +317,3 @@ class UIPanelHandler(BaseHandler):
             else:
                 if hasattr(self._panel, "on_disconnect"):
                     self._panel.on_disconnect(client.room_id)
-
-    def _on_notice_msg(self, client: "DanmakuClient", data: dict):
-        logger.debug(data.get("msg_common"))
-
-    def _on_test(self, client: "DanmakuClient", command: dict):
-        from json import dumps
-
-        logger.debug(dumps(command, indent=4, ensure_ascii=False))
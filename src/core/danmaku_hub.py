@@ -0,0 +1,348 @@
+"""弹幕多房间调度模块
+
+在同一个事件循环中管理多个DanmakuClient：
+- 所有房间共用一个aiohttp会话（cookie、连接池、WBI签名器）
+- uid、buvid、WBI密钥只初始化一次，不重复请求
+- 错峰启动连接，避免同时发起大量初始化请求
+- 将消息分发给各房间注册的处理器
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import AbstractSet, Optional
+
+import aiohttp
+
+from .danmaku_fetcher import (
+    DEFAULT_DANMAKU_ENDPOINTS,
+    DEFAULT_DECOMPRESS_THRESHOLD,
+    DEFAULT_DECOMPRESS_WORKERS,
+    DanmakuClient,
+    DanmakuEndpoints,
+    fetch_uid,
+    get_buvid,
+    init_buvid,
+)
+from .danmaku_handler import HandlerInterface
+from .danmaku_metrics import PipelineMetrics
+from .danmaku_wbi import get_wbi_signer
+from .http_cache import HttpCache
+
+logger = getLogger(__name__)
+
+__all__ = ("DanmakuHub",)
+
+# 默认相邻两个房间启动连接的间隔（秒）
+DEFAULT_CONNECT_INTERVAL = 0.2
+# 共享字段初始化失败时的重试次数，用完后按未登录继续连接
+SHARED_INIT_MAX_RETRIES = 3
+# 共享字段初始化重试的间隔（秒），每次翻倍
+SHARED_INIT_RETRY_INTERVAL = 1.0
+
+
+class _RoomHandler(HandlerInterface):
+    """单个房间的分发处理器，将消息转发给该房间注册的所有处理器"""
+
+    def __init__(self):
+        self.handlers: list[HandlerInterface] = []
+
+    def handle(self, client: DanmakuClient, command: dict):
+        for handler in self.handlers:
+            try:
+                handler.handle(client, command)
+            except Exception:
+                logger.exception(
+                    "room=%s handler %r failed", client.room_id, handler
+                )
+
+    def get_subscribed_cmds(self) -> Optional[AbstractSet[str]]:
+        cmds: set[str] = set()
+        for handler in self.handlers:
+            handler_cmds = handler.get_subscribed_cmds()
+            if handler_cmds is None:
+                return None
+            cmds.update(handler_cmds)
+        return cmds
+
+    def on_client_stopped(
+        self, client: DanmakuClient, exception: Optional[Exception]
+    ):
+        for handler in self.handlers:
+            try:
+                handler.on_client_stopped(client, exception)
+            except Exception:
+                logger.exception(
+                    "room=%s handler %r on_client_stopped() failed",
+                    client.room_id,
+                    handler,
+                )
+
+
+class DanmakuHub:
+    """多房间弹幕客户端调度器
+
+    hub本身不缓存消息，收到的消息直接交给各房间的处理器，
+    内存占用只随房间数线性增长。
+
+    :param uid: B站用户ID，0表示未登录，None表示自动获取
+    :param session: cookie、连接池，None表示由hub创建并负责关闭
+    :param heartbeat_interval: 发送心跳包的间隔时间（秒）
+    :param connect_interval: 相邻两个房间启动连接的间隔（秒）
+    :param decompress_threshold: 压缩包体达到该字节数时放到线程池解压
+    :param decompress_workers: 所有房间共用的解压线程池的线程数
+    :param endpoints: 客户端访问的地址
+    :param metrics: 所有房间共用的延迟统计，None表示不统计
+    :param http_cache: 缓存弹幕服务器列表的HTTP缓存，None表示不缓存
+    """
+
+    def __init__(
+        self,
+        *,
+        uid: Optional[int] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        heartbeat_interval: float = 30,
+        connect_interval: float = DEFAULT_CONNECT_INTERVAL,
+        decompress_threshold: int = DEFAULT_DECOMPRESS_THRESHOLD,
+        decompress_workers: int = DEFAULT_DECOMPRESS_WORKERS,
+        endpoints: DanmakuEndpoints = DEFAULT_DANMAKU_ENDPOINTS,
+        metrics: Optional[PipelineMetrics] = None,
+        http_cache: Optional[HttpCache] = None,
+    ):
+        if session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+            self._own_session = True
+        else:
+            self._session = session
+            self._own_session = False
+
+        self._uid = uid
+        """共享的用户ID"""
+        self._heartbeat_interval = heartbeat_interval
+        self._connect_interval = connect_interval
+        self._decompress_threshold = decompress_threshold
+        self._endpoints = endpoints
+        self._metrics = metrics
+        self._http_cache = http_cache
+        self._decompress_executor = ThreadPoolExecutor(
+            max_workers=decompress_workers,
+            thread_name_prefix="danmaku-decompress",
+        )
+        """所有房间共用的解压线程池（线程按需创建）"""
+
+        self._room_handlers: dict[int, _RoomHandler] = {}
+        """房间ID -> 分发处理器"""
+        self._clients: dict[int, DanmakuClient] = {}
+        """房间ID -> 已创建的客户端"""
+
+        self._connect_queue: Optional[asyncio.Queue] = None
+        """等待启动连接的房间ID"""
+        self._connect_future: Optional[asyncio.Future] = None
+        """错峰启动协程的future"""
+
+    @property
+    def is_running(self) -> bool:
+        """是否正在运行"""
+        return self._connect_future is not None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """共享的会话"""
+        return self._session
+
+    @property
+    def uid(self) -> Optional[int]:
+        """共享的用户ID（初始化后可用）"""
+        return self._uid
+
+    @property
+    def room_ids(self) -> list[int]:
+        """已添加的房间ID"""
+        return list(self._room_handlers)
+
+    def get_client(self, room_id: int) -> Optional[DanmakuClient]:
+        """获取房间对应的客户端（启动连接后可用）"""
+        return self._clients.get(room_id)
+
+    def add_room(self, room_id: int, handler: Optional[HandlerInterface] = None):
+        """添加房间，hub运行中时会排队启动连接
+
+        :param room_id: URL中的房间ID，可以用短ID
+        :param handler: 该房间的消息处理器
+        """
+        if room_id not in self._room_handlers:
+            self._room_handlers[room_id] = _RoomHandler()
+            if self._connect_queue is not None:
+                self._connect_queue.put_nowait(room_id)
+        if handler is not None:
+            self.add_handler(room_id, handler)
+
+    def add_handler(self, room_id: int, handler: HandlerInterface):
+        """给房间添加消息处理器"""
+        room_handler = self._room_handlers.get(room_id)
+        if room_handler is None:
+            raise KeyError(f"room={room_id} is not added")
+        if handler not in room_handler.handlers:
+            room_handler.handlers.append(handler)
+
+    def remove_handler(self, room_id: int, handler: HandlerInterface):
+        """移除房间的消息处理器"""
+        room_handler = self._room_handlers.get(room_id)
+        if room_handler is not None and handler in room_handler.handlers:
+            room_handler.handlers.remove(handler)
+
+    async def remove_room(self, room_id: int):
+        """移除房间并释放对应的客户端"""
+        self._room_handlers.pop(room_id, None)
+        client = self._clients.pop(room_id, None)
+        if client is not None:
+            await client.stop_and_close()
+
+    def start(self):
+        """启动所有房间的连接"""
+        if self.is_running:
+            logger.warning("hub is running, cannot start() again")
+            return
+
+        self._connect_queue = asyncio.Queue()
+        for room_id in self._room_handlers:
+            self._connect_queue.put_nowait(room_id)
+        self._connect_future = asyncio.create_task(self._connect_coroutine())
+        logger.info("hub started, rooms=%d", len(self._room_handlers))
+
+    def stop(self):
+        """停止所有房间的连接"""
+        if not self.is_running:
+            logger.warning("hub is stopped, cannot stop() again")
+            return
+
+        if self._connect_future is not None:
+            self._connect_future.cancel()
+        for client in self._clients.values():
+            if client.is_running:
+                client.stop()
+        logger.info("hub stopping...")
+
+    async def join(self):
+        """等待所有客户端停止"""
+        if self._connect_future is not None:
+            await asyncio.wait([self._connect_future])
+        await asyncio.gather(
+            *(client.join() for client in self._clients.values() if client.is_running)
+        )
+
+    async def stop_and_close(self):
+        """停止并释放资源"""
+        if self.is_running:
+            self.stop()
+            await self.join()
+        await self.close()
+
+    async def close(self):
+        """释放资源，调用后hub将不可用"""
+        if self.is_running:
+            logger.warning("hub is calling close(), but hub is running")
+
+        await asyncio.gather(*(client.close() for client in self._clients.values()))
+        self._clients.clear()
+        self._decompress_executor.shutdown(wait=False)
+        if self._own_session:
+            await self._session.close()
+
+    # ===== 内部逻辑 =====
+
+    async def _connect_coroutine(self):
+        """先初始化共享字段，再依次错峰启动各房间的客户端"""
+        try:
+            await self._init_shared_with_retry()
+
+            assert self._connect_queue is not None
+            while True:
+                room_id = await self._connect_queue.get()
+                try:
+                    started = self._start_room(room_id)
+                except Exception:
+                    logger.exception("room=%s hub failed to start client", room_id)
+                    continue
+
+                if not started or self._connect_queue.empty():
+                    continue
+                await asyncio.sleep(self._connect_interval)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("hub _connect_coroutine() finished with exception:")
+        finally:
+            self._connect_future = None
+            self._connect_queue = None
+
+    def _start_room(self, room_id: int) -> bool:
+        """创建并启动房间的客户端
+
+        :return: 是否启动了新的连接
+        """
+        room_handler = self._room_handlers.get(room_id)
+        if room_handler is None:
+            # 排队期间已被移除
+            return False
+
+        client = self._clients.get(room_id)
+        if client is None:
+            client = DanmakuClient(
+                room_id,
+                uid=self._uid,
+                session=self._session,
+                heartbeat_interval=self._heartbeat_interval,
+                decompress_threshold=self._decompress_threshold,
+                decompress_executor=self._decompress_executor,
+                endpoints=self._endpoints,
+                metrics=self._metrics,
+                http_cache=self._http_cache,
+            )
+            client.set_handler(room_handler)
+            self._clients[room_id] = client
+        if client.is_running:
+            return False
+        client.start()
+        return True
+
+    async def _init_shared_with_retry(self):
+        """初始化共享字段，失败时间隔翻倍重试，重试用完后仍然继续连接"""
+        for retry_count in range(SHARED_INIT_MAX_RETRIES + 1):
+            try:
+                if await self._init_shared():
+                    return
+                logger.warning("hub _init_shared() failed, retry_count=%d", retry_count)
+            except Exception:
+                logger.exception(
+                    "hub _init_shared() failed with exception, retry_count=%d",
+                    retry_count,
+                )
+            if retry_count < SHARED_INIT_MAX_RETRIES:
+                await asyncio.sleep(SHARED_INIT_RETRY_INTERVAL * 2**retry_count)
+
+        # uid保持未知，各客户端在init_room()中自己再获取，弹幕服务器和buvid也由客户端再尝试
+        logger.warning("hub shared fields not initialized, connecting anyway, uid=%s", self._uid)
+
+    async def _init_shared(self) -> bool:
+        """初始化所有房间共用的uid、buvid和WBI密钥，结果保存在共享的session中
+
+        :return: uid是否已经确定（buvid和WBI密钥失败时客户端会自己再获取）
+        """
+        if self._uid is None:
+            self._uid = await fetch_uid(self._session, self._endpoints)
+            if self._uid is None:
+                logger.warning("hub fetch_uid() failed")
+
+        if get_buvid(self._session, self._endpoints) == "":
+            if not await init_buvid(self._session, self._endpoints):
+                logger.warning("hub init_buvid() failed")
+
+        wbi_signer = get_wbi_signer(self._session, self._endpoints.wbi_key_url)
+        if wbi_signer.need_refresh_wbi_key:
+            await wbi_signer.refresh_wbi_key()
+
+        logger.debug("hub shared fields initialized, uid=%s", self._uid)
+        return self._uid is not None
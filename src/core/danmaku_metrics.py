@@ -0,0 +1,185 @@
+"""弹幕延迟统计模块
+
+按阶段记录弹幕从服务器发出到显示在屏幕上的耗时：
+- network: 服务器时间戳 -> 收到所在的WebSocket帧（受本机与服务器的时钟偏差影响）
+- decompress: 解压一个压缩包
+- decode: 解码一条业务消息的JSON
+- dispatch: 处理器处理一条命令（消息类型转换、转发到界面）
+- render: 收到所在的帧 -> 写入弹幕列表（包含界面合并刷新的等待）
+- end_to_end: 服务器时间戳 -> 写入弹幕列表
+
+每个阶段是一个对数分桶的直方图，记录只做一次log和一次加法，
+内存占用固定，长时间运行也不会增长。
+"""
+
+import math
+import time
+from logging import getLogger
+from pathlib import Path
+from typing import Optional
+
+from ..utils.json_codec import json_dumps
+
+logger = getLogger(__name__)
+
+__all__ = (
+    "LatencyHistogram",
+    "PipelineMetrics",
+    "PIPELINE_STAGES",
+)
+
+PIPELINE_STAGES = (
+    "network",
+    "decompress",
+    "decode",
+    "dispatch",
+    "render",
+    "end_to_end",
+)
+
+# 直方图的最小分辨率（秒），更小的值计入第一个桶
+HISTOGRAM_MIN_VALUE = 1e-6
+# 每翻一倍分几个桶，4个桶时相邻桶的上界相差约19%
+HISTOGRAM_BUCKETS_PER_OCTAVE = 4
+# 桶数，最大可以表示约 1e-6 * 2**(160/4) 秒，约12天
+HISTOGRAM_BUCKET_COUNT = 160
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图，单位为秒
+
+    分位数返回所在桶的上界，误差不超过一个桶的宽度。
+    """
+
+    __slots__ = ("_counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self._counts = [0] * HISTOGRAM_BUCKET_COUNT
+        self.count = 0
+        """记录次数"""
+        self.total = 0.0
+        """总耗时"""
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """记录一次耗时，负数（时钟偏差）按0记录"""
+        if seconds <= HISTOGRAM_MIN_VALUE:
+            index = 0
+            seconds = max(seconds, 0.0)
+        else:
+            index = min(
+                HISTOGRAM_BUCKET_COUNT - 1,
+                int(math.log2(seconds / HISTOGRAM_MIN_VALUE) * HISTOGRAM_BUCKETS_PER_OCTAVE)
+                + 1,
+            )
+        self._counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def reset(self):
+        """清空记录"""
+        self._counts = [0] * HISTOGRAM_BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """分位数
+
+        :param q: 0~1之间的分位
+        :return: 所在桶的上界（秒），没有记录时为0
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper_bound(index), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        """导出为字典，时间单位为毫秒"""
+        return {
+            "count": self.count,
+            "mean_ms": self.mean * 1000,
+            "min_ms": (self.min if self.count else 0.0) * 1000,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p90_ms": self.percentile(0.90) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "buckets": [
+                [_bucket_upper_bound(index) * 1000, count]
+                for index, count in enumerate(self._counts)
+                if count
+            ],
+        }
+
+
+def _bucket_upper_bound(index: int) -> float:
+    return HISTOGRAM_MIN_VALUE * 2 ** (index / HISTOGRAM_BUCKETS_PER_OCTAVE)
+
+
+class PipelineMetrics:
+    """弹幕处理流程各阶段的延迟统计
+
+    传给DanmakuClient后由客户端、处理器和界面分别记录，所有房间可以共用一个实例。
+    """
+
+    def __init__(self):
+        self.network = LatencyHistogram()
+        self.decompress = LatencyHistogram()
+        self.decode = LatencyHistogram()
+        self.dispatch = LatencyHistogram()
+        self.render = LatencyHistogram()
+        self.end_to_end = LatencyHistogram()
+        self.started_at = time.time()
+        """开始统计的时间"""
+
+    def get(self, stage: str) -> Optional[LatencyHistogram]:
+        """按阶段名获取直方图"""
+        if stage not in PIPELINE_STAGES:
+            return None
+        return getattr(self, stage)
+
+    def reset(self):
+        """清空所有阶段"""
+        for stage in PIPELINE_STAGES:
+            getattr(self, stage).reset()
+        self.started_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "exported_at": time.time(),
+            "stages": {stage: getattr(self, stage).to_dict() for stage in PIPELINE_STAGES},
+        }
+
+    def summary(self) -> str:
+        """每个阶段一行的摘要"""
+        lines = []
+        for stage in PIPELINE_STAGES:
+            histogram: LatencyHistogram = getattr(self, stage)
+            lines.append(
+                f"{stage}: n={histogram.count} "
+                f"p50={histogram.percentile(0.50) * 1000:.2f}ms "
+                f"p99={histogram.percentile(0.99) * 1000:.2f}ms "
+                f"max={histogram.max * 1000:.2f}ms"
+            )
+        return "\n".join(lines)
+
+    def export_json(self, path: Path):
+        """导出为JSON文件"""
+        Path(path).write_bytes(json_dumps(self.to_dict()))
+        logger.info("danmaku metrics exported to %s", path)
@@ -3,10 +3,11 @@
 参考blivedm.models.web的实现，定义弹幕相关的数据模型。
 """
 
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from typing import Optional
 from datetime import datetime
-from logging import getLogger
+from logging import DEBUG, getLogger
 
 from ..utils.constants import DanmakuType, DanmakuColors
 
@@ -18,8 +19,59 @@ __all__ = (
 
 logger = getLogger(__name__)
 
+# 消息对象数量多，使用__slots__减小单个对象的内存占用（Python 3.10+ 支持）
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass()
+_NOTICE_TYPES = frozenset(
+    {
+        DanmakuType.NOTICE_IMPORTANT,
+        DanmakuType.NOTICE_SYSTEM,
+        DanmakuType.NOTICE_NORMAL,
+    }
+)
+_USER_TYPES = frozenset(
+    {
+        DanmakuType.USER_NORMAL,
+        DanmakuType.USER_FAN,
+        DanmakuType.USER_JIANZHANG,
+        DanmakuType.USER_TIDU,
+        DanmakuType.USER_ZONGDU,
+        DanmakuType.USER_ADMIN,
+    }
+)
+_DANMAKU_COLORS = {
+    # 通知类
+    DanmakuType.NOTICE_IMPORTANT: DanmakuColors.NOTICE_IMPORTANT,
+    DanmakuType.NOTICE_SYSTEM: DanmakuColors.NOTICE_SYSTEM,
+    DanmakuType.NOTICE_NORMAL: DanmakuColors.NOTICE_NORMAL,
+    # 用户类
+    DanmakuType.USER_NORMAL: DanmakuColors.USER_NORMAL,
+    DanmakuType.USER_FAN: DanmakuColors.USER_FAN,
+    DanmakuType.USER_JIANZHANG: DanmakuColors.USER_JIANZHANG,
+    DanmakuType.USER_TIDU: DanmakuColors.USER_TIDU,
+    DanmakuType.USER_ZONGDU: DanmakuColors.USER_ZONGDU,
+    DanmakuType.USER_ADMIN: DanmakuColors.USER_ADMIN,
+}
+_NOTICE_BADGES = {
+    DanmakuType.NOTICE_IMPORTANT: "重要",
+    DanmakuType.NOTICE_SYSTEM: "系统",
+    DanmakuType.NOTICE_NORMAL: "通知",
+}
+_USER_BADGES = {
+    DanmakuType.USER_ADMIN: "房管",
+    DanmakuType.USER_ZONGDU: "总督",
+    DanmakuType.USER_TIDU: "提督",
+    DanmakuType.USER_JIANZHANG: "舰长",
+}
+_GIFT_COLORS = {
+    DanmakuType.GIFT_JIANZHANG: DanmakuColors.GIFT_JIANZHANG,
+    DanmakuType.GIFT_IMPORTENT: DanmakuColors.GIFT_IMPORTENT,
+    DanmakuType.GIFT_DENGPAI: DanmakuColors.GIFT_DENGPAI,
+    DanmakuType.GIFT_NORMAL: DanmakuColors.GIFT_NORMAL,
+}
+
+
+@dataclass(**_SLOTS)
 class BaseMessage:
     """基类消息"""
 
@@ -28,7 +80,7 @@ class BaseMessage:
         raise NotImplementedError
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class DanmakuMessage:
     """弹幕消息
 
@@ -92,14 +144,29 @@ class DanmakuMessage:
     """直播间ID"""
     is_simple: bool = False
     """是否为简单弹幕"""
+    received_at: float = 0.0
+    """收到所在帧的时间（time.time()），0表示未知"""
+
+    _rich_cache: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    """format_rich()的缓存"""
 
     @classmethod
-    def as_danmaku(cls, info: list, is_mirror: bool = False) -> "DanmakuMessage":
+    def as_danmaku(
+        cls,
+        info: list,
+        is_mirror: bool = False,
+        live_room_id: int = -1,
+        received_at: float = 0.0,
+    ) -> "DanmakuMessage":
         """从B站弹幕协议解析
 
         Args:
             info: B站弹幕消息的info字段
             is_mirror: 是否为跨房弹幕
+            live_room_id: 收到弹幕的直播间ID
+            received_at: 收到所在帧的时间
 
         Returns:
             DanmakuMessage实例
@@ -154,18 +221,19 @@ class DanmakuMessage:
         # 舰队类型
         privilege_type = info[7] if len(info) > 7 else 0
 
-        logger.debug(
-            " ".join(
-                [
-                    f"用户:{uname} {uid} lv{user_level}",
-                    f"勋章:{medal_name} lv{medal_level} room{medal_room_id}",
-                    f"身份:{privilege_type} {admin}",
-                    f"vip:{vip} svip:{svip} 头衔:{title}",
-                    f"内容:{msg}",
-                    f"样式:mode:{mode} size:{font_size} color:{font_color} rnd:{rnd}",
-                ]
+        if logger.isEnabledFor(DEBUG):
+            logger.debug(
+                " ".join(
+                    [
+                        f"用户:{uname} {uid} lv{user_level}",
+                        f"勋章:{medal_name} lv{medal_level} room{medal_room_id}",
+                        f"身份:{privilege_type} {admin}",
+                        f"vip:{vip} svip:{svip} 头衔:{title}",
+                        f"内容:{msg}",
+                        f"样式:mode:{mode} size:{font_size} color:{font_color} rnd:{rnd}",
+                    ]
+                )
             )
-        )
 
         return cls(
             mode=mode,
@@ -187,6 +255,8 @@ class DanmakuMessage:
             title=title,
             privilege_type=privilege_type,
             is_mirror=is_mirror,
+            live_room_id=live_room_id,
+            received_at=received_at,
         )
 
     @classmethod
@@ -239,63 +309,40 @@ class DanmakuMessage:
     @property
     def color(self) -> str:
         """获取对应的颜色"""
-        return {
-            # 通知类
-            DanmakuType.NOTICE_IMPORTANT: DanmakuColors.NOTICE_IMPORTANT,
-            DanmakuType.NOTICE_SYSTEM: DanmakuColors.NOTICE_SYSTEM,
-            DanmakuType.NOTICE_NORMAL: DanmakuColors.NOTICE_NORMAL,
-            # 用户类
-            DanmakuType.USER_NORMAL: DanmakuColors.USER_NORMAL,
-            DanmakuType.USER_FAN: DanmakuColors.USER_FAN,
-            DanmakuType.USER_JIANZHANG: DanmakuColors.USER_JIANZHANG,
-            DanmakuType.USER_TIDU: DanmakuColors.USER_TIDU,
-            DanmakuType.USER_ZONGDU: DanmakuColors.USER_ZONGDU,
-            DanmakuType.USER_ADMIN: DanmakuColors.USER_ADMIN,
-        }.get(self.type, DanmakuColors.DEFAULT)
+        return _DANMAKU_COLORS.get(self.type, DanmakuColors.DEFAULT)
 
     @property
     def is_notice(self) -> bool:
         """是否为通知类弹幕"""
-        return self.type in {
-            DanmakuType.NOTICE_IMPORTANT,
-            DanmakuType.NOTICE_SYSTEM,
-            DanmakuType.NOTICE_NORMAL,
-        }
+        return self.type in _NOTICE_TYPES
 
     @property
     def is_user(self) -> bool:
         """是否为用户类弹幕"""
-        return self.type in {
-            DanmakuType.USER_NORMAL,
-            DanmakuType.USER_FAN,
-            DanmakuType.USER_JIANZHANG,
-            DanmakuType.USER_TIDU,
-            DanmakuType.USER_ZONGDU,
-            DanmakuType.USER_ADMIN,
-        }
+        return self.type in _USER_TYPES
 
     @property
     def badge_text(self) -> str:
         """获取前缀文本"""
-        if text := {
-            DanmakuType.NOTICE_IMPORTANT: "重要",
-            DanmakuType.NOTICE_SYSTEM: "系统",
-            DanmakuType.NOTICE_NORMAL: "通知",
-        }.get(self.type):
+        danmaku_type = self.type
+        if text := _NOTICE_BADGES.get(danmaku_type):
             return text
-        elif text := {
-            DanmakuType.USER_ADMIN: "房管",
-            DanmakuType.USER_ZONGDU: "总督",
-            DanmakuType.USER_TIDU: "提督",
-            DanmakuType.USER_JIANZHANG: "舰长",
-            DanmakuType.USER_FAN: self.medal_name,
-        }.get(self.type):
-            return f"{text}{self.medal_level}"
+        if danmaku_type == DanmakuType.USER_FAN:
+            text = self.medal_name
         else:
-            return f""
+            text = _USER_BADGES.get(danmaku_type)
+        if text:
+            return f"{text}{self.medal_level}"
+        return ""
 
     def format_rich(self) -> str:
-        """格式化为富文本显示"""
+        """格式化为富文本显示（首次调用后缓存）"""
+        if self._rich_cache is None:
+            # 对象不可变，缓存需要绕过frozen检查写入
+            object.__setattr__(self, "_rich_cache", self._format_rich())
+        return self._rich_cache
+
+    def _format_rich(self) -> str:
         parts = []
 
         # 时间戳
@@ -323,7 +370,7 @@ class DanmakuMessage:
         return " ".join(parts)
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class HeartbeatMessage:
     """心跳消息"""
 
@@ -338,9 +385,9 @@ class HeartbeatMessage:
         )
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class GiftMessage:
-    """礼物消息"""
+    """礼物消息（不可变）"""
 
     time: datetime
     """时间戳"""
@@ -357,6 +404,11 @@ class GiftMessage:
     face: str = ""
     """用户头像"""
 
+    _rich_cache: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    """format_rich()的缓存"""
+
     @classmethod
     def as_gift(cls, data: dict) -> "GiftMessage":
         """从命令数据解析"""
@@ -383,15 +435,16 @@ class GiftMessage:
     @property
     def color(self) -> str:
         """获取颜色"""
-        return {
-            DanmakuType.GIFT_JIANZHANG: DanmakuColors.GIFT_JIANZHANG,
-            DanmakuType.GIFT_IMPORTENT: DanmakuColors.GIFT_IMPORTENT,
-            DanmakuType.GIFT_DENGPAI: DanmakuColors.GIFT_DENGPAI,
-            DanmakuType.GIFT_NORMAL: DanmakuColors.GIFT_NORMAL,
-        }.get(self.type, DanmakuColors.DEFAULT)
+        return _GIFT_COLORS.get(self.type, DanmakuColors.DEFAULT)
 
     def format_rich(self) -> str:
-        """格式化为富文本显示"""
+        """格式化为富文本显示（首次调用后缓存）"""
+        if self._rich_cache is None:
+            # 对象不可变，缓存需要绕过frozen检查写入
+            object.__setattr__(self, "_rich_cache", self._format_rich())
+        return self._rich_cache
+
+    def _format_rich(self) -> str:
         parts = []
 
         # 时间戳
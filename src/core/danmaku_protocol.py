@@ -4,9 +4,10 @@
 """
 
 import enum
-import json
 import struct
-from typing import NamedTuple, Union
+from typing import Iterator, NamedTuple, Optional, Union
+
+from ..utils.json_codec import json_dumps
 
 
 __all__ = (
@@ -17,6 +18,8 @@ __all__ = (
     'InitError',
     'AuthError',
     'make_packet',
+    'iter_packets',
+    'peek_cmd',
 )
 
 
@@ -24,6 +27,12 @@ __all__ = (
 HEADER_STRUCT = struct.Struct('>I2H2I')
 
 
+# 业务消息包体的开头，B站下发的JSON总是以cmd作为第一个键
+CMD_KEY_PREFIX = b'{"cmd":'
+# 读取cmd时最多查看的包体字节数
+CMD_PEEK_SIZE = 128
+
+
 class HeaderTuple(NamedTuple):
     """头部元组"""
     pack_len: int
@@ -72,15 +81,18 @@ class AuthError(Exception):
     pass
 
 
-def make_packet(data: Union[dict, str, bytes], operation: int) -> bytes:
+def make_packet(
+    data: Union[dict, str, bytes], operation: int, ver: int = ProtoVer.HEARTBEAT
+) -> bytes:
     """创建数据包
     
     :param data: 包体数据
     :param operation: 操作码
+    :param ver: 协议版本，客户端发送的包固定为1
     :return: 完整的包数据
     """
     if isinstance(data, dict):
-        body = json.dumps(data).encode('utf-8')
+        body = json_dumps(data)
     elif isinstance(data, str):
         body = data.encode('utf-8')
     else:
@@ -89,8 +101,66 @@ def make_packet(data: Union[dict, str, bytes], operation: int) -> bytes:
     header = HEADER_STRUCT.pack(*HeaderTuple(
         pack_len=HEADER_STRUCT.size + len(body),
         raw_header_size=HEADER_STRUCT.size,
-        ver=1,
+        ver=ver,
         operation=operation,
         seq_id=1
     ))
-    return header + body
\ No newline at end of file
+    return header + body
+
+
+def iter_packets(data: Union[bytes, bytearray, memoryview]) -> Iterator[tuple[HeaderTuple, memoryview]]:
+    """遍历数据中首尾相接的所有包
+
+    包体以memoryview的形式返回，不复制数据；memoryview只在原数据存活期间有效。
+
+    :param data: WebSocket消息或解压后的包体
+    :return: (头部, 包体)的迭代器
+    :raises struct.error: 头部不完整或长度非法（头部长度小于HEADER_STRUCT.size、
+        包长度小于头部长度或超出数据），已经返回的包不受影响
+    """
+    view = data if isinstance(data, memoryview) else memoryview(data)
+    size = len(view)
+    offset = 0
+    while offset < size:
+        header = HeaderTuple._make(HEADER_STRUCT.unpack_from(view, offset))
+        # pack_len至少是一个完整的头部，否则offset不前进，会在同一个包上死循环
+        if (
+            header.raw_header_size < HEADER_STRUCT.size
+            or header.pack_len < header.raw_header_size
+            or offset + header.pack_len > size
+        ):
+            raise struct.error(
+                f'invalid packet, offset={offset}, pack_len={header.pack_len}, '
+                f'raw_header_size={header.raw_header_size}, size={size}'
+            )
+        yield header, view[offset + header.raw_header_size : offset + header.pack_len]
+        offset += header.pack_len
+
+
+def peek_cmd(body: Union[bytes, memoryview]) -> Optional[str]:
+    """不解码JSON，直接从包体开头读取cmd的值
+
+    只识别以cmd作为第一个键的包体，这样读到的一定是顶层的cmd。
+
+    :param body: 未压缩的业务消息包体
+    :return: cmd的值（可能带有":"后缀参数），无法识别时返回None
+    """
+    head = bytes(body[:CMD_PEEK_SIZE])
+    if not head.startswith(CMD_KEY_PREFIX):
+        return None
+
+    start = head.find(b'"', len(CMD_KEY_PREFIX))
+    if start == -1 or head[len(CMD_KEY_PREFIX):start].strip():
+        return None
+    end = head.find(b'"', start + 1)
+    if end == -1:
+        return None
+
+    cmd = head[start + 1 : end]
+    if b'\\' in cmd:
+        # 带转义字符，交给完整解码处理
+        return None
+    try:
+        return cmd.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
@@ -0,0 +1,262 @@
+"""弹幕回放模块
+
+录制WebSocket原始帧，并在没有网络的环境中按原样回放：
+- FrameRecorder: 作为DanmakuClient的帧记录器，把收到的二进制帧写入抓包文件
+- ReplayClient: 从抓包文件读取帧，经过与在线时相同的_parse_ws_message和处理器流程
+- 支持按原速、加速或不限速回放，并统计每秒处理的消息数
+
+抓包文件格式::
+
+    CAPTURE_MAGIC
+    (接收时间戳 float64, 帧长度 uint32, 帧数据) * N
+
+命令行::
+
+    python -m src.core.danmaku_replay record <room_id> <file> [--duration 秒]
+    python -m src.core.danmaku_replay replay <file> [--speed 倍速] [--all-cmds]
+"""
+
+import argparse
+import asyncio
+import struct
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import AbstractSet, BinaryIO, Iterator, Optional
+
+from .danmaku_fetcher import DanmakuClient
+from .danmaku_handler import BaseHandler, HandlerInterface
+from .danmaku_protocol import HeaderTuple, Operation
+
+logger = getLogger(__name__)
+
+__all__ = (
+    "FrameRecorder",
+    "ReplayClient",
+    "ReplayStats",
+    "iter_frames",
+)
+
+CAPTURE_MAGIC = b"BLDMCAP1"
+# 帧头：接收时间戳、帧长度
+FRAME_HEADER_STRUCT = struct.Struct(">dI")
+
+# 不限速回放时，每处理多少帧让出一次事件循环
+UNTHROTTLED_YIELD_FRAMES = 256
+
+
+class FrameRecorder:
+    """抓包文件写入器，可以直接传给DanmakuClient.set_frame_recorder()
+
+    :param path: 抓包文件路径，已存在时覆盖
+    """
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._file: Optional[BinaryIO] = open(self._path, "wb")
+        self._file.write(CAPTURE_MAGIC)
+        self.frame_count = 0
+        """已写入的帧数"""
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def __call__(self, data: bytes):
+        self.record(data)
+
+    def record(self, data: bytes, ts: Optional[float] = None):
+        """写入一帧
+
+        :param data: WebSocket二进制帧
+        :param ts: 接收时间戳，None表示当前时间
+        """
+        if self._file is None:
+            return
+        self._file.write(
+            FRAME_HEADER_STRUCT.pack(time.time() if ts is None else ts, len(data))
+        )
+        self._file.write(data)
+        self.frame_count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def iter_frames(path: Path) -> Iterator[tuple[float, bytes]]:
+    """读取抓包文件
+
+    :param path: 抓包文件路径
+    :return: (接收时间戳, 帧数据)，末尾不完整的帧会被忽略
+    """
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a danmaku capture file")
+        while True:
+            header = f.read(FRAME_HEADER_STRUCT.size)
+            if len(header) < FRAME_HEADER_STRUCT.size:
+                return
+            ts, length = FRAME_HEADER_STRUCT.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield ts, data
+
+
+@dataclass
+class ReplayStats:
+    """回放统计"""
+
+    frames: int = 0
+    """已回放的帧数"""
+    frame_bytes: int = 0
+    """已回放的帧字节数"""
+    commands: int = 0
+    """交给处理器的命令数"""
+    elapsed: float = 0.0
+    """回放耗时（秒）"""
+
+    @property
+    def commands_per_sec(self) -> float:
+        return self.commands / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def frames_per_sec(self) -> float:
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"frames={self.frames} bytes={self.frame_bytes} "
+            f"commands={self.commands} elapsed={self.elapsed:.3f}s "
+            f"frames/s={self.frames_per_sec:.0f} msgs/s={self.commands_per_sec:.0f}"
+        )
+
+
+class ReplayClient(DanmakuClient):
+    """回放客户端
+
+    用抓包文件代替WebSocket连接，其余解析和分发流程与DanmakuClient完全相同。
+    回放结束后客户端自动停止，处理器的on_client_stopped照常被调用。
+
+    :param path: 抓包文件路径
+    :param room_id: 回放时使用的房间ID
+    :param speed: 回放倍速，1表示原速，0表示不限速
+    """
+
+    def __init__(self, path: Path, room_id: int = 0, *, speed: float = 1.0, **kwargs):
+        super().__init__(room_id, uid=0, **kwargs)
+        self._path = Path(path)
+        self._speed = speed
+        self._room_id = room_id
+        self._need_init_room = False
+        self.stats = ReplayStats()
+        """回放统计"""
+
+    async def _network_coroutine(self):
+        """按抓包时间顺序回放所有帧"""
+        self.stats = stats = ReplayStats()
+        start_time = time.perf_counter()
+        first_ts: Optional[float] = None
+
+        for ts, data in iter_frames(self._path):
+            if self._speed > 0:
+                if first_ts is None:
+                    first_ts = ts
+                delay = (ts - first_ts) / self._speed - (
+                    time.perf_counter() - start_time
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif stats.frames % UNTHROTTLED_YIELD_FRAMES == 0:
+                await asyncio.sleep(0)
+
+            self._frame_received_at = time.time()
+            try:
+                await self._parse_ws_message(data)
+            except Exception:
+                logger.exception("room=%d _parse_ws_message() error:", self._room_id)
+            stats.frames += 1
+            stats.frame_bytes += len(data)
+
+        stats.elapsed = time.perf_counter() - start_time
+        logger.info("room=%d replay finished: %s", self._room_id, stats)
+
+    async def _parse_business_message(
+        self,
+        header: HeaderTuple,
+        body: memoryview,
+        subscribed_cmds: Optional[AbstractSet[str]] = None,
+    ):
+        # 回放时没有连接，认证回复不需要发送心跳
+        if header.operation == Operation.AUTH_REPLY:
+            return
+        await super()._parse_business_message(header, body, subscribed_cmds)
+
+    def _handle_command(self, command: dict):
+        self.stats.commands += 1
+        super()._handle_command(command)
+
+
+# ===== 命令行 =====
+
+
+class _AllCmdsHandler(HandlerInterface):
+    """订阅所有命令但不做处理，用于测量完整解码的开销"""
+
+    def handle(self, client: DanmakuClient, command: dict):
+        pass
+
+
+async def _record(room_id: int, path: Path, duration: float):
+    recorder = FrameRecorder(path)
+    client = DanmakuClient(room_id)
+    client.set_frame_recorder(recorder)
+    client.set_handler(_AllCmdsHandler())
+    client.start()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        await client.stop_and_close()
+        recorder.close()
+    print(f"recorded {recorder.frame_count} frames to {path}")
+
+
+async def _replay(path: Path, speed: float, all_cmds: bool):
+    client = ReplayClient(path, speed=speed)
+    client.set_handler(_AllCmdsHandler() if all_cmds else BaseHandler())
+    client.start()
+    await client.join()
+    await client.close()
+    print(client.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制或回放弹幕WebSocket帧")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    record_parser = subparsers.add_parser("record", help="录制直播间的原始帧")
+    record_parser.add_argument("room_id", type=int)
+    record_parser.add_argument("path", type=Path)
+    record_parser.add_argument("--duration", type=float, default=60, help="录制时长（秒）")
+
+    replay_parser = subparsers.add_parser("replay", help="回放抓包文件")
+    replay_parser.add_argument("path", type=Path)
+    replay_parser.add_argument(
+        "--speed", type=float, default=0, help="回放倍速，0表示不限速"
+    )
+    replay_parser.add_argument(
+        "--all-cmds", action="store_true", help="解码所有命令（默认只解码BaseHandler订阅的命令）"
+    )
+
+    args = parser.parse_args()
+    if args.action == "record":
+        asyncio.run(_record(args.room_id, args.path, args.duration))
+    else:
+        asyncio.run(_replay(args.path, args.speed, args.all_cmds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""弹幕后台服务模块
+
+在应用登录后常驻运行，与界面的生命周期无关：
+- 持有直播间的弹幕连接（DanmakuHub），切换面板不会断开或重新初始化
+- 最近的消息保存在有界环形缓冲区中，面板订阅时先取得历史再接收新消息
+- 没有面板订阅时也继续计数，并可选写入弹幕归档
+- 发送弹幕
+
+订阅者与UIPanelHandler转发的对象接口相同，实现以下任意方法即可：
+on_danmaku(room_id, message)、on_gift(room_id, message)、
+on_disconnect(room_id)、on_error(room_id, exception)
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from logging import getLogger
+from pathlib import Path
+from typing import AbstractSet, Any, Optional
+
+import aiohttp
+
+from ..utils.constants import ApiEndpoints
+from ..utils.json_codec import json_loads
+from .danmaku_archive import DEFAULT_ARCHIVE_CMDS, ArchiveHandler, DanmakuArchive
+from .danmaku_fetcher import DEFAULT_DANMAKU_ENDPOINTS, DanmakuEndpoints
+from .danmaku_handler import UIPanelHandler
+from .danmaku_hub import DanmakuHub
+from .danmaku_metrics import PipelineMetrics
+from .danmaku_models import BaseMessage, DanmakuMessage, GiftMessage
+from .danmaku_wbi import get_wbi_signer
+from .http_cache import HttpCache, get_http_cache
+from .http_session import get_http_session, update_http_cookies
+
+logger = getLogger(__name__)
+
+__all__ = (
+    "DanmakuCounters",
+    "DanmakuService",
+)
+
+# 默认缓存的最近消息数
+DEFAULT_BUFFER_SIZE = 500
+
+
+@dataclass
+class DanmakuCounters:
+    """服务启动以来的消息计数"""
+
+    danmaku: int = 0
+    """弹幕条数"""
+    gift: int = 0
+    """礼物消息条数"""
+    gift_num: int = 0
+    """礼物总个数"""
+    started_at: float = field(default_factory=time.time)
+    """开始计数的时间"""
+
+
+class DanmakuService:
+    """弹幕后台服务
+
+    :param room_id: 直播间ID
+    :param uid: B站用户ID，0表示未登录，None表示自动获取
+    :param cookies: 登录cookies，写入会话的cookie jar，用于连接和发送弹幕
+    :param session: 使用的会话，None表示使用get_http_session()
+    :param buffer_size: 缓存的最近消息数
+    :param archive_dir: 弹幕归档目录，None表示不归档
+    :param archive_cmds: 归档的命令，默认只归档弹幕、礼物等常用消息，None表示所有命令
+    :param metrics: 延迟统计，None表示不统计
+    :param endpoints: 弹幕客户端访问的地址
+    :param http_cache: 缓存弹幕服务器列表的HTTP缓存，None表示使用get_http_cache()
+    """
+
+    def __init__(
+        self,
+        room_id: int,
+        *,
+        uid: Optional[int] = None,
+        cookies: Optional[dict] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        archive_dir: Optional[Path] = None,
+        archive_cmds: Optional[AbstractSet[str]] = DEFAULT_ARCHIVE_CMDS,
+        metrics: Optional[PipelineMetrics] = None,
+        endpoints: DanmakuEndpoints = DEFAULT_DANMAKU_ENDPOINTS,
+        http_cache: Optional[HttpCache] = None,
+    ):
+        self._room_id = room_id
+        self._endpoints = endpoints
+        self._session = session if session is not None else get_http_session()
+        if cookies:
+            update_http_cookies(self._session, cookies)
+
+        self._hub = DanmakuHub(
+            uid=uid,
+            session=self._session,
+            metrics=metrics,
+            endpoints=endpoints,
+            http_cache=http_cache if http_cache is not None else get_http_cache(),
+        )
+        self._archive = DanmakuArchive(archive_dir) if archive_dir is not None else None
+        self._archive_cmds = archive_cmds
+
+        self.messages: deque[BaseMessage] = deque(maxlen=buffer_size)
+        """最近的消息（环形缓冲区）"""
+        self.counters = DanmakuCounters()
+        """消息计数"""
+        self._subscribers: list[Any] = []
+
+    @property
+    def room_id(self) -> int:
+        return self._room_id
+
+    @property
+    def is_running(self) -> bool:
+        """是否正在运行"""
+        return self._hub.is_running
+
+    @property
+    def archive(self) -> Optional[DanmakuArchive]:
+        """弹幕归档，未启用时为None"""
+        return self._archive
+
+    # ===== 生命周期 =====
+
+    def start(self):
+        """启动弹幕连接"""
+        if self.is_running:
+            logger.warning("room=%d service is running, cannot start() again", self._room_id)
+            return
+
+        self._hub.add_room(self._room_id, UIPanelHandler(self))
+        if self._archive is not None:
+            self._hub.add_handler(self._room_id, ArchiveHandler(self._archive, self._archive_cmds))
+        self._hub.start()
+        logger.info("room=%d danmaku service started", self._room_id)
+
+    async def stop_and_close(self):
+        """停止连接并释放资源"""
+        await self._hub.stop_and_close()
+        if self._archive is not None:
+            await self._archive.close()
+        self._subscribers.clear()
+        logger.info("room=%d danmaku service stopped", self._room_id)
+
+    # ===== 订阅 =====
+
+    def subscribe(self, subscriber: Any) -> list[BaseMessage]:
+        """订阅新消息
+
+        :param subscriber: 订阅者
+        :return: 订阅前缓存的最近消息，按时间顺序
+        """
+        if subscriber not in self._subscribers:
+            self._subscribers.append(subscriber)
+        return list(self.messages)
+
+    def unsubscribe(self, subscriber: Any):
+        """取消订阅"""
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def _notify(self, method: str, *args):
+        for subscriber in self._subscribers:
+            callback = getattr(subscriber, method, None)
+            if callback is None:
+                continue
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception("room=%d subscriber %r %s() failed", self._room_id, subscriber, method)
+
+    # ===== UIPanelHandler 回调 =====
+
+    def on_danmaku(self, room_id: int, message: DanmakuMessage):
+        self.messages.append(message)
+        self.counters.danmaku += 1
+        self._notify("on_danmaku", room_id, message)
+
+    def on_gift(self, room_id: int, message: GiftMessage):
+        self.messages.append(message)
+        self.counters.gift += 1
+        self.counters.gift_num += message.num
+        self._notify("on_gift", room_id, message)
+
+    def on_disconnect(self, room_id: int):
+        logger.info("room=%d danmaku disconnected", room_id)
+        self._notify("on_disconnect", room_id)
+
+    def on_error(self, room_id: int, error: Exception):
+        logger.error("room=%d danmaku error: %s", room_id, error)
+        self._notify("on_error", room_id, error)
+
+    # ===== 发送弹幕 =====
+
+    async def send_danmaku(self, content: str, csrf: str) -> tuple[bool, str]:
+        """发送弹幕
+
+        :param content: 弹幕内容
+        :param csrf: csrf token（cookie中的bili_jct）
+        :return: (是否成功, 消息)
+        """
+        wbi_signer = get_wbi_signer(self._session, self._endpoints.wbi_key_url)
+        if wbi_signer.need_refresh_wbi_key:
+            await wbi_signer.refresh_wbi_key()
+        params = wbi_signer.add_wbi_sign({"web_location": "444.8"})
+        data = {
+            "mode": 1,
+            "color": 16777215,
+            "fontsize": 16,
+            "msg": content,
+            "roomid": self._room_id,
+            "rnd": int(time.time()),
+            "csrf": csrf,
+            "csrf_token": csrf,
+        }
+        try:
+            async with self._session.post(
+                ApiEndpoints.SEND_DANMAKU, params=params, data=data
+            ) as res:
+                if res.status != 200:
+                    logger.error("发送弹幕失败 status_code:%d", res.status)
+                    return False, f"发送弹幕失败: HTTP {res.status}"
+                res_data = json_loads(await res.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("发送弹幕失败: %s", e)
+            return False, f"发送弹幕失败: {e}"
+
+        code = res_data.get("code")
+        msg = res_data.get("msg") or res_data.get("message", "")
+        if code != 0:
+            logger.error("发送弹幕失败 code:%s msg:%s", code, msg)
+            return False, f"发送弹幕失败: {msg} ({code})"
+        logger.info("发送弹幕成功 code:%s msg:%s", code, msg)
+        return True, "发送弹幕成功"
@@ -26,11 +26,18 @@ __all__ = (
 _session_to_wbi_signer: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
 
-def get_wbi_signer(session: aiohttp.ClientSession) -> "WbiSigner":
-    """获取WBI签名器（每个session一个）"""
+def get_wbi_signer(
+    session: aiohttp.ClientSession, wbi_key_url: str = ApiEndpoints.GET_WBI_KEY
+) -> "WbiSigner":
+    """获取WBI签名器（每个session一个）
+
+    :param wbi_key_url: 获取WBI密钥的地址，只在第一次创建签名器时生效
+    """
     wbi_signer = _session_to_wbi_signer.get(session, None)
     if wbi_signer is None:
-        wbi_signer = _session_to_wbi_signer[session] = WbiSigner(session)
+        wbi_signer = _session_to_wbi_signer[session] = WbiSigner(
+            session, wbi_key_url
+        )
     return wbi_signer
 
 
@@ -40,8 +47,13 @@ class WbiSigner:
     WBI_KEY_TTL = timedelta(hours=11, minutes=59, seconds=30)
     """WBI密钥有效期"""
 
-    def __init__(self, session: aiohttp.ClientSession):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        wbi_key_url: str = ApiEndpoints.GET_WBI_KEY,
+    ):
         self._session = session
+        self._wbi_key_url = wbi_key_url
         self._wbi_key = ""
         self._refresh_future: Optional[asyncio.Future] = None
         self._last_refresh_time: Optional[datetime] = None
@@ -87,7 +99,7 @@ class WbiSigner:
         """从API获取WBI密钥"""
         try:
             async with self._session.get(
-                ApiEndpoints.GET_WBI_KEY,
+                self._wbi_key_url,
                 headers={"User-Agent": USER_AGENT},
             ) as res:
                 if res.status != 200:
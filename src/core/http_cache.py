@@ -0,0 +1,289 @@
+"""HTTP响应缓存模块
+
+缓存很少变化的接口响应（分区列表、直播姬版本、弹幕服务器列表），保存在磁盘上，重启后仍然有效：
+- 已经由其他文件保存的响应（分区列表保存在config_cache.json中）只缓存在内存中，不重复写入磁盘
+- 按地址和参数区分缓存，签名、时间戳等每次都变的参数不参与区分
+- 每个接口使用各自的有效期，有效期内直接返回缓存，不发起网络请求
+- 过期后带上ETag/Last-Modified重新请求，服务器返回304时继续使用缓存
+- 请求失败（离线、超时、服务器错误）时返回过期的缓存
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional
+from urllib.parse import urlencode
+
+from ..utils.fileio import atomic_write
+from ..utils.json_codec import JSONDecodeError, json_dumps, json_loads
+from .http_session import network_errors
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = getLogger(__name__)
+
+__all__ = (
+    "CacheEntry",
+    "HttpCache",
+    "get_http_cache",
+)
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = Path("http_cache")
+
+# 各接口的缓存有效期（秒）
+AREA_LIST_TTL = 24 * 3600
+LIVE_VERSION_TTL = 24 * 3600
+# 弹幕服务器列表附带连接用的token（按uid区分缓存），有效期不宜太长，认证失败时会主动失效
+DANMAKU_SERVER_CONF_TTL = 30 * 60
+
+# 不参与区分缓存的参数（签名、时间戳）
+VOLATILE_PARAMS = frozenset({"ts", "sign", "wts", "w_rid"})
+
+
+def _code_ok(data: Any) -> bool:
+    """B站接口的成功响应"""
+    return isinstance(data, dict) and data.get("code") == 0
+
+
+@dataclass
+class CacheEntry:
+    """一条缓存的响应"""
+
+    url: str
+    """请求地址"""
+    data: Any
+    """响应JSON"""
+    stored_at: float
+    """缓存或上次确认未变化的时间（time.time）"""
+    etag: str = ""
+    """响应的ETag"""
+    last_modified: str = ""
+    """响应的Last-Modified"""
+
+    @property
+    def age(self) -> float:
+        """距上次确认的秒数"""
+        return time.time() - self.stored_at
+
+    def is_fresh(self, ttl: float) -> bool:
+        """是否仍在有效期内"""
+        return 0 <= self.age < ttl
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "data": self.data,
+            "stored_at": self.stored_at,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CacheEntry":
+        return cls(
+            url=data["url"],
+            data=data["data"],
+            stored_at=float(data["stored_at"]),
+            etag=data.get("etag", ""),
+            last_modified=data.get("last_modified", ""),
+        )
+
+
+class HttpCache:
+    """磁盘HTTP响应缓存
+
+    每条缓存一个JSON文件，读取过的缓存同时保存在内存中。
+    写入磁盘失败只记录日志，不影响请求结果。
+
+    :param cache_dir: 缓存目录，不存在时在第一次写入时创建
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR):
+        self._cache_dir = Path(cache_dir)
+        self._entries: dict[str, Optional[CacheEntry]] = {}
+        """key -> 缓存，None表示磁盘上也没有"""
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    @staticmethod
+    def make_key(url: str, params: Optional[dict] = None) -> str:
+        """根据地址和参数生成缓存key，忽略VOLATILE_PARAMS中的参数"""
+        stable = sorted(
+            (str(key), str(value))
+            for key, value in (params or {}).items()
+            if key not in VOLATILE_PARAMS
+        )
+        raw = f"{url}?{urlencode(stable)}" if stable else url
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._cache_dir / f"{key}.json"
+
+    # ===== 读写 =====
+
+    def get(self, url: str, params: Optional[dict] = None) -> Optional[CacheEntry]:
+        """获取缓存（可能已过期），没有时返回None"""
+        key = self.make_key(url, params)
+        if key in self._entries:
+            return self._entries[key]
+
+        entry = None
+        path = self._path(key)
+        try:
+            entry = CacheEntry.from_dict(json_loads(path.read_bytes()))
+        except FileNotFoundError:
+            pass
+        except (OSError, JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("invalid cache file %s: %s", path, e)
+        self._entries[key] = entry
+        return entry
+
+    def get_fresh(
+        self, url: str, ttl: float, params: Optional[dict] = None
+    ) -> Optional[Any]:
+        """获取有效期内的缓存数据，没有或已过期时返回None"""
+        entry = self.get(url, params)
+        if entry is not None and entry.is_fresh(ttl):
+            return entry.data
+        return None
+
+    def get_stale(self, url: str, params: Optional[dict] = None) -> Optional[Any]:
+        """获取缓存数据，不论是否过期，没有时返回None"""
+        entry = self.get(url, params)
+        return entry.data if entry is not None else None
+
+    def put(
+        self, url: str, params: Optional[dict], entry: CacheEntry, persist: bool = True
+    ):
+        """保存缓存
+
+        :param persist: 是否写入磁盘，False时只保存在内存中
+        """
+        key = self.make_key(url, params)
+        self._entries[key] = entry
+        if not persist:
+            return
+
+        path = self._path(key)
+        try:
+            atomic_write(path, json_dumps(entry.to_dict()), fsync=False)
+        except OSError as e:
+            logger.warning("failed to write cache file %s: %s", path, e)
+
+    def invalidate(self, url: str, params: Optional[dict] = None):
+        """删除一条缓存"""
+        key = self.make_key(url, params)
+        self._entries[key] = None
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("failed to remove cache file %s: %s", self._path(key), e)
+
+    def clear(self):
+        """删除所有缓存"""
+        self._entries.clear()
+        if not self._cache_dir.is_dir():
+            return
+        for path in self._cache_dir.glob("*.json"):
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning("failed to remove cache file %s: %s", path, e)
+
+    # ===== 请求 =====
+
+    async def get_json(
+        self,
+        session: "aiohttp.ClientSession",
+        url: str,
+        *,
+        ttl: float,
+        params: Optional[dict] = None,
+        key_params: Optional[dict] = None,
+        headers: Optional[dict[str, str]] = None,
+        cookies: Optional[dict] = None,
+        is_valid: Callable[[Any], bool] = _code_ok,
+        persist: bool = True,
+    ) -> Any:
+        """GET请求JSON接口，优先使用缓存
+
+        - 缓存在有效期内：直接返回，不发起请求
+        - 缓存已过期：带上If-None-Match/If-Modified-Since请求，304时刷新缓存时间并返回缓存
+        - 请求成功且is_valid(响应)为真：写入缓存；否则原样返回响应，不写入
+        - 请求失败：有缓存时返回过期的缓存，否则抛出异常
+
+        :param session: 使用的会话
+        :param url: 请求地址
+        :param ttl: 缓存有效期（秒）
+        :param params: 请求参数，VOLATILE_PARAMS之外的参数参与区分缓存
+        :param key_params: 只参与区分缓存、不随请求发送的参数（例如区分账号的uid）
+        :param headers: 请求头
+        :param cookies: 请求携带的cookies
+        :param is_valid: 判断响应是否可以缓存，默认要求code为0
+        :param persist: 是否把缓存写入磁盘，响应已经由其他文件保存时为False
+        :return: 响应JSON
+        """
+        if key_params:
+            cache_params = {**(params or {}), **key_params}
+        else:
+            cache_params = params
+        entry = self.get(url, cache_params)
+        if entry is not None and entry.is_fresh(ttl):
+            logger.debug("cache hit %s age=%.0fs", url, entry.age)
+            return entry.data
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            async with session.get(
+                url, params=params, headers=request_headers, cookies=cookies
+            ) as response:
+                if response.status == 304 and entry is not None:
+                    logger.debug("cache revalidated %s", url)
+                    entry.stored_at = time.time()
+                    self.put(url, cache_params, entry, persist)
+                    return entry.data
+                response.raise_for_status()
+                data = json_loads(await response.read())
+                etag = response.headers.get("ETag", "")
+                last_modified = response.headers.get("Last-Modified", "")
+        except (*network_errors(), JSONDecodeError) as e:
+            if entry is None:
+                raise
+            logger.warning(
+                "request %s failed, using cache from %.0fs ago: %s", url, entry.age, e
+            )
+            return entry.data
+
+        if is_valid(data):
+            self.put(
+                url,
+                cache_params,
+                CacheEntry(url, data, time.time(), etag, last_modified),
+                persist,
+            )
+        return data
+
+
+_default_cache: Optional[HttpCache] = None
+
+
+def get_http_cache() -> HttpCache:
+    """获取应用共用的缓存（DEFAULT_CACHE_DIR）"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HttpCache()
+    return _default_cache
@@ -0,0 +1,137 @@
+"""HTTP会话模块
+
+为每个事件循环提供一个共享的aiohttp会话（保持连接、复用TLS），
+并提供在后台事件循环中运行协程的run_sync()，供同步接口使用。
+
+aiohttp在第一次创建会话时才导入，导入本模块不会拖慢启动。
+"""
+
+import asyncio
+import threading
+import weakref
+from http.cookies import SimpleCookie
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Coroutine, Optional, TypeVar
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = getLogger(__name__)
+
+__all__ = (
+    "get_http_session",
+    "close_http_session",
+    "clear_http_cookies",
+    "network_errors",
+    "run_sync",
+    "update_http_cookies",
+)
+
+T = TypeVar("T")
+
+# 默认请求超时（秒）
+DEFAULT_TIMEOUT = 10
+# 连接池大小
+DEFAULT_CONNECTION_LIMIT = 20
+# DNS缓存时间（秒）
+DEFAULT_DNS_CACHE_TTL = 300
+# 登录cookies的域名
+COOKIE_DOMAIN = "bilibili.com"
+
+_loop_to_session: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+
+def get_http_session() -> "aiohttp.ClientSession":
+    """获取当前事件循环共享的会话（需要在事件循环中调用）"""
+    loop = asyncio.get_running_loop()
+    session = _loop_to_session.get(loop)
+    if session is None or session.closed:
+        import aiohttp
+
+        session = _loop_to_session[loop] = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+            connector=aiohttp.TCPConnector(
+                limit=DEFAULT_CONNECTION_LIMIT, ttl_dns_cache=DEFAULT_DNS_CACHE_TTL
+            ),
+        )
+    return session
+
+
+def network_errors() -> tuple[type[BaseException], ...]:
+    """网络请求失败时可能抛出的异常，用于except子句（只在发生异常时才导入aiohttp）"""
+    import aiohttp
+
+    return (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+def update_http_cookies(session: "aiohttp.ClientSession", cookies: dict):
+    """把登录cookies写入会话的cookie jar，之后访问B站的请求都会携带
+
+    :param session: 会话
+    :param cookies: cookie名 -> 值
+    """
+    simple_cookie = SimpleCookie()
+    for key, value in cookies.items():
+        simple_cookie[key] = value
+        simple_cookie[key]["domain"] = COOKIE_DOMAIN
+    session.cookie_jar.update_cookies(simple_cookie)
+
+
+def clear_http_cookies():
+    """清空所有共享会话的cookie，退出登录后的请求不再携带之前账号的cookie
+
+    其他事件循环的会话在所在的线程中清空。
+    """
+    try:
+        current_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        current_loop = None
+
+    for loop, session in list(_loop_to_session.items()):
+        if session.closed:
+            continue
+        if loop is current_loop or not loop.is_running():
+            session.cookie_jar.clear()
+        else:
+            loop.call_soon_threadsafe(session.cookie_jar.clear)
+
+
+async def close_http_session():
+    """关闭当前事件循环共享的会话"""
+    session = _loop_to_session.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """在后台事件循环中运行协程并等待结果
+
+    同步接口通过这里共用后台事件循环的会话。
+    不能在事件循环所在的线程中调用，否则会阻塞事件循环。
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from a running event loop")
+
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="http-session-loop", daemon=True
+            ).start()
+            _background_loop = loop
+        return _background_loop
@@ -1,18 +1,27 @@
 """直播操作模块
 
 处理开播、下播、获取直播间信息、修改标题和分区等操作。
+
+- AsyncLiveManager: 基于共享aiohttp会话的异步接口（保持连接，不需要工作线程）
+- LiveManager: 同步接口，在后台事件循环中调用AsyncLiveManager
 """
 
+import asyncio
 import logging
 import threading
+import time
 from dataclasses import dataclass
-from typing import Optional
-
-import requests
+from typing import TYPE_CHECKING, Optional, Union
 
 from ..utils.constants import LIVEHIME_BUILD, LIVEHIME_VERSION, USER_AGENT, ApiEndpoints
 from ..utils.crypto import sign_api_data
+from ..utils.json_codec import json_loads
 from .config import ConfigManager
+from .http_cache import AREA_LIST_TTL, LIVE_VERSION_TTL, HttpCache, get_http_cache
+from .http_session import get_http_session, run_sync
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logger = logging.getLogger(__name__)
 
@@ -34,14 +43,94 @@ class RoomInfo:
     live_time: str
 
 
-class LiveManager:
-    """直播管理器
+async def _wait_stop_event(
+    stop_event: Union[asyncio.Event, threading.Event, None], timeout: float
+) -> bool:
+    """等待停止事件，返回是否已停止
 
-    处理直播间相关的所有操作。
+    threading.Event不能在事件循环中阻塞等待，按较短间隔轮询。
     """
+    if stop_event is None:
+        await asyncio.sleep(timeout)
+        return False
+    if isinstance(stop_event, asyncio.Event):
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return stop_event.is_set()
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not stop_event.is_set():
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(remaining, 0.1))
+    return True
 
-    def __init__(self, config_manager: ConfigManager):
+
+class AsyncLiveManager:
+    """异步直播管理器
+
+    处理直播间相关的所有操作，请求通过当前事件循环共享的aiohttp会话发送。
+    直播间信息会缓存 ROOM_INFO_TTL 秒，同时发起的多个获取请求共用一个网络请求，
+    开播、下播、修改直播间信息成功后缓存失效。
+    分区列表和直播姬版本很少变化，通过HTTP缓存获取，离线时使用过期的缓存。
+    分区列表保存在config_cache.json中，HTTP缓存只在内存中保存它的有效期和ETag。
+
+    Args:
+        config_manager: 配置管理器
+        session: 使用的会话，None表示使用get_http_session()
+        http_cache: 使用的HTTP缓存，None表示使用get_http_cache()
+    """
+
+    # 直播间信息缓存时间（秒），与DashboardPanel的定时刷新间隔一致
+    ROOM_INFO_TTL = 300.0
+
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        session: Optional["aiohttp.ClientSession"] = None,
+        http_cache: Optional[HttpCache] = None,
+    ):
         self.config_manager = config_manager
+        self._session = session
+        self._http_cache = http_cache
+
+        self._room_info: Optional[RoomInfo] = None
+        """缓存的直播间信息"""
+        self._room_info_time = 0.0
+        """缓存的获取时间（time.monotonic）"""
+        self._room_info_generation = 0
+        """缓存版本，每次失效加一，失效前发起的请求结果不再写入缓存"""
+        self._room_info_future: Optional[asyncio.Task] = None
+        """进行中的获取请求"""
+        self._room_info_future_generation = 0
+
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        """请求使用的会话"""
+        if self._session is not None:
+            return self._session
+        return get_http_session()
+
+    @property
+    def http_cache(self) -> HttpCache:
+        """分区列表、直播姬版本使用的HTTP缓存"""
+        if self._http_cache is not None:
+            return self._http_cache
+        return get_http_cache()
+
+    @property
+    def cached_room_info(self) -> Optional[RoomInfo]:
+        """缓存的直播间信息（可能已过期），不发起网络请求"""
+        return self._room_info
+
+    def invalidate_room_info(self):
+        """使直播间信息缓存失效，下次获取时重新请求"""
+        self._room_info = None
+        self._room_info_generation += 1
 
     def _get_headers(self) -> dict[str, str]:
         """获取请求头"""
@@ -78,7 +167,38 @@ class LiveManager:
         """对请求数据进行签名（APP端API需要）"""
         return sign_api_data(data)
 
-    def fetch_room_id(self, uid: int) -> bool:
+    async def _request_json(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        with_cookies: bool = True,
+        **kwargs,
+    ) -> dict:
+        """发送请求并解析JSON响应
+
+        Args:
+            method: 请求方法
+            url: 请求地址
+            headers: 请求头，None表示使用_get_headers()
+            with_cookies: 是否携带登录cookies
+            **kwargs: 传给aiohttp的其他参数（params、data等）
+
+        Returns:
+            dict: 响应JSON
+        """
+        async with self.session.request(
+            method,
+            url,
+            headers=self._get_headers() if headers is None else headers,
+            cookies=self._get_cookies() if with_cookies else None,
+            **kwargs,
+        ) as response:
+            response.raise_for_status()
+            return json_loads(await response.read())
+
+    async def fetch_room_id(self, uid: int) -> bool:
         """根据UID获取直播间ID
 
         Args:
@@ -91,14 +211,13 @@ class LiveManager:
             if uid <= 0:
                 logger.error(f"更新直播间ID失败，传入参数为 uid={uid}")
                 return False
-            response = requests.get(
+            data = await self._request_json(
+                "GET",
                 ApiEndpoints.GET_ROOM_ID,
                 headers={"User-Agent": USER_AGENT},
+                with_cookies=False,
                 params={"uid": uid},
-                timeout=10,
             )
-            response.raise_for_status()
-            data = response.json()
 
             if data.get("code") != 0:
                 logger.error(f"获取直播间ID失败: {data.get('message')}")
@@ -113,27 +232,64 @@ class LiveManager:
             logger.error(f"获取直播间ID异常: {e}")
             return False
 
-    def fetch_room_info(self) -> Optional[RoomInfo]:
+    async def fetch_room_info(self, force: bool = False) -> Optional[RoomInfo]:
         """获取直播间详细信息
 
+        缓存未过期时直接返回缓存；已有进行中的请求时等待该请求的结果。
+
+        Args:
+            force: 忽略缓存，强制重新请求
+
         Returns:
             RoomInfo | None: 直播间信息
         """
+        if force:
+            self.invalidate_room_info()
+        else:
+            info = self._room_info
+            if (
+                info is not None
+                and info.room_id == self._get_room_id()
+                and time.monotonic() - self._room_info_time < self.ROOM_INFO_TTL
+            ):
+                return info
+
+        future = self._room_info_future
+        if (
+            future is None
+            or self._room_info_future_generation != self._room_info_generation
+            # 同步接口在后台事件循环中调用，不能等待其他事件循环的任务
+            or future.get_loop() is not asyncio.get_running_loop()
+        ):
+            future = self._room_info_future = asyncio.create_task(
+                self._do_fetch_room_info(self._room_info_generation)
+            )
+            self._room_info_future_generation = self._room_info_generation
+
+            def on_done(fu):
+                if self._room_info_future is fu:
+                    self._room_info_future = None
+
+            future.add_done_callback(on_done)
+
+        # 调用方被取消时不影响其他等待同一请求的调用方
+        return await asyncio.shield(future)
+
+    async def _do_fetch_room_info(self, generation: int) -> Optional[RoomInfo]:
+        """执行获取直播间信息，成功时写入缓存
+
+        Args:
+            generation: 发起请求时的缓存版本，任务开始执行前缓存可能已经失效
+        """
         room_id = self._get_room_id()
         if room_id <= 0:
             logger.error(f"直播间ID无效，room_id={room_id}")
             return None
 
         try:
-            response = requests.post(
-                ApiEndpoints.GET_ROOM_STATUS,
-                headers=self._get_headers(),
-                cookies=self._get_cookies(),
-                data={"room_id": room_id},
-                timeout=10,
+            data = await self._request_json(
+                "POST", ApiEndpoints.GET_ROOM_STATUS, data={"room_id": room_id}
             )
-            response.raise_for_status()
-            data = response.json()
 
             if data.get("code") != 0:
                 logger.error(f"获取直播间信息失败: {data.get('message')}")
@@ -162,6 +318,10 @@ class LiveManager:
                 live_time=room_data.get("live_time", ""),
             )
 
+            if generation == self._room_info_generation:
+                self._room_info = info
+                self._room_info_time = time.monotonic()
+
             logger.info(f"获取直播间信息成功: {info.title}")
             return info
 
@@ -189,21 +349,22 @@ class LiveManager:
         """
         return self.get_live_status() == 1
 
-    def fetch_area_list(self) -> bool:
+    async def fetch_area_list(self) -> bool:
         """获取分区列表
 
         Returns:
             bool: 是否成功获取
         """
         try:
-            response = requests.get(
+            data = await self.http_cache.get_json(
+                self.session,
                 ApiEndpoints.GET_AREA_LIST,
+                ttl=AREA_LIST_TTL,
                 headers=self._get_headers(),
                 cookies=self._get_cookies(),
-                timeout=10,
+                # 解析后的分区列表由ConfigManager保存，不在磁盘上再存一份
+                persist=False,
             )
-            response.raise_for_status()
-            data = response.json()
 
             if data.get("code") != 0:
                 logger.error(f"获取分区列表失败: {data.get('message')}")
@@ -237,7 +398,7 @@ class LiveManager:
             logger.error(f"获取分区列表异常: {e}")
             return False
 
-    def update_live_version(self) -> bool:
+    async def update_live_version(self) -> bool:
         """更新直播姬版本信息
 
         Returns:
@@ -245,14 +406,13 @@ class LiveManager:
         """
         try:
             data = self._sign_data({"system_version": 2})
-            response = requests.get(
+            res_data = await self.http_cache.get_json(
+                self.session,
                 ApiEndpoints.GET_LIVE_VERSION,
+                ttl=LIVE_VERSION_TTL,
                 params=data,
                 headers=self._get_headers(),
-                timeout=10,
             )
-            response.raise_for_status()
-            res_data = response.json()
 
             if res_data.get("code") == 0:
                 config = self.config_manager.config
@@ -269,7 +429,7 @@ class LiveManager:
             logger.error(f"更新直播姬版本异常: {e}")
             return False
 
-    def start_live(self) -> tuple[bool, str, bool, str]:
+    async def start_live(self) -> tuple[bool, str, bool, str]:
         """开始直播
 
         Returns:
@@ -279,7 +439,7 @@ class LiveManager:
                 - (False, "错误信息", False, ""): 开播失败
         """
         # 更新直播姬版本
-        self.update_live_version()
+        await self.update_live_version()
 
         room_id = self._get_room_id()
         csrf = self._get_csrf()
@@ -301,15 +461,9 @@ class LiveManager:
         logger.info("正在开播...")
 
         try:
-            response = requests.post(
-                ApiEndpoints.START_LIVE,
-                headers=self._get_headers(),
-                cookies=self._get_cookies(),
-                data=self._sign_data(data),
-                timeout=10,
+            res_data = await self._request_json(
+                "POST", ApiEndpoints.START_LIVE, data=self._sign_data(data)
             )
-            response.raise_for_status()
-            res_data = response.json()
 
             # 检查是否需要人脸识别
             if res_data.get("code") == 60024:
@@ -334,6 +488,7 @@ class LiveManager:
 
             # 保存推流信息
             self.config_manager.update_stream_info(rtmp_addr, rtmp_code)
+            self.invalidate_room_info()
 
             logger.info("开播成功")
             return True, "开播成功", False, ""
@@ -342,12 +497,16 @@ class LiveManager:
             logger.error(f"开播异常: {e}")
             return False, f"开播异常: {e}", False, ""
 
-    def check_face_auth(self, qr_url: str, stop_event: threading.Event) -> bool:
+    async def check_face_auth(
+        self,
+        qr_url: str,
+        stop_event: Union[asyncio.Event, threading.Event, None] = None,
+    ) -> bool:
         """检查人脸识别状态
 
         Args:
             qr_url: 人脸识别二维码URL（仅用于日志）
-            stop_event: 停止事件，用户关闭二维码时设置
+            stop_event: 停止事件，用户关闭二维码时设置；也可以直接取消任务
 
         Returns:
             bool: 人脸识别是否成功
@@ -373,38 +532,31 @@ class LiveManager:
         max_retries = 300
         for _ in range(max_retries):
             # 检查是否要求停止
-            if stop_event.is_set():
+            if stop_event is not None and stop_event.is_set():
                 logger.info("人脸识别流程被用户取消")
                 return False
 
             try:
-                response = requests.post(
-                    ApiEndpoints.CHECK_FACE,
-                    headers=self._get_headers(),
-                    cookies=self._get_cookies(),
-                    data=data,
-                    timeout=10,
+                res_data = await self._request_json(
+                    "POST", ApiEndpoints.CHECK_FACE, data=data
                 )
-                response.raise_for_status()
-                res_data = response.json()
 
                 if res_data.get("data") and res_data.get("data").get("is_identified"):
                     logger.info("人脸识别成功")
                     return True
 
-                # 未识别，等待1秒后继续（使用Event.wait以便及时响应停止）
-                if stop_event.wait(timeout=1):
-                    return False
-
             except Exception as e:
                 logger.warning(f"检查人脸识别状态失败: {e}")
-                if stop_event.wait(timeout=1):
-                    return False
+
+            # 未识别，等待1秒后继续（等待停止事件以便及时响应停止）
+            if await _wait_stop_event(stop_event, 1):
+                logger.info("人脸识别流程被用户取消")
+                return False
 
         logger.warning("人脸识别超时")
         return False
 
-    def stop_live(self) -> tuple[bool, str]:
+    async def stop_live(self) -> tuple[bool, str]:
         """停止直播
 
         Returns:
@@ -424,21 +576,16 @@ class LiveManager:
         }
 
         try:
-            response = requests.post(
-                ApiEndpoints.STOP_LIVE,
-                headers=self._get_headers(),
-                cookies=self._get_cookies(),
-                data=self._sign_data(data),
-                timeout=10,
+            res_data = await self._request_json(
+                "POST", ApiEndpoints.STOP_LIVE, data=self._sign_data(data)
             )
-            response.raise_for_status()
-            res_data = response.json()
 
             if res_data.get("code") != 0:
                 error_msg = res_data.get("msg", "未知错误")
                 logger.error(f"下播失败: {error_msg}")
                 return False, f"下播失败: {error_msg}"
 
+            self.invalidate_room_info()
             logger.info("下播成功")
             return True, "下播成功"
 
@@ -446,7 +593,7 @@ class LiveManager:
             logger.error(f"下播异常: {e}")
             return False, f"下播异常: {e}"
 
-    def update_room(self, title: str = "", area_id: int = 0) -> tuple[bool, str]:
+    async def update_room(self, title: str = "", area_id: int = 0) -> tuple[bool, str]:
         """修改直播间信息
 
         Args:
@@ -478,15 +625,9 @@ class LiveManager:
             return False, error_msg
 
         try:
-            response = requests.post(
-                ApiEndpoints.UPDATE_ROOM,
-                headers=self._get_headers(),
-                cookies=self._get_cookies(),
-                data=self._sign_data(data),
-                timeout=10,
+            res_data = await self._request_json(
+                "POST", ApiEndpoints.UPDATE_ROOM, data=self._sign_data(data)
             )
-            response.raise_for_status()
-            res_data = response.json()
 
             if res_data.get("code") != 0:
                 error_msg = res_data.get("msg", "未知错误")
@@ -498,6 +639,7 @@ class LiveManager:
                 self.config_manager.config.title = title
             if data.get("area_id"):
                 self.config_manager.config.area_id = area_id
+            self.invalidate_room_info()
 
             logger.info("更新直播间信息成功")
             return True, "更新直播间信息成功"
@@ -506,7 +648,7 @@ class LiveManager:
             logger.error(f"更新直播间信息异常: {e}")
             return False, f"更新直播间信息异常: {e}"
 
-    def update_title(self, title: str) -> tuple[bool, str]:
+    async def update_title(self, title: str) -> tuple[bool, str]:
         """修改直播标题
 
         Args:
@@ -515,9 +657,9 @@ class LiveManager:
         Returns:
             tuple[bool, str]: (是否成功, 消息)
         """
-        return self.update_room(title=title)
+        return await self.update_room(title=title)
 
-    def update_area(self, area_id: int) -> tuple[bool, str]:
+    async def update_area(self, area_id: int) -> tuple[bool, str]:
         """修改直播分区
 
         Args:
@@ -526,4 +668,71 @@ class LiveManager:
         Returns:
             tuple[bool, str]: (是否成功, 消息)
         """
-        return self.update_room(area_id=area_id)
+        return await self.update_room(area_id=area_id)
+
+
+class LiveManager:
+    """直播管理器
+
+    AsyncLiveManager的同步接口，请求在后台事件循环中执行，调用时会阻塞当前线程，
+    不能在事件循环所在的线程中调用。在事件循环中请直接使用 aio 属性的异步接口。
+    """
+
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+        self.aio = AsyncLiveManager(config_manager)
+        """异步接口"""
+
+    def fetch_room_id(self, uid: int) -> bool:
+        """根据UID获取直播间ID，见AsyncLiveManager.fetch_room_id"""
+        return run_sync(self.aio.fetch_room_id(uid))
+
+    def fetch_room_info(self, force: bool = False) -> Optional[RoomInfo]:
+        """获取直播间详细信息，见AsyncLiveManager.fetch_room_info"""
+        return run_sync(self.aio.fetch_room_info(force))
+
+    def invalidate_room_info(self):
+        """使直播间信息缓存失效，见AsyncLiveManager.invalidate_room_info"""
+        self.aio.invalidate_room_info()
+
+    def get_live_status(self) -> int:
+        """获取直播状态（仅从配置读取）"""
+        return self.aio.get_live_status()
+
+    def is_living(self) -> bool:
+        """是否正在直播（仅从配置读取）"""
+        return self.aio.is_living()
+
+    def fetch_area_list(self) -> bool:
+        """获取分区列表，见AsyncLiveManager.fetch_area_list"""
+        return run_sync(self.aio.fetch_area_list())
+
+    def update_live_version(self) -> bool:
+        """更新直播姬版本信息，见AsyncLiveManager.update_live_version"""
+        return run_sync(self.aio.update_live_version())
+
+    def start_live(self) -> tuple[bool, str, bool, str]:
+        """开始直播，见AsyncLiveManager.start_live"""
+        return run_sync(self.aio.start_live())
+
+    def check_face_auth(
+        self, qr_url: str, stop_event: Optional[threading.Event] = None
+    ) -> bool:
+        """检查人脸识别状态，见AsyncLiveManager.check_face_auth"""
+        return run_sync(self.aio.check_face_auth(qr_url, stop_event))
+
+    def stop_live(self) -> tuple[bool, str]:
+        """停止直播，见AsyncLiveManager.stop_live"""
+        return run_sync(self.aio.stop_live())
+
+    def update_room(self, title: str = "", area_id: int = 0) -> tuple[bool, str]:
+        """修改直播间信息，见AsyncLiveManager.update_room"""
+        return run_sync(self.aio.update_room(title, area_id))
+
+    def update_title(self, title: str) -> tuple[bool, str]:
+        """修改直播标题，见AsyncLiveManager.update_title"""
+        return run_sync(self.aio.update_title(title))
+
+    def update_area(self, area_id: int) -> tuple[bool, str]:
+        """修改直播分区，见AsyncLiveManager.update_area"""
+        return run_sync(self.aio.update_area(area_id))
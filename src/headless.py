@@ -0,0 +1,423 @@
+"""无界面模式入口
+
+用于没有终端的服务器，只使用core层，不导入Textual：
+- start / stop: 开播、下播，开播前可以同时修改标题和分区
+- update: 修改标题、分区
+- danmaku: 连接直播间弹幕，把弹幕和礼物以NDJSON（每行一个JSON）写入标准输出或文件，
+  按字节数和时间间隔批量写入，收到SIGINT/SIGTERM时写完缓冲区后退出，连接异常结束时退出码为1
+
+每个命令的结果也以一行JSON写入标准输出（type为result），失败时退出码为1。
+日志写入标准错误。需要先用界面版登录生成config.json。
+
+命令行::
+
+    python -m src.headless start --title "标题" --area 英雄联盟
+    python -m src.headless update --area 86
+    python -m src.headless stop
+    python -m src.headless danmaku --output danmaku.ndjson --flush-interval 2
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from pathlib import Path
+from typing import Any, BinaryIO, Optional
+
+from .core.config import ConfigManager
+from .core.danmaku_fetcher import DEFAULT_DANMAKU_ENDPOINTS, DanmakuClient, DanmakuEndpoints
+from .core.danmaku_handler import BaseHandler
+from .core.danmaku_models import DanmakuMessage, GiftMessage
+from .core.http_cache import get_http_cache
+from .core.http_session import close_http_session, get_http_session, update_http_cookies
+from .core.live import AsyncLiveManager
+from .utils.json_codec import json_dumps
+
+logger = logging.getLogger(__name__)
+
+__all__ = (
+    "NdjsonWriter",
+    "NdjsonHandler",
+    "stream_danmaku",
+    "main",
+)
+
+# 缓冲区超过该字节数时立即写入
+DEFAULT_FLUSH_BYTES = 64 * 1024
+# 缓冲区定时写入的间隔（秒）
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class NdjsonWriter:
+    """NDJSON输出
+
+    事件先编码进内存缓冲区，超过flush_bytes字节或调用flush()时才写入输出流，
+    弹幕量大时避免每条消息一次系统调用。
+
+    :param stream: 二进制输出流
+    :param flush_bytes: 缓冲区超过该字节数时立即写入
+    """
+
+    def __init__(self, stream: BinaryIO, flush_bytes: int = DEFAULT_FLUSH_BYTES):
+        self._stream = stream
+        self._flush_bytes = flush_bytes
+        self._buffer = bytearray()
+
+    def write(self, event: dict[str, Any]):
+        """写入一个事件"""
+        self._buffer += json_dumps(event)
+        self._buffer += b"\n"
+        if len(self._buffer) >= self._flush_bytes:
+            self.flush()
+
+    def flush(self):
+        """写入缓冲区中的所有事件"""
+        if self._buffer:
+            self._stream.write(self._buffer)
+            self._buffer.clear()
+        self._stream.flush()
+
+
+def danmaku_event(room_id: int, message: DanmakuMessage) -> dict[str, Any]:
+    """弹幕消息转换为输出的事件"""
+    return {
+        "type": "danmaku",
+        "room_id": room_id,
+        "ts": message.timestamp / 1000,
+        "uid": message.uid,
+        "uname": message.uname,
+        "msg": message.msg,
+        "medal_name": message.medal_name,
+        "medal_level": message.medal_level,
+        "user_level": message.user_level,
+        "admin": message.admin,
+        "privilege_type": message.privilege_type,
+    }
+
+
+def gift_event(room_id: int, message: GiftMessage) -> dict[str, Any]:
+    """礼物消息转换为输出的事件"""
+    return {
+        "type": "gift",
+        "room_id": room_id,
+        "ts": message.time.timestamp(),
+        "uid": message.uid,
+        "uname": message.uname,
+        "gift_id": message.gift_id,
+        "gift_name": message.gift_name,
+        "num": message.num,
+    }
+
+
+class NdjsonHandler(BaseHandler):
+    """把弹幕和礼物写入NdjsonWriter的处理器"""
+
+    def __init__(self, writer: NdjsonWriter):
+        self._writer = writer
+        self.exception: Optional[Exception] = None
+        """客户端异常停止时的异常"""
+
+    def _on_danmaku(self, client: DanmakuClient, message: DanmakuMessage):
+        self._writer.write(danmaku_event(client.room_id, message))
+
+    def _on_gift(self, client: DanmakuClient, message: GiftMessage):
+        self._writer.write(gift_event(client.room_id, message))
+
+    def on_client_stopped(self, client: DanmakuClient, exception: Optional[Exception]):
+        self.exception = exception
+
+
+def _emit(event: dict[str, Any]):
+    """向标准输出写入一行JSON并立即刷新"""
+    sys.stdout.buffer.write(json_dumps(event) + b"\n")
+    sys.stdout.buffer.flush()
+
+
+def _emit_result(command: str, ok: bool, message: str, **extra: Any) -> int:
+    """输出命令结果，返回退出码"""
+    _emit({"type": "result", "command": command, "ok": ok, "message": message, **extra})
+    return 0 if ok else 1
+
+
+def _install_stop_signals(stop_event: asyncio.Event):
+    """SIGINT/SIGTERM时设置stop_event"""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows的事件循环不支持，SIGINT仍然以KeyboardInterrupt结束
+            pass
+
+
+# ===== 直播操作 =====
+
+
+async def _resolve_area(
+    config_manager: ConfigManager, live: AsyncLiveManager, area: str
+) -> int:
+    """分区参数转换为分区ID，支持ID和名称，无效时返回0"""
+    if not config_manager.config.area_list:
+        await live.fetch_area_list()
+    if area.isdigit():
+        area_id = int(area)
+        return area_id if config_manager.is_valid_area_id(area_id) else 0
+    return config_manager.get_area_id_by_name(area)
+
+
+async def _update_room(
+    config_manager: ConfigManager,
+    live: AsyncLiveManager,
+    title: Optional[str],
+    area: Optional[str],
+) -> tuple[bool, str]:
+    """修改标题和分区，未指定的项保持当前设置
+
+    先获取直播间信息（当前的标题和分区以服务器为准）和分区列表（校验分区ID需要），
+    只有config.json、没有缓存文件时也可以只修改其中一项。
+    """
+    await asyncio.gather(
+        live.fetch_room_info(),
+        live.fetch_area_list() if not config_manager.config.area_list else asyncio.sleep(0),
+    )
+    area_id = config_manager.config.area_id
+    if area is not None:
+        area_id = await _resolve_area(config_manager, live, area)
+        if area_id <= 0:
+            return False, f"找不到分区: {area}"
+    if title is None:
+        title = config_manager.config.title
+    return await live.update_room(title=title, area_id=area_id)
+
+
+async def _cmd_start(
+    args: argparse.Namespace, config_manager: ConfigManager, live: AsyncLiveManager
+) -> int:
+    if args.title is not None or args.area is not None:
+        success, message = await _update_room(config_manager, live, args.title, args.area)
+        if not success:
+            return _emit_result("start", False, message)
+
+    success, message, need_face_auth, qr_url = await live.start_live()
+    if not success and need_face_auth and qr_url:
+        # 扫码人脸验证，验证成功后重新开播
+        _emit({"type": "face_auth", "qr_url": qr_url, "message": message})
+        stop_event = asyncio.Event()
+        _install_stop_signals(stop_event)
+        if await live.check_face_auth(qr_url, stop_event):
+            success, message, _, _ = await live.start_live()
+        else:
+            message = "人脸验证未完成"
+
+    if not success:
+        return _emit_result("start", False, message)
+
+    stream_info = config_manager.get_stream_info()
+    rtmp_addr, rtmp_code = stream_info if stream_info else ("", "")
+    return _emit_result("start", True, message, rtmp_addr=rtmp_addr, rtmp_code=rtmp_code)
+
+
+async def _cmd_stop(
+    args: argparse.Namespace, config_manager: ConfigManager, live: AsyncLiveManager
+) -> int:
+    success, message = await live.stop_live()
+    return _emit_result("stop", success, message)
+
+
+async def _cmd_update(
+    args: argparse.Namespace, config_manager: ConfigManager, live: AsyncLiveManager
+) -> int:
+    if args.title is None and args.area is None:
+        return _emit_result("update", False, "需要指定--title或--area")
+    success, message = await _update_room(config_manager, live, args.title, args.area)
+    return _emit_result(
+        "update",
+        success,
+        message,
+        title=config_manager.config.title,
+        area_id=config_manager.config.area_id,
+    )
+
+
+# ===== 弹幕输出 =====
+
+
+async def stream_danmaku(
+    room_id: int,
+    writer: NdjsonWriter,
+    *,
+    uid: Optional[int] = None,
+    cookies: Optional[dict] = None,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    duration: Optional[float] = None,
+    stop_event: Optional[asyncio.Event] = None,
+    endpoints: DanmakuEndpoints = DEFAULT_DANMAKU_ENDPOINTS,
+) -> Optional[Exception]:
+    """连接直播间弹幕，把消息写入writer，直到stop_event被设置、超过duration或连接结束
+
+    :param room_id: 房间ID
+    :param writer: 输出
+    :param uid: 登录用户ID，None表示自动获取
+    :param cookies: 登录cookies，写入共享会话
+    :param flush_interval: 缓冲区定时写入的间隔（秒）
+    :param duration: 最长运行时间（秒），None表示不限制
+    :param stop_event: 停止事件
+    :param endpoints: 客户端访问的地址，连接本地模拟服务器时替换
+    :return: 连接异常结束时的异常，正常停止为None
+    """
+    loop = asyncio.get_running_loop()
+    if stop_event is None:
+        stop_event = asyncio.Event()
+    deadline = loop.time() + duration if duration is not None else None
+
+    session = get_http_session()
+    if cookies:
+        update_http_cookies(session, cookies)
+
+    client = DanmakuClient(
+        room_id,
+        uid=uid,
+        session=session,
+        endpoints=endpoints,
+        http_cache=get_http_cache(),
+    )
+    handler = NdjsonHandler(writer)
+    client.set_handler(handler)
+    client.start()
+    writer.write({"type": "started", "room_id": room_id})
+    writer.flush()
+
+    try:
+        while client.is_running and not stop_event.is_set():
+            timeout = flush_interval
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                timeout = min(timeout, remaining)
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            writer.flush()
+    finally:
+        await client.stop_and_close()
+        error = str(handler.exception) if handler.exception is not None else None
+        writer.write({"type": "stopped", "room_id": room_id, "error": error})
+        writer.flush()
+    return handler.exception
+
+
+async def _cmd_danmaku(
+    args: argparse.Namespace, config_manager: ConfigManager, live: AsyncLiveManager
+) -> int:
+    config = config_manager.config
+    room_id = args.room or config.room_id
+    if room_id <= 0:
+        return _emit_result("danmaku", False, "需要指定--room或先登录")
+
+    stop_event = asyncio.Event()
+    _install_stop_signals(stop_event)
+
+    stream = open(args.output, "ab") if args.output else sys.stdout.buffer
+    try:
+        writer = NdjsonWriter(stream, args.flush_bytes)
+        exception = await stream_danmaku(
+            room_id,
+            writer,
+            uid=config.user_id if config.user_id > 0 else None,
+            cookies=config.cookies,
+            flush_interval=args.flush_interval,
+            duration=args.duration,
+            stop_event=stop_event,
+        )
+    finally:
+        if stream is not sys.stdout.buffer:
+            stream.close()
+    # 连接异常结束时返回非0，便于进程管理器重启
+    return 0 if exception is None else 1
+
+
+_COMMANDS = {
+    "start": _cmd_start,
+    "stop": _cmd_stop,
+    "update": _cmd_update,
+    "danmaku": _cmd_danmaku,
+}
+
+
+async def _run(args: argparse.Namespace) -> int:
+    config_manager = ConfigManager(args.config) if args.config else ConfigManager()
+    if not config_manager.load() or not config_manager.config.is_logged_in():
+        if args.command != "danmaku" or not args.room:
+            return _emit_result(args.command, False, "未登录，请先在界面版中扫码登录")
+
+    live = AsyncLiveManager(config_manager)
+    try:
+        return await _COMMANDS[args.command](args, config_manager, live)
+    finally:
+        await close_http_session()
+        await config_manager.save_async()
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.headless", description="B站直播工具无界面模式"
+    )
+    parser.add_argument("--config", type=Path, help="配置文件路径，默认config.json")
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        help="写入标准错误的日志级别",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    start = subparsers.add_parser("start", help="开播")
+    start.add_argument("--title", help="开播前修改标题")
+    start.add_argument("--area", help="开播前修改分区（ID或名称）")
+
+    subparsers.add_parser("stop", help="下播")
+
+    update = subparsers.add_parser("update", help="修改标题、分区")
+    update.add_argument("--title", help="新标题")
+    update.add_argument("--area", help="新分区（ID或名称）")
+
+    danmaku = subparsers.add_parser("danmaku", help="输出弹幕和礼物（NDJSON）")
+    danmaku.add_argument("--room", type=int, default=0, help="房间ID，默认自己的直播间")
+    danmaku.add_argument("--output", type=Path, help="追加写入的文件，默认标准输出")
+    danmaku.add_argument(
+        "--flush-interval",
+        type=float,
+        default=DEFAULT_FLUSH_INTERVAL,
+        help="定时写入的间隔（秒）",
+    )
+    danmaku.add_argument(
+        "--flush-bytes",
+        type=int,
+        default=DEFAULT_FLUSH_BYTES,
+        help="缓冲区超过该字节数时立即写入",
+    )
+    danmaku.add_argument("--duration", type=float, help="运行的秒数，默认直到收到停止信号")
+    return parser
+
+
+def main():
+    """无界面模式入口"""
+    args = _build_parser().parse_args()
+    logging.basicConfig(
+        level=args.log_level,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%H:%M:%S",
+        stream=sys.stderr,
+    )
+    try:
+        exit_code = asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        exit_code = 130
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
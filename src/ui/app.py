@@ -1,10 +1,13 @@
 """Textual App主类
 
 定义BiliLiveApp主类和全局状态管理。
+
+弹幕服务、二维码界面在第一次使用时才导入，加快启动到首次绘制的速度。
 """
 
+import asyncio
 import logging
-import threading
+from typing import TYPE_CHECKING
 
 from textual.app import App
 from textual.binding import Binding
@@ -13,13 +16,23 @@ from textual.reactive import reactive
 
 from ..core.auth import AuthManager
 from ..core.config import ConfigManager
+from ..core.danmaku_metrics import PipelineMetrics
+from ..core.http_session import close_http_session
 from ..core.live import LiveManager
-from ..utils.constants import VERSION_STR, AppState, KeyBindings, Messages
+from ..utils.constants import (
+    DANMAKU_METRICS_FILE,
+    VERSION_STR,
+    AppState,
+    KeyBindings,
+    Messages,
+)
 from .layout.header import Header
 from .layout.main_panel import MainPanel
 from .layout.sidebar import Sidebar
 from .layout.status_bar import StatusBar
-from .screen.qr_display_screen import QRDisplayScreen
+
+if TYPE_CHECKING:
+    from ..core.danmaku_service import DanmakuService
 
 
 class BiliLiveApp(App):
@@ -49,6 +62,7 @@ class BiliLiveApp(App):
     # 快捷键绑定
     BINDINGS = [
         Binding(KeyBindings.QUIT, "quit_action", "退出"),
+        Binding(KeyBindings.EXPORT_METRICS, "export_danmaku_metrics", "导出弹幕延迟", show=False),
     ]
 
     def __init__(self):
@@ -64,6 +78,10 @@ class BiliLiveApp(App):
         self.config_manager = ConfigManager()
         self.auth_manager = AuthManager(self.config_manager)
         self.live_manager = LiveManager(self.config_manager)
+        # 弹幕各阶段的延迟统计（所有弹幕连接共用）
+        self.danmaku_metrics = PipelineMetrics()
+        # 弹幕后台服务（登录后启动，面板只订阅）
+        self.danmaku_service: "DanmakuService | None" = None
 
     def compose(self):
         """组合UI组件"""
@@ -80,10 +98,8 @@ class BiliLiveApp(App):
     def _check_initial_state(self):
         """检查初始登录状态
 
-        1. 尝试加载配置
-        2. 如果能读取，检查cookie是否过期
-        3. 从服务器获取真实直播状态
-        4. 设置全局状态并显示相应提示
+        1. 加载配置，按配置中保存的登录态和直播状态立即显示界面
+        2. 在后台同时验证登录态、获取分区列表和直播间信息，完成后再修正状态
         """
         # 尝试加载配置
         load_success = self.config_manager.load()
@@ -94,26 +110,58 @@ class BiliLiveApp(App):
             self.show_notification("配置文件不存在，请先登录")
             return
 
-        # 配置加载成功，检查登录态
-        if self.auth_manager.check_auth():
-            # 获取分区列表（如果为空）
-            if not self.config_manager.config.area_list:
-                self.live_manager.fetch_area_list()
+        if not self.config_manager.config.is_logged_in():
+            self.app_state = AppState.UNAUTH
+            self.show_notification("未登录，请先登录")
+            return
 
-            # 从本地配置获取直播状态（DashboardPanel挂载时会从服务器获取）
-            live_status = self.config_manager.config.live_status
-            if live_status == 1:
-                self.app_state = AppState.LIVE
-            else:
-                self.app_state = AppState.IDLE
-        else:
+        # 先按本地配置显示，不等待网络请求
+        self.app_state = self._live_status_to_state(self.config_manager.config.live_status)
+        self.run_worker(self._reconcile_initial_state(), group="startup")
+
+    @staticmethod
+    def _live_status_to_state(live_status: int) -> AppState:
+        return AppState.LIVE if live_status == 1 else AppState.IDLE
+
+    async def _reconcile_initial_state(self):
+        """同时验证登录态、获取分区列表（如果为空）和直播间信息，按结果修正状态"""
+        initial_state = self.app_state
+        need_area_list = not self.config_manager.config.area_list
+
+        auth_valid, _, room_info = await asyncio.gather(
+            self.auth_manager.aio.check_auth(),
+            self.live_manager.aio.fetch_area_list() if need_area_list else asyncio.sleep(0),
+            self.live_manager.aio.fetch_room_info(),
+        )
+
+        if self.app_state != initial_state:
+            # 验证期间已经开播、下播或退出登录，以用户操作后的状态为准
+            return
+
+        if not auth_valid:
             # 登录态过期
             self.app_state = AppState.UNAUTH
-            self.config_manager.clear()
+            self.auth_manager.logout()
             self.show_notification("登录已过期，请重新登录")
+            return
+
+        # 以服务器的直播状态为准（获取失败时保持本地配置的状态）
+        if room_info is not None:
+            self.app_state = self._live_status_to_state(room_info.live_status)
+        # 状态不变时watch_app_state不会再次调用，本地配置没有房间ID时在这里启动弹幕服务
+        self._start_danmaku_service()
 
     def watch_app_state(self, state: AppState):
         """监听状态变化，更新UI"""
+        # 弹幕服务随登录状态启停，先于面板切换，面板挂载时可以直接订阅
+        if state == AppState.UNAUTH:
+            self._stop_danmaku_service()
+        elif self.config_manager.config.room_id > 0:
+            self._start_danmaku_service()
+        else:
+            # 登录后还没有房间ID（获取失败等），获取后再启动
+            self.run_worker(self._resolve_room_and_start_danmaku(), group="danmaku", exclusive=True)
+
         try:
             # 更新主面板内容
             main_panel = self.query_one(MainPanel)
@@ -157,14 +205,29 @@ class BiliLiveApp(App):
         # 配置在on_unmount中统一保存，这里不重复保存
         self.exit()
 
-    def on_unmount(self):
+    def action_export_danmaku_metrics(self):
+        """导出弹幕延迟统计"""
+        try:
+            self.danmaku_metrics.export_json(DANMAKU_METRICS_FILE)
+            logging.info("弹幕延迟统计:\n%s", self.danmaku_metrics.summary())
+            self.show_notification(f"弹幕延迟统计已导出到 {DANMAKU_METRICS_FILE}")
+        except Exception as e:
+            self.show_notification(f"导出弹幕延迟统计失败: {e}")
+
+    async def on_unmount(self):
         """应用卸载时的清理"""
         # 停止登录流程
         self._stop_auth_worker()
         # 关闭二维码界面（这会触发人脸识别流程的回调）
         self.close_qr()
-        # 统一在这里保存配置（无论是正常退出还是异常退出）
-        self.config_manager.save()
+        # 统一在这里保存配置（无论是正常退出还是异常退出），在线程中写入不阻塞界面
+        await self.config_manager.save_async()
+        # 停止弹幕服务（归档会写完缓冲区）
+        service, self.danmaku_service = self.danmaku_service, None
+        if service is not None:
+            await service.stop_and_close()
+        # 关闭共享的HTTP会话
+        await close_http_session()
 
     def _stop_auth_worker(self):
         """停止登录worker"""
@@ -176,6 +239,58 @@ class BiliLiveApp(App):
         except Exception:
             pass
 
+    # ===== 弹幕服务 =====
+
+    def _start_danmaku_service(self):
+        """启动弹幕后台服务（已启动、未登录或没有房间ID时不处理）
+
+        可以重复调用，直播间信息更新后调用以便在获得房间ID后启动。
+        """
+        if self.danmaku_service is not None or self.app_state == AppState.UNAUTH:
+            return
+        config = self.config_manager.config
+        if config.room_id <= 0:
+            return
+
+        try:
+            from ..core.danmaku_archive import DEFAULT_ARCHIVE_DIR
+            from ..core.danmaku_service import DanmakuService
+
+            self.danmaku_service = DanmakuService(
+                config.room_id,
+                uid=config.user_id or None,
+                cookies=config.cookies,
+                # 归档默认关闭，在config.json的danmaku.archive中开启
+                archive_dir=DEFAULT_ARCHIVE_DIR if config.danmaku_archive else None,
+                metrics=self.danmaku_metrics,
+            )
+            self.danmaku_service.start()
+        except Exception as e:
+            self.danmaku_service = None
+            self.show_notification(f"弹幕连接失败: {e}")
+            return
+
+        # 服务启动前已经创建的弹幕面板在这里订阅
+        try:
+            danmaku_panel = self.query_one(MainPanel).get_panel("danmu")
+        except Exception:
+            danmaku_panel = None
+        if danmaku_panel is not None:
+            danmaku_panel.subscribe_service()
+
+    async def _resolve_room_and_start_danmaku(self):
+        """获取直播间ID后启动弹幕服务"""
+        config = self.config_manager.config
+        if config.room_id <= 0 and config.user_id > 0:
+            await self.live_manager.aio.fetch_room_id(config.user_id)
+        self._start_danmaku_service()
+
+    def _stop_danmaku_service(self):
+        """停止弹幕后台服务"""
+        service, self.danmaku_service = self.danmaku_service, None
+        if service is not None:
+            self.run_worker(service.stop_and_close())
+
     # ===== 面板切换 =====
 
     def show_info_panel(self):
@@ -229,6 +344,8 @@ class BiliLiveApp(App):
             # 先关闭已存在的二维码面板
             self.close_qr()
             # 挂载新的二维码面板
+            from .screen.qr_display_screen import QRDisplayScreen
+
             screen = QRDisplayScreen(qr_url, title)
             self.push_screen(screen, callback=callback)
             return screen
@@ -262,104 +379,103 @@ class BiliLiveApp(App):
                 self.show_notification(Messages.MISSING_INFO)
                 return
             # 执行开播
-            self._start_live()
+            self.run_worker(self._start_live(), exclusive=True, group="live")
         elif self.app_state == AppState.LIVE:
             # 执行下播
-            self._stop_live()
+            self.run_worker(self._stop_live(), exclusive=True, group="live")
 
-    def _start_live(self):
+    async def _start_live(self):
         """执行开播操作"""
         self.is_loading = True
 
         try:
             # 调用核心层开播
-            success, message, need_face_auth, qr_url = self.live_manager.start_live()
+            success, message, need_face_auth, qr_url = (
+                await self.live_manager.aio.start_live()
+            )
 
             if success:
                 # 开播成功，重新获取直播间信息并更新UI
-                self._refresh_room_info_after_start()
+                self.run_worker(self._refresh_room_info())
                 self.app_state = AppState.LIVE
             elif need_face_auth and self.qr_status and qr_url:
-                # 需要人脸识别且二维码URL有效
-                self._do_face_auth(qr_url)
+                # 需要人脸识别且二维码URL有效，识别成功后重新开播
                 self.qr_status = False
-                # 回到主线程重新开播
-                self.call_from_thread(self._start_live)
-                self.qr_status = True
+                try:
+                    if await self._do_face_auth(qr_url):
+                        await self._start_live()
+                finally:
+                    self.qr_status = True
         except Exception as e:
             self.status_message = f"开播异常: {e}"
         finally:
             self.is_loading = False
 
-    def _refresh_room_info_after_start(self):
-        """开播成功后刷新直播间信息"""
-
-        def refresh():
-            try:
-                # 重新获取直播间信息
-                self.live_manager.fetch_room_info()
-                # 通知DashboardPanel刷新显示
-                from .panels.dashboard_panel import DashboardPanel
+    async def _refresh_room_info(self):
+        """开播、下播成功后刷新直播间信息"""
+        try:
+            from .panels.dashboard_panel import DashboardPanel
 
-                dashboard = self.query_one(DashboardPanel)
-                if dashboard:
-                    dashboard.run_worker(dashboard._fetch_and_update, thread=True)
-            except Exception:
-                pass
+            dashboard = self.query(DashboardPanel).first()
+        except Exception:
+            dashboard = None
 
-        # 在后台线程执行
-        threading.Thread(target=refresh, daemon=True).start()
+        try:
+            if dashboard is not None:
+                # DashboardPanel会重新获取直播间信息并刷新显示
+                await dashboard._fetch_and_update()
+            else:
+                await self.live_manager.aio.fetch_room_info()
+        except Exception:
+            pass
+        self._start_danmaku_service()
 
-    def _do_face_auth(self, qr_url: str):
+    async def _do_face_auth(self, qr_url: str) -> bool:
         """执行人脸识别流程
 
         Args:
             qr_url: 人脸识别二维码URL
+
+        Returns:
+            bool: 人脸识别是否成功
         """
 
         # 创建停止事件
-        stop_event = threading.Event()
-        face_success_result = [False]  # 使用列表来存储结果，避免nonlocal问题
+        stop_event = asyncio.Event()
+        face_success = False
 
         def on_qr_closed(success: bool):
             """二维码关闭回调 - 只在用户主动关闭时停止流程"""
-            if not success and not face_success_result[0]:
+            if not success and not face_success:
                 # 用户主动关闭且人脸验证未成功，停止人脸识别流程
                 stop_event.set()
 
         # 显示二维码
         self.show_qr(qr_url, "人脸识别", callback=on_qr_closed)
 
-        # 在后台线程中检查人脸识别状态
-        def check_face_auth_worker():
-            face_success = self.live_manager.check_face_auth(qr_url, stop_event)
-            face_success_result[0] = face_success
+        try:
+            face_success = await self.live_manager.aio.check_face_auth(qr_url, stop_event)
+        finally:
+            if not face_success and not stop_event.is_set():
+                # 不是用户主动取消，显示失败信息
+                self.status_message = "人脸识别失败或超时"
+            # 关闭二维码（成功时会触发on_qr_closed(True)，但不会停止流程）
+            self.close_qr()
+
+        return face_success
 
-            if face_success:
-                # 人脸识别成功，关闭二维码（会触发on_qr_closed(True)，但不会停止流程）
-                self.call_from_thread(self.close_qr)
-            else:
-                # 人脸识别失败或取消
-                if not stop_event.is_set():
-                    # 不是用户主动取消，显示失败信息
-                    self.call_from_thread(
-                        lambda: setattr(self, "status_message", "人脸识别失败或超时")
-                    )
-                self.call_from_thread(self.close_qr)
-
-        # 启动后台线程
-        threading.Thread(target=check_face_auth_worker, daemon=True).start()
-
-    def _stop_live(self):
+    async def _stop_live(self):
         """执行下播操作"""
         self.is_loading = True
         self.status_message = "正在下播..."
 
         try:
-            success, message = self.live_manager.stop_live()
+            success, message = await self.live_manager.aio.stop_live()
             if success:
                 self.app_state = AppState.IDLE
                 self.status_message = "下播成功"
+                # 面板不再随状态重建，需要主动刷新直播间信息
+                self.run_worker(self._refresh_room_info())
             else:
                 self.status_message = f"下播失败: {message}"
         except Exception as e:
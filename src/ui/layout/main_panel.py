@@ -1,33 +1,69 @@
 """中央内容区容器
 
 根据应用状态动态切换显示内容。
+面板创建后会一直保留，切换时只切换显示，隐藏的面板保留状态和连接。
+面板模块在第一次显示时才导入。
 """
 
+from importlib import import_module
+
+from textual.widget import Widget
 from textual.widgets import Static
 from textual.containers import Container
 from textual.app import ComposeResult
 
 from ...utils.constants import AppState
-from ..panels.auth_panel import AuthPanel
-from ..panels.dashboard_panel import DashboardPanel
-from ..panels.settings_panel import SettingsPanel
-from ..panels.help_panel import HelpPanel
-from ..panels.danmaku_panel import DanmakuPanel
+
+# 面板key -> (模块, 面板类名)
+PANEL_FACTORIES: dict[str, tuple[str, str]] = {
+    "auth": ("..panels.auth_panel", "AuthPanel"),
+    "info": ("..panels.dashboard_panel", "DashboardPanel"),
+    "manage": ("..panels.settings_panel", "SettingsPanel"),
+    "danmu": ("..panels.danmaku_panel", "DanmakuPanel"),
+    "help": ("..panels.help_panel", "HelpPanel"),
+}
+
+# 需要登录的面板，退出登录时销毁（断开弹幕连接等）
+AUTH_REQUIRED_PANELS = ("info", "manage", "danmu")
 
 
 class MainPanel(Container):
     """中央内容区容器
 
     根据全局状态和当前选中的面板自动切换显示内容。
+
+    面板第一次显示时创建并挂载，之后切换只修改display。
+    面板可以实现以下方法，在切换时被调用（第一次显示时由on_mount处理，不会调用）：
+    - on_panel_shown(): 隐藏后重新显示
+    - on_panel_hidden(): 被切换隐藏，可以暂停渲染和定时器
     """
 
     def __init__(self):
         super().__init__()
+        self._panels: dict[str, Widget] = {}
+        """已创建的面板"""
+        self._current_key: str | None = None
+        """当前显示的面板key"""
 
     def compose(self) -> ComposeResult:
         """初始显示"""
         yield Static("正在初始化...", id="loading-text")
 
+    @staticmethod
+    def _resolve_panel_key(state: AppState, panel: str) -> str:
+        """根据状态和选中的面板确定要显示的面板"""
+        if panel in AUTH_REQUIRED_PANELS and state == AppState.UNAUTH:
+            return "auth"
+        return panel
+
+    def get_panel(self, key: str) -> Widget | None:
+        """获取已创建的面板
+
+        Args:
+            key: 面板key ("auth", "info", "manage", "danmu", "help")
+        """
+        return self._panels.get(key)
+
     def update_for_state(self, state: AppState, panel: str):
         """根据状态和面板更新内容
 
@@ -35,33 +71,55 @@ class MainPanel(Container):
             state: 当前应用状态
             panel: 当前选中的面板 ("info", "manage", "danmu", "help")
         """
-        # 清除当前内容
-        for child in list(self.children):
-            child.remove()
+        # 移除初始化提示和上次的错误信息
+        for stale in self.query("#loading-text, .panel-error"):
+            stale.remove()
+
+        # 退出登录时销毁需要登录的面板
+        if state == AppState.UNAUTH:
+            for key in AUTH_REQUIRED_PANELS:
+                stale = self._panels.pop(key, None)
+                if stale is not None:
+                    stale.remove()
+                    if self._current_key == key:
+                        self._current_key = None
+
+        key = self._resolve_panel_key(state, panel)
+        if key == self._current_key or key not in PANEL_FACTORIES:
+            return
+
+        # 隐藏当前面板
+        previous = self._panels.get(self._current_key) if self._current_key else None
+        if previous is not None:
+            previous.display = False
+            self._call_panel_hook(previous, "on_panel_hidden")
+        self._current_key = key
+
+        # 显示目标面板，没有则创建
+        target = self._panels.get(key)
+        if target is not None:
+            target.display = True
+            self._call_panel_hook(target, "on_panel_shown")
+            return
 
-        # 根据状态和面板挂载不同的面板
         try:
-            if panel == "info":
-                # 信息面板
-                if state == AppState.UNAUTH:
-                    self.mount(AuthPanel())
-                else:
-                    self.mount(DashboardPanel())
-            elif panel == "manage":
-                # 管理面板
-                if state == AppState.UNAUTH:
-                    self.mount(AuthPanel())
-                else:
-                    self.mount(SettingsPanel())
-            elif panel == "danmu":
-                # 弹幕面板 - 需要登录
-                if state == AppState.UNAUTH:
-                    self.mount(AuthPanel())
-                else:
-                    self.mount(DanmakuPanel())
-            elif panel == "help":
-                # 帮助面板 - 始终显示
-                self.mount(HelpPanel())
+            target = self._panels[key] = self._create_panel(key)
+            self.mount(target)
         except Exception as e:
             # 如果面板加载失败，显示错误信息
-            self.mount(Static(f"加载面板失败: {e}"))
+            self._panels.pop(key, None)
+            self._current_key = None
+            self.mount(Static(f"加载面板失败: {e}", classes="panel-error"))
+
+    @staticmethod
+    def _create_panel(key: str) -> Widget:
+        """导入并创建面板"""
+        module_name, class_name = PANEL_FACTORIES[key]
+        panel_class = getattr(import_module(module_name, __package__), class_name)
+        return panel_class()
+
+    @staticmethod
+    def _call_panel_hook(panel: Widget, name: str):
+        hook = getattr(panel, name, None)
+        if hook is not None:
+            hook()
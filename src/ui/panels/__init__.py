@@ -1,12 +1,35 @@
 """面板组件 - 核心功能面板
 
 包含登录面板、控制台面板、推流面板、设置面板、弹幕面板等。
+面板类在第一次访问时才导入所在模块。
 """
 
-from .auth_panel import AuthPanel
-from .dashboard_panel import DashboardPanel
-from .help_panel import HelpPanel
-from .settings_panel import SettingsPanel
-from .danmaku_panel import DanmakuPanel
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .auth_panel import AuthPanel
+    from .dashboard_panel import DashboardPanel
+    from .help_panel import HelpPanel
+    from .settings_panel import SettingsPanel
+    from .danmaku_panel import DanmakuPanel
+
+# 面板类名 -> 所在模块
+_EXPORTS = {
+    "AuthPanel": ".auth_panel",
+    "DashboardPanel": ".dashboard_panel",
+    "HelpPanel": ".help_panel",
+    "SettingsPanel": ".settings_panel",
+    "DanmakuPanel": ".danmaku_panel",
+}
 
 __all__ = ["AuthPanel", "DashboardPanel", "HelpPanel", "SettingsPanel", "DanmakuPanel"]
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -4,12 +4,14 @@
 二维码现在显示在顶部面板上。
 """
 
-from threading import Event
 from logging import getLogger
 
 from textual.widgets import Static, Button
 from textual.containers import Vertical
 from textual.app import ComposeResult
+from textual.worker import Worker
+
+from ...core.auth import LoginStatus
 
 # 类型声明
 from typing import TYPE_CHECKING
@@ -28,9 +30,7 @@ class AuthPanel(Vertical):
 
     def __init__(self):
         super().__init__()
-        self._polling = False
-        self._stop_event = Event()
-        self._current_qr_key = None
+        self._login_worker: Worker | None = None
 
     def compose(self) -> ComposeResult:
         with Vertical(id="login-container"):
@@ -41,86 +41,75 @@ class AuthPanel(Vertical):
     def on_button_pressed(self, event: Button.Pressed):
         """处理按钮点击"""
         if event.button.id == "login-button":
-            if not self._polling:
-                self._polling = True
+            if self._login_worker is None or self._login_worker.is_finished:
                 event.button.disabled = True
-                self._stop_event.clear()
-                self.run_worker(self._login_worker, thread=True)
+                self._login_worker = self.run_worker(self._login(), exclusive=True)
+
+    def on_panel_shown(self):
+        """面板重新显示时（退出登录后）重置为初始状态，正在登录时保持不变"""
+        if self._login_worker is not None and not self._login_worker.is_finished:
+            return
+        self._update_status("点击按钮开始登录")
+        self._enable_button()
 
     def _update_status(self, text: str):
         """更新状态文本"""
-        self.app.call_from_thread(self.query_one("#status-text", Static).update, text)
+        self.query_one("#status-text", Static).update(text)
 
     def _enable_button(self):
         """启用登录按钮"""
-
-        def _do():
-            try:
-                self.query_one("#login-button", Button).disabled = False
-            except Exception:
-                pass
-
-        self.app.call_from_thread(_do)
+        try:
+            self.query_one("#login-button", Button).disabled = False
+        except Exception:
+            pass
 
     def stop_login(self):
-        """停止登录流程"""
-        self._stop_event.set()
+        """停止登录流程（取消登录任务）"""
+        if self._login_worker is not None:
+            self._login_worker.cancel()
 
-    def _login_worker(self):
-        """后台登录工作线程"""
+    async def _login(self):
+        """异步登录流程"""
         app = self.app
 
         def on_qr_closed(success: bool):
             """二维码关闭回调"""
             if not success:
                 # 用户主动关闭或失败，停止登录流程
-                self._stop_event.set()
+                self.stop_login()
 
         try:
             # 生成二维码
-            qr_url, qr_key = app.auth_manager.generate_qr()
-            self._current_qr_key = qr_key
+            qr_url, qr_key = await app.auth_manager.aio.generate_qr()
 
             # 显示二维码并设置关闭回调
-            def show_qr():
-                app.show_qr(qr_url, "扫码登录", callback=on_qr_closed)
-
-            app.call_from_thread(show_qr)
-
-            # 轮询登录状态
-            scanned = False
-            while not self._stop_event.is_set():
-                result = app.auth_manager.poll_login_status(qr_key)
-
-                if (
-                    result.status.name == "SUCCESS"
-                    and result.cookies
-                ):
-                    app.config_manager.update_cookies(
-                        result.cookies, result.refresh_token
-                    )
-                    app.live_manager.fetch_room_id(app.config_manager.config.user_id)
-                    app.config_manager.save()
-                    self._update_status("登录成功！")
-                    app.call_from_thread(app.on_login_success)
-                    break
-
-                if result.status.name == "EXPIRED":
-                    self._update_status("二维码已过期，请重试")
-                    break
-
-                if result.status.name == "SCANNED" and not scanned:
-                    scanned = True
-                    self._update_status("已扫描，请在手机上确认")
-
-                if self._stop_event.wait(timeout=1):
-                    break
-            app.close_qr()
+            app.show_qr(qr_url, "扫码登录", callback=on_qr_closed)
+
+            # 轮询登录状态（扫码后自动加快轮询）
+            result = await app.auth_manager.aio.wait_for_login(
+                qr_key, status_callback=self._update_status
+            )
+
+            if result.status == LoginStatus.SUCCESS and not result.cookies:
+                self._update_status("登录失败：未获取到凭证")
+            elif result.status == LoginStatus.SUCCESS:
+                app.config_manager.update_cookies(
+                    result.cookies, result.refresh_token or ""
+                )
+                await app.live_manager.aio.fetch_room_id(
+                    app.config_manager.config.user_id
+                )
+                app.config_manager.schedule_save()
+                self._update_status("登录成功！")
+                app.on_login_success()
+            elif result.status == LoginStatus.EXPIRED:
+                self._update_status("二维码已过期，请重试")
+            else:
+                self._update_status(f"登录出错: {result.message}")
 
         except Exception as e:
             self._update_status(f"登录出错: {e}")
         finally:
-            self._polling = False
-            self._current_qr_key = None
-            app.call_from_thread(app.close_qr)
+            self._login_worker = None
+            app.close_qr()
             self._enable_button()
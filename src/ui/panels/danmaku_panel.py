@@ -1,26 +1,25 @@
 """弹幕面板
 
 显示直播间弹幕列表，支持发送弹幕。
+弹幕连接由应用的DanmakuService持有，面板只订阅消息。
 """
 
-from http.cookies import SimpleCookie
+from collections import deque
 from logging import getLogger
 from typing import TYPE_CHECKING
-from requests import post
 from time import time
 
-from aiohttp import ClientSession
 from textual.widgets import Static, Input, Button
-from textual.containers import Vertical, Horizontal, ScrollableContainer
+from textual.containers import Vertical, Horizontal
 from textual.app import ComposeResult
-from textual.reactive import reactive
+from textual.timer import Timer
 
-from ...utils.constants import AppState, USER_AGENT, ApiEndpoints
+from ...utils.constants import AppState
 from ...core.danmaku_models import DanmakuMessage, GiftMessage, BaseMessage
-from ...core.danmaku_fetcher import DanmakuClient
-from ...core.danmaku_handler import UIPanelHandler
+from ..widgets.danmaku_log import DanmakuLog
 
 if TYPE_CHECKING:
+    from ...core.danmaku_service import DanmakuService
     from ..app import BiliLiveApp
 
 logger = getLogger(__name__)
@@ -29,16 +28,12 @@ logger = getLogger(__name__)
 # 配置常量
 DEFAULT_AUTO_SCROLL_LINES = 10  # 默认自动滚动范围（行数）
 DEFAULT_MAX_DANMAKU_COUNT = 500  # 默认最大弹幕数量
-
-OVERWRITE_ROOM = 0
+DEFAULT_BATCH_INTERVAL = 0.03  # 默认合并刷新间隔（秒），约一帧
 
 
 class DanmakuPanel(Vertical):
     """弹幕面板 - 显示弹幕列表和发送弹幕"""
 
-    messages: reactive[list[BaseMessage]] = reactive([])
-    room_id: int = 0
-
     @property
     def app(self) -> "BiliLiveApp":
         return super().app  # type: ignore
@@ -47,35 +42,81 @@ class DanmakuPanel(Vertical):
         self,
         auto_scroll_lines: int = DEFAULT_AUTO_SCROLL_LINES,
         max_danmaku_count: int = DEFAULT_MAX_DANMAKU_COUNT,
+        batch_interval: float = DEFAULT_BATCH_INTERVAL,
     ):
         super().__init__()
         self._auto_scroll_lines = auto_scroll_lines
         self._max_danmaku_count = max_danmaku_count
-        self._last_message_count = 0
-        self._fetcher: DanmakuClient | None = None
+        self._batch_interval = batch_interval
+        self.messages: deque[BaseMessage] = deque(maxlen=max_danmaku_count)
+        """最近的弹幕消息（环形缓冲区）"""
+        self._pending_messages: deque[BaseMessage] = deque(maxlen=max_danmaku_count)
+        """等待下一次刷新的消息，超出上限的旧消息反正会被丢弃，不再渲染"""
+        self._flush_timer: Timer | None = None
+        self._paused = False
+        """面板隐藏时暂停渲染，消息留在待刷新队列中"""
         self._placeholder_removed = False
-        self._session: ClientSession | None = None
-        self.room_id = self.app.config_manager.config.room_id if OVERWRITE_ROOM <= 0 else OVERWRITE_ROOM
+        self._service: "DanmakuService | None" = None
+        """已订阅的弹幕服务"""
 
     def compose(self) -> ComposeResult:
         with Vertical(classes="danmaku-container"):
             with Vertical(classes="danmaku-list-wrapper"):
                 yield Button("↓ 有新弹幕", id="new-danmaku-hint", classes="new-danmaku-hint hidden", variant="default")
-                with ScrollableContainer(id="danmaku-list", classes="danmaku-list"):
-                    yield Static("当前没有直播间", id="danmaku-placeholder")
+                yield Static("当前没有直播间", id="danmaku-placeholder")
+                yield DanmakuLog(
+                    self._max_danmaku_count,
+                    id="danmaku-list",
+                    classes="danmaku-list hidden",
+                )
 
             with Horizontal(classes="danmaku-input-row"):
                 yield Input(placeholder="发送弹幕...", id="danmaku-input", classes="danmaku-input")
                 yield Button("发送", id="danmaku-send", variant="primary", classes="danmaku-send-btn")
 
     def on_mount(self):
-        """组件挂载时启动弹幕获取"""
-        # 启动弹幕获取（如果已登录且有房间ID）
-        self._start_danmaku_fetch()
+        """组件挂载时订阅弹幕服务（服务还没有启动时，由应用在启动后调用subscribe_service）"""
+        self.subscribe_service()
+
+    def subscribe_service(self):
+        """订阅应用的弹幕服务，先显示服务缓存的最近消息（已订阅或服务未启动时不处理）"""
+        service = self.app.danmaku_service
+        if service is None or service is self._service:
+            return
+        if self._service is not None:
+            self._service.unsubscribe(self)
+        self._service = service
+
+        history = service.subscribe(self)
+        try:
+            self.query_one("#danmaku-placeholder", Static).update("暂无弹幕")
+        except Exception:
+            pass
+        if history:
+            self._add_messages(history, record_latency=False)
+
+    def on_panel_hidden(self):
+        """面板被切换隐藏时暂停渲染，弹幕连接保持不变"""
+        self._paused = True
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+            self._flush_timer = None
+
+    def on_panel_shown(self):
+        """面板重新显示时恢复渲染，一次写入隐藏期间收到的消息"""
+        self._paused = False
+        self.subscribe_service()
+        self._flush_pending_messages(record_latency=False)
 
     def on_unmount(self):
-        """组件卸载时停止弹幕获取"""
-        self._stop_danmaku_fetch()
+        """组件卸载时取消订阅（弹幕连接由服务保持）"""
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+            self._flush_timer = None
+        self._pending_messages.clear()
+        service, self._service = self._service, None
+        if service is not None:
+            service.unsubscribe(self)
 
     def on_button_pressed(self, event: Button.Pressed):
         if event.button.id == "danmaku-send":
@@ -83,7 +124,7 @@ class DanmakuPanel(Vertical):
         elif event.button.id == "new-danmaku-hint":
             # 点击"有新弹幕"提示，滚动到底部
             try:
-                danmaku_list = self.query_one("#danmaku-list", ScrollableContainer)
+                danmaku_list = self.query_one("#danmaku-list", DanmakuLog)
                 danmaku_list.scroll_end(animate=False)
                 # 隐藏提示
                 hint = self.query_one("#new-danmaku-hint", Button)
@@ -97,54 +138,29 @@ class DanmakuPanel(Vertical):
 
     # ===== 对外接口方法 =====
 
-    def send_message(self, content: str):
-        """添加新弹幕消息（本地发送时使用）"""
-        if not self._fetcher:
+    async def send_message(self, content: str):
+        """通过弹幕服务发送弹幕"""
+        service = self.app.danmaku_service
+        if service is None:
+            self.app.show_notification("弹幕服务未启动")
             return
-        wbi_signer = self._fetcher._wbi_signer
-        params = wbi_signer.add_wbi_sign({"web_location": 444.8})
-        data = {
-
-            "mode": 1,
-            "color": 16777215,
-            "fontsize": 16,
-            "msg": content,
-            "roomid": self.room_id,
-            "rnd": int(time()),
-            "csrf": self.app.config_manager.config.csrf,
-            "csrf_token": self.app.config_manager.config.csrf,
-        }
-        res = post(
-            url = ApiEndpoints.SEND_DANMAKU,
-            params = params,
-            data = data,
+        success, message = await service.send_danmaku(
+            content, self.app.config_manager.config.csrf
         )
-        if res.status_code == 200:
-            code = res.json().get("code")
-            msg = res.json().get("msg")
-            if code == 0:
-                logger.info(f"发送弹幕成功 code:{code} msg:{msg}")
-            else:
-                logger.error(f"发送弹幕失败 code:{code} msg:{msg}")
-        else:
-            logger.error(f"发送弹幕失败 status_code:{res.status_code}")
-
-    # ===== DanmakuHandler 回调方法 =====
+        if not success:
+            self.app.show_notification(message)
+
+    # ===== DanmakuService 订阅回调 =====
 
     def on_danmaku(self, room_id: int, message: DanmakuMessage):
         """收到弹幕消息（回调）
         
-        注意：此回调可能在异步协程中执行，需要使用 call_later 确保UI更新在主线程
+        注意：消息先进入待刷新队列，每帧合并刷新一次，避免礼物刷屏时逐条刷新阻塞事件循环
         """
-        message.live_room_id = room_id
-        self.app.call_later(self._add_message_from_fetcher, message)
+        self._queue_message(message)
     
     def on_gift(self, room_id: int, message: GiftMessage):
-        self.app.call_later(self._add_message_from_fetcher, message)
-
-    def on_connect(self, room_id: int):
-        """连接成功"""
-        logger.info(f"弹幕连接成功 [房间:{room_id}]")
+        self._queue_message(message)
 
     def on_disconnect(self, room_id: int):
         """断开连接"""
@@ -156,126 +172,43 @@ class DanmakuPanel(Vertical):
 
     # ===== 内部逻辑方法 =====
 
-    def _start_danmaku_fetch(self):
-        """启动弹幕获取"""
-        
-        # 没有房间ID则不启动
-        if self.room_id <= 0:
-            return
-        
-        async def do_start():
-            try:                
-                # 创建带cookie的session
-                if self.app.config_manager.config.cookies:
-                    cookies = SimpleCookie()
-                    cookies['SESSDATA'] = self.app.config_manager.config.cookies['SESSDATA']
-                    cookies['SESSDATA']['domain'] = 'bilibili.com'
-                    self._session = ClientSession()
-                    self._session.cookie_jar.update_cookies(cookies)
-                else:
-                    self._session = ClientSession()
-                
-                # 获取直播间信息
-                room_info = await self._fetch_room_info(self._session, self.room_id)
-                room_title = room_info.get("title", "")
-                logger.info(f"弹幕直播间信息: [{self.room_id}] {room_title}")
-                
-                # 移除占位符文字
-                try:
-                    placeholder = self.query_one("#danmaku-placeholder", Static)
-                    placeholder.update("暂无弹幕")
-                except Exception:
-                    pass
-                
-                # 创建客户端和处理器，传入带cookie的session
-                self._fetcher = DanmakuClient(self.room_id, session=self._session)
-                handler = UIPanelHandler(self)
-                self._fetcher.set_handler(handler)
-                
-                # 启动客户端（非阻塞）
-                self._fetcher.start()
-                
-            except Exception as e:
-                self.app.show_notification(f"弹幕连接失败: {e}")
-        
-        # 启动异步任务
-        self.run_worker(do_start(), exclusive=True)
-
-    def _stop_danmaku_fetch(self):
-        """停止弹幕获取"""
-        if self._fetcher:
-            # 先停止客户端
-            self._fetcher.stop()
-            # 异步关闭资源
-            self.run_worker(self._async_close_fetcher(), exclusive=True)
-    
-    async def _async_close_fetcher(self):
-        """异步关闭获取器资源"""
-        try:
-            if self._fetcher:
-                # 等待客户端完全停止
-                await self._fetcher.join()
-                # 关闭session
-                await self._fetcher.close()
-                self._fetcher = None
-            # 关闭面板持有的session
-            if self._session:
-                await self._session.close()
-                self._session = None
-        except Exception:
-            pass
+    def _queue_message(self, msg: BaseMessage):
+        """消息加入待刷新队列，没有等待中的刷新时启动定时器"""
+        self._pending_messages.append(msg)
+        if self._flush_timer is None and not self._paused:
+            self._flush_timer = self.set_timer(
+                self._batch_interval, self._flush_pending_messages
+            )
 
-    async def _fetch_room_info(self, session: ClientSession, room_id: int) -> dict:
-        """获取直播间信息"""
-        try:
-            url = f"https://api.live.bilibili.com/room/v1/Room/get_info?room_id={room_id}"
-            async with session.get(url, headers={"User-Agent": USER_AGENT}) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if data.get("code") == 0:
-                        return data.get("data", {})
-        except Exception:
-            pass
-        return {}
+    def _flush_pending_messages(self, record_latency: bool = True):
+        """一次性写入队列中的所有消息
 
-    def _add_message_from_fetcher(self, msg: BaseMessage):
-        """添加来自获取器的消息"""
+        Args:
+            record_latency: 是否记录渲染延迟（隐藏期间积压的消息不记录）
+        """
+        self._flush_timer = None
+        if not self._pending_messages:
+            return
+        messages = list(self._pending_messages)
+        self._pending_messages.clear()
+        self._add_messages(messages, record_latency)
+
+    def _add_messages(
+        self, new_messages: list[BaseMessage], record_latency: bool = True
+    ):
+        """添加来自弹幕服务的消息"""
         # 第一次收到消息时移除占位符
         if not self._placeholder_removed:
             try:
                 placeholder = self.query_one("#danmaku-placeholder", Static)
                 placeholder.remove()
+                self.query_one("#danmaku-list", DanmakuLog).remove_class("hidden")
                 self._placeholder_removed = True
             except Exception:
                 pass
         
-        self.messages.append(msg)
-        self._cleanup_messages()
-        self._incremental_refresh()
-
-    def _is_near_bottom(self, container: ScrollableContainer) -> bool:
-        """检查是否接近底部"""
-        try:
-            # 如果内容高度小于容器高度（弹幕很少），视为在底部
-            content_height = container.virtual_size.height
-            container_height = container.size.height
-            if content_height <= container_height:
-                return True
-            
-            if not container.scroll_offset:
-                return False
-
-            current_scroll = container.scroll_offset.y
-            max_scroll = max(0, content_height - container_height)
-
-            if max_scroll <= 0:
-                return True
-
-            scroll_threshold = min(container_height, self._auto_scroll_lines)
-            distance_from_bottom = max_scroll - current_scroll
-            return distance_from_bottom <= scroll_threshold
-        except Exception:
-            return False
+        self.messages.extend(new_messages)
+        self._incremental_refresh(new_messages, record_latency)
 
     def _update_hint_visibility(self, is_near_bottom: bool):
         try:
@@ -284,36 +217,44 @@ class DanmakuPanel(Vertical):
         except Exception:
             pass
 
-    def _incremental_refresh(self):
-        """增量刷新（只添加新弹幕）"""
+    def _incremental_refresh(
+        self, new_messages: list[BaseMessage], record_latency: bool = True
+    ):
+        """增量刷新（只写入新弹幕）"""
         try:
-            danmaku_list = self.query_one("#danmaku-list", ScrollableContainer)
-            was_near_bottom = self._is_near_bottom(danmaku_list)
+            danmaku_list = self.query_one("#danmaku-list", DanmakuLog)
+            was_near_bottom = danmaku_list.is_near_bottom(self._auto_scroll_lines)
 
-            current_count = len(self.messages)
-            if current_count > self._last_message_count:
-                new_messages = self.messages[self._last_message_count:]
-                for msg in new_messages:
-                    danmaku_list.mount(Static(msg.format_rich(), classes="danmaku-item"))
-                self._last_message_count = current_count
+            danmaku_list.write_many(msg.format_rich() for msg in new_messages)
+            if record_latency:
+                self._record_render_latency(new_messages)
 
-                self._update_hint_visibility(was_near_bottom)
-                if was_near_bottom:
-                    danmaku_list.scroll_end(animate=False)
+            self._update_hint_visibility(was_near_bottom)
+            if was_near_bottom:
+                danmaku_list.scroll_end(animate=False)
 
         except Exception:
             pass
 
-    def _cleanup_messages(self):
-        """清理弹幕数量"""
-        if self._last_message_count > self._max_danmaku_count:
-            self.messages = self.messages[-(self._max_danmaku_count // 2):]
-            self._last_message_count = self._max_danmaku_count // 2
-    
+    def _record_render_latency(self, new_messages: list[BaseMessage]):
+        """记录收到帧到写入列表、服务器发出到写入列表的耗时"""
+        metrics = self.app.danmaku_metrics
+        now = time()
+        for msg in new_messages:
+            if not isinstance(msg, DanmakuMessage) or not msg.received_at:
+                continue
+            metrics.render.record(now - msg.received_at)
+            if msg.timestamp:
+                metrics.end_to_end.record(now - msg.timestamp / 1000)
+
     def _clear_messages(self):
         """清理弹幕"""
         self.messages.clear()
-        self._last_message_count = 0
+        self._pending_messages.clear()
+        try:
+            self.query_one("#danmaku-list", DanmakuLog).clear()
+        except Exception:
+            pass
 
     def _send_danmaku(self):
         """发送弹幕"""
@@ -328,5 +269,5 @@ class DanmakuPanel(Vertical):
             self.app.show_notification("请先登录")
             return
 
-        self.send_message(content)
+        self.run_worker(self.send_message(content))
         input_widget.value = ""
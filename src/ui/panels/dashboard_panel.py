@@ -73,11 +73,22 @@ class DashboardPanel(Vertical):
     def on_mount(self):
         """组件挂载时更新信息"""
         self._update_from_config()
-        # DashboardPanel 初始化时获取一次直播间信息
-        self.run_worker(self._fetch_and_update, thread=True)
+        # DashboardPanel 初始化时获取一次直播间信息（缓存未过期时不发起请求）
+        self.run_worker(self._fetch_and_update())
         # 启动5分钟定时刷新
         self._start_refresh_timer()
 
+    def on_panel_hidden(self):
+        """面板被切换隐藏时停止计时器"""
+        self._stop_duration_timer()
+        self._stop_refresh_timer()
+
+    def on_panel_shown(self):
+        """面板重新显示时恢复计时器，直播间信息优先使用缓存"""
+        self._update_from_config()
+        self.run_worker(self._fetch_and_update(), exclusive=True)
+        self._start_refresh_timer()
+
     def on_unmount(self):
         """组件卸载时清理计时器"""
         self._stop_duration_timer()
@@ -110,7 +121,7 @@ class DashboardPanel(Vertical):
         """定时刷新直播间信息"""
         # 只在已登录状态下刷新
         if self.app.app_state.value in [1, 2]:  # IDLE or LIVE
-            self.run_worker(self._fetch_and_update, thread=True, exclusive=True)
+            self.run_worker(self._fetch_and_update(force=True), exclusive=True)
 
     def _parse_start_time(self, live_time_str: str) -> datetime | None:
         """解析开播时间点字符串
@@ -229,47 +240,42 @@ class DashboardPanel(Vertical):
         except Exception:
             pass
 
-    def _fetch_and_update(self):
-        """后台获取最新数据并更新"""
+    async def _fetch_and_update(self, force: bool = False):
+        """异步获取最新数据并更新
+
+        Args:
+            force: 忽略直播间信息缓存，强制从服务器获取
+        """
         try:
             # 设置更新状态为"更新中"
-            self.app.call_from_thread(self._set_update_status, "更新中...", "yellow")
+            self._set_update_status("更新中...", "yellow")
 
             # 获取最新直播间信息
-            info = self.app.live_manager.fetch_room_info()
+            info = await self.app.live_manager.aio.fetch_room_info(force)
             config: Config = self.app.config_manager.get_config()
 
             if info:
                 # 更新UI基本信息
-                self.app.call_from_thread(
-                    self.query_one("#room-title", Static).update, info.title or "未设置"
-                )
-                self.app.call_from_thread(
-                    self.query_one("#anchor-uid", Static).update,
-                    str(info.uid) if info.uid else "--",
+                self.query_one("#room-title", Static).update(info.title or "未设置")
+                self.query_one("#anchor-uid", Static).update(
+                    str(info.uid) if info.uid else "--"
                 )
-                self.app.call_from_thread(
-                    self.query_one("#room-id", Static).update,
-                    str(info.room_id) if info.room_id else "--",
+                self.query_one("#room-id", Static).update(
+                    str(info.room_id) if info.room_id else "--"
                 )
-                self.app.call_from_thread(
-                    self.query_one("#room-area", Static).update,
-                    f"{info.parent_area_name}/{info.area_name}",
+                self.query_one("#room-area", Static).update(
+                    f"{info.parent_area_name}/{info.area_name}"
                 )
-                self.app.call_from_thread(
-                    self.query_one("#room-online", Static).update,
-                    str(info.online) if info.online is not None else "--",
+                self.query_one("#room-online", Static).update(
+                    str(info.online) if info.online is not None else "--"
                 )
-                self.app.call_from_thread(
-                    self.query_one("#follower-count", Static).update,
-                    str(info.attention) if info.attention is not None else "--",
+                self.query_one("#follower-count", Static).update(
+                    str(info.attention) if info.attention is not None else "--"
                 )
-                self.app.call_from_thread(
-                    self.query_one("#rtmp-addr", Static).update,
+                self.query_one("#rtmp-addr", Static).update(
                     str(config.rtmp_addr) if config.rtmp_addr else "--"
                 )
-                self.app.call_from_thread(
-                    self.query_one("#rtmp-code", Static).update,
+                self.query_one("#rtmp-code", Static).update(
                     str(config.rtmp_code) if config.rtmp_code else "--"
                 )
 
@@ -294,7 +300,7 @@ class DashboardPanel(Vertical):
                         self._start_time = None
                         self.query_one("#room-duration", Static).update("--")
 
-                self.app.call_from_thread(update_live_duration)
+                update_live_duration()
                 self.app.app_state = (
                     self.app.app_state
                     if self.app.app_state == AppState.UNAUTH
@@ -302,11 +308,11 @@ class DashboardPanel(Vertical):
                 )
 
             # 清除更新状态
-            self.app.call_from_thread(self._set_update_status, "", "")
+            self._set_update_status("", "")
 
         except Exception as e:
             # 出错时显示错误状态
-            self.app.call_from_thread(self._set_update_status, "更新失败", "red")
+            self._set_update_status("更新失败", "red")
             self.app.status_message = f"更新直播间信息失败: {str(e)}"
     
     def _set_update_status(self, status_text: str, color: str = ""):
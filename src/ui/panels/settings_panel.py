@@ -23,6 +23,8 @@ class SettingsPanel(Vertical):
     def __init__(self):
         super().__init__()
         self._is_initializing = False  # 标记是否正在初始化
+        self._pending_child_area_id = 0  # 主分区切换后要选中的子分区
+        self._loaded_settings: tuple[str, int] | None = None  # 上次加载时配置中的(标题, 分区ID)
 
     def compose(self) -> ComposeResult:
         with Vertical(classes="settings-content"):
@@ -35,6 +37,11 @@ class SettingsPanel(Vertical):
                 # 选择分区
                 with Vertical(classes="settings-row"):
                     yield Static("选择分区", classes="settings-label")
+                    yield Input(
+                        placeholder="搜索分区（支持模糊匹配，回车选中第一个）",
+                        id="area-search-input",
+                    )
+                    yield Static("", id="area-search-hint", classes="area-search-hint")
                     with Horizontal(classes="area-row"):
                         yield Select[int](
                             [],
@@ -59,24 +66,34 @@ class SettingsPanel(Vertical):
         """组件挂载时加载数据"""
         self._load_data()
 
+    def on_panel_shown(self):
+        """面板重新显示时，配置在其他地方被修改过（开播、刷新直播间信息等）则重新加载
+
+        配置没有变化时保留输入框中还没有提交的修改
+        """
+        config = self.app.config_manager.get_config()
+        if self._loaded_settings != (config.title, config.area_id):
+            self._load_data()
+
     def _load_data(self):
         """加载配置数据"""
-        # 后台加载分区数据
-        self.run_worker(self._load_areas_worker, thread=True)
+        config = self.app.config_manager.get_config()
+        self._loaded_settings = (config.title, config.area_id)
+        # 异步加载分区数据
+        self.run_worker(self._load_areas_worker())
         self._load_default_title()
 
-    def _load_areas_worker(self):
-        """后台加载分区列表"""
+    async def _load_areas_worker(self):
+        """异步加载分区列表"""
         try:
             app = self.app
             config_manager = app.config_manager
 
             # 获取分区列表（不保存，只在更新配置或退出时保存）
             if not config_manager.config.area_list:
-                app.live_manager.fetch_area_list()
+                await app.live_manager.aio.fetch_area_list()
 
-            # 在主线程更新UI
-            self.app.call_from_thread(self._update_area_selects)
+            self._update_area_selects()
         except Exception:
             pass
 
@@ -100,6 +117,7 @@ class SettingsPanel(Vertical):
                 self._is_initializing = True  # 标记开始初始化
                 try:
                     if default_parent_area_id:
+                        self._pending_child_area_id = default_area_id
                         parent_select.value = default_parent_area_id
                         child_areas = self.app.config_manager.get_child_areas(
                             default_parent_area_id
@@ -160,18 +178,61 @@ class SettingsPanel(Vertical):
             parent_id = event.value
             if isinstance(parent_id, int) and parent_id:
                 area = self.app.config_manager.get_child_areas(parent_id)
-                self._load_child_areas(area)
+                # 搜索或初始化时指定了子分区，切换主分区后选中它
+                pending_id = self._pending_child_area_id
+                self._pending_child_area_id = 0
+                if not any(child["id"] == pending_id for child in area):
+                    pending_id = 0
+                self._load_child_areas(area, pending_id)
+
+    def on_input_changed(self, event: Input.Changed):
+        """搜索分区，显示候选"""
+        if event.input.id != "area-search-input":
+            return
+        query = event.value.strip()
+        hint = self.query_one("#area-search-hint", Static)
+        if not query:
+            hint.update("")
+            return
+        matches = self.app.config_manager.search_areas(query, limit=5)
+        if matches:
+            hint.update("候选: " + "、".join(entry.full_name for entry in matches))
+        else:
+            hint.update("未找到匹配的分区")
+
+    def on_input_submitted(self, event: Input.Submitted):
+        """回车选中最匹配的分区"""
+        if event.input.id != "area-search-input":
+            return
+        matches = self.app.config_manager.search_areas(event.value.strip(), limit=1)
+        if matches:
+            self._select_area(matches[0].id)
+
+    def _select_area(self, area_id: int):
+        """在主分区和子分区选择器中选中指定的子分区"""
+        parent_id = self.app.config_manager.get_parent_area_id(area_id)
+        if not parent_id:
+            return
+        parent_select = self.query_one("#parent-area-select", Select)
+        if parent_select.value == parent_id:
+            self._load_child_areas(
+                self.app.config_manager.get_child_areas(parent_id), area_id
+            )
+        else:
+            # 主分区变化后由on_select_changed加载子分区并选中
+            self._pending_child_area_id = area_id
+            parent_select.value = parent_id
 
     def on_button_pressed(self, event: Button.Pressed):
         """处理按钮点击"""
         btn_id = event.button.id
 
         if btn_id == "btn-save":
-            self._save_config()
+            self.run_worker(self._save_config(), exclusive=True)
         elif btn_id == "btn-cancel":
             self._cancel()
 
-    def _save_config(self):
+    async def _save_config(self):
         """更新配置"""
         title_input = self.query_one("#title-input", Input)
         child_select = self.query_one("#child-area-select", Select)
@@ -191,7 +252,7 @@ class SettingsPanel(Vertical):
         config = self.app.config_manager.get_config()
 
         # 调用update_room更新直播间信息
-        success, message = self.app.live_manager.update_room(
+        success, message = await self.app.live_manager.aio.update_room(
             title=title if title != config.title else config.title,
             area_id=area_id if area_id != config.area_id else config.area_id,
         )
@@ -200,9 +261,9 @@ class SettingsPanel(Vertical):
             # 更新本地配置
             config.title = title
             config.area_id = area_id
-            self.app.config_manager.save()
+            self.app.config_manager.schedule_save()
             # 刷新直播间信息（第3个获取时机：更新配置后）
-            self.app.live_manager.fetch_room_info()
+            await self.app.live_manager.aio.fetch_room_info()
             self.app.show_notification("配置已更新")
         else:
             self.app.show_notification(f"更新失败: {message}")
@@ -10,7 +10,6 @@ from textual.containers import Vertical
 from textual.widgets import Static
 from textual.reactive import reactive
 from textual.binding import Binding
-import qrcode
 
 from ...utils.constants import KeyBindings
 from ...utils.lib import is_modern_terminal
@@ -90,6 +89,8 @@ class QRDisplayScreen(ModalScreen):
         self._compat = compat
         qr_data = []
         try:
+            import qrcode
+
             qr = qrcode.QRCode(
                 version=6,
                 error_correction=1,
@@ -0,0 +1,8 @@
+"""小组件 - 可复用的界面组件
+
+包含弹幕列表等组件。
+"""
+
+from .danmaku_log import DanmakuLog
+
+__all__ = ["DanmakuLog"]
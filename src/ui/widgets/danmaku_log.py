@@ -0,0 +1,151 @@
+"""弹幕列表组件
+
+虚拟滚动的弹幕列表：消息写入时预渲染成行并保存在环形缓冲区中，
+绘制时只渲染可见的行，不为每条消息创建组件。
+"""
+
+from collections import deque
+from typing import Iterable
+
+from rich.segment import Segment
+from rich.text import Text
+from textual.events import Resize
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+# 默认最多保留的消息数量
+DEFAULT_MAX_MESSAGES = 500
+
+
+class DanmakuLog(ScrollView):
+    """虚拟滚动的弹幕列表
+
+    超过最大消息数量时丢弃最早的消息，内存占用与消息总数无关。
+    """
+
+    DEFAULT_CSS = """
+    DanmakuLog {
+        overflow-x: hidden;
+        overflow-y: scroll;
+    }
+    """
+
+    def __init__(
+        self,
+        max_messages: int = DEFAULT_MAX_MESSAGES,
+        *,
+        id: str | None = None,
+        classes: str | None = None,
+    ):
+        super().__init__(id=id, classes=classes)
+        self._max_messages = max_messages
+        self._texts: deque[Text] = deque()
+        """消息的富文本，宽度变化时用于重新折行"""
+        self._line_counts: deque[int] = deque()
+        """每条消息占用的行数"""
+        self._lines: deque[Strip] = deque()
+        """预渲染的行"""
+        self._render_width = 0
+        """当前预渲染使用的宽度，0表示尺寸未知"""
+
+    @property
+    def message_count(self) -> int:
+        """当前保留的消息数量"""
+        return len(self._texts)
+
+    @property
+    def line_count(self) -> int:
+        """当前的总行数"""
+        return len(self._lines)
+
+    def write(self, markup: str) -> None:
+        """追加一条富文本消息"""
+        self.write_many((markup,))
+
+    def write_many(self, markups: Iterable[str]) -> None:
+        """追加多条富文本消息（只更新一次尺寸）"""
+        removed_lines = 0
+        for markup in markups:
+            if len(self._texts) >= self._max_messages:
+                removed_lines += self._pop_oldest()
+            text = Text.from_markup(markup)
+            self._texts.append(text)
+            self._line_counts.append(self._append_lines(text))
+
+        if removed_lines and self.scroll_y > 0:
+            # 顶部的行被丢弃，保持当前看到的内容不动
+            self.set_scroll(None, max(0, self.scroll_y - removed_lines))
+        self._update_virtual_size()
+
+    def clear(self) -> None:
+        """清空消息"""
+        self._texts.clear()
+        self._line_counts.clear()
+        self._lines.clear()
+        self._update_virtual_size()
+
+    def is_near_bottom(self, threshold: int) -> bool:
+        """是否在底部附近
+
+        Args:
+            threshold: 距离底部不超过多少行时视为在底部
+        """
+        return self.max_scroll_y - self.scroll_y <= threshold
+
+    # ===== 渲染 =====
+
+    def on_resize(self, event: Resize) -> None:
+        """宽度变化时重新折行"""
+        width = self.scrollable_content_region.width
+        if width <= 0 or width == self._render_width:
+            return
+
+        was_at_bottom = self.is_near_bottom(0)
+        self._render_width = width
+        self._lines.clear()
+        self._line_counts.clear()
+        for text in self._texts:
+            self._line_counts.append(self._append_lines(text))
+        self._update_virtual_size()
+        if was_at_bottom:
+            self.scroll_end(animate=False, immediate=True)
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        width = self.scrollable_content_region.width
+        index = scroll_y + y
+        if index >= len(self._lines):
+            return Strip.blank(width, self.rich_style)
+        return (
+            self._lines[index]
+            .crop_extend(scroll_x, scroll_x + width, self.rich_style)
+            .apply_style(self.rich_style)
+        )
+
+    def _append_lines(self, text: Text) -> int:
+        """把消息渲染成行追加到缓冲区，返回行数"""
+        if self._render_width <= 0:
+            # 尺寸未知，等on_resize时统一渲染
+            return 0
+
+        console = self.app.console
+        options = console.options.update_width(self._render_width)
+        lines = Segment.split_lines(console.render(text, options))
+        count = 0
+        for strip in Strip.from_lines(list(lines)):
+            self._lines.append(strip.adjust_cell_length(self._render_width))
+            count += 1
+        return count
+
+    def _pop_oldest(self) -> int:
+        """丢弃最早的一条消息，返回丢弃的行数"""
+        self._texts.popleft()
+        count = self._line_counts.popleft()
+        for _ in range(count):
+            self._lines.popleft()
+        return count
+
+    def _update_virtual_size(self) -> None:
+        self.virtual_size = Size(self._render_width, len(self._lines))
+        self.refresh()
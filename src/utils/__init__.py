@@ -8,6 +8,7 @@ from .constants import (
     VERSION_STR,
     BASE_DIR,
     CONFIG_FILE,
+    CONFIG_CACHE_FILE,
     README_FILE,
     APP_KEY,
     APP_SECRET,
@@ -16,6 +17,7 @@ from .constants import (
     TITLE_MAX_CHAR,
     AREA_OUTPUT_LINE_NUM,
     CONFIG_DEFAULT_VERSION,
+    CONFIG_CACHE_VERSION,
     ApiEndpoints,
     AppState,
     LiveStatus,
@@ -25,12 +27,15 @@ from .constants import (
 )
 from .cleanup import cleanup_file
 from .crypto import sign_api_data
+from .fileio import atomic_write
+from .json_codec import JSON_BACKEND, json_dumps, json_loads
 
 __all__ = [
     "VERSION",
     "VERSION_STR",
     "BASE_DIR",
     "CONFIG_FILE",
+    "CONFIG_CACHE_FILE",
     "README_FILE",
     "APP_KEY",
     "APP_SECRET",
@@ -39,6 +44,7 @@ __all__ = [
     "TITLE_MAX_CHAR",
     "AREA_OUTPUT_LINE_NUM",
     "CONFIG_DEFAULT_VERSION",
+    "CONFIG_CACHE_VERSION",
     "ApiEndpoints",
     "AppState",
     "LiveStatus",
@@ -47,4 +53,8 @@ __all__ = [
     "Styles",
     "cleanup_file",
     "sign_api_data",
+    "atomic_write",
+    "JSON_BACKEND",
+    "json_dumps",
+    "json_loads",
 ]
\ No newline at end of file
@@ -17,7 +17,9 @@ BASE_DIR = Path.cwd()
 # ===== 文件路径 =====
 # 使用工作目录下的配置文件
 CONFIG_FILE = Path("config.json")
+CONFIG_CACHE_FILE = Path("config_cache.json")  # 分区列表、直播间数据等不常用的大块数据
 README_FILE = Path("使用说明.txt")
+DANMAKU_METRICS_FILE = Path("danmaku_metrics.json")
 
 # ===== B站API常量 =====
 APP_KEY: str = "aae92bc66f3edfab"
@@ -30,7 +32,8 @@ TITLE_MAX_CHAR: int = 40
 AREA_OUTPUT_LINE_NUM: int = 4
 
 # ===== 配置文件版本 =====
-CONFIG_DEFAULT_VERSION: int = 2  # 默认保存的配置版本
+CONFIG_DEFAULT_VERSION: int = 3  # 默认保存的配置版本
+CONFIG_CACHE_VERSION: int = 1  # 缓存文件格式版本，不一致时丢弃缓存
 
 
 # ===== API端点 =====
@@ -125,6 +128,7 @@ class KeyBindings:
     COPY_STREAM = "c"  # 复制推流码
     COPY_ALL = "shift+c"  # 复制全部信息
     TOGGLE_LOG = "l"  # 展开/折叠日志
+    EXPORT_METRICS = "f9"  # 导出弹幕延迟统计
 
 
 # ===== 消息常量 =====
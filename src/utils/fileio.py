@@ -0,0 +1,47 @@
+"""文件读写工具模块
+
+提供原子写入：先写入同目录的临时文件，再用os.replace()替换目标文件，
+写入过程中崩溃或断电时目标文件保持旧内容，不会出现只写了一半的文件。
+"""
+
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write(file_path: Path, data: Union[bytes, str], fsync: bool = True) -> None:
+    """原子写入文件
+
+    Args:
+        file_path: 目标文件路径，所在目录不存在时自动创建
+        data: 写入的内容，str按UTF-8编码
+        fsync: 替换前是否把临时文件刷到磁盘（断电安全）
+
+    Raises:
+        OSError: 写入或替换失败，此时目标文件不变，临时文件已删除
+    """
+    file_path = Path(file_path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{file_path.name}.", suffix=".tmp", dir=file_path.parent
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
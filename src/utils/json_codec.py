@@ -0,0 +1,70 @@
+"""JSON编解码模块
+
+优先使用orjson或msgspec，都未安装时回退到标准库json。
+解码可以直接传入bytes/memoryview，不需要先转换成str。
+"""
+
+import json
+from typing import Any, Union
+
+__all__ = (
+    "JSON_BACKEND",
+    "JSONDecodeError",
+    "json_loads",
+    "json_dumps",
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def json_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """解码JSON"""
+        return orjson.loads(data)
+
+    def json_dumps(obj: Any) -> bytes:
+        """编码为UTF-8的紧凑JSON"""
+        return orjson.dumps(obj)
+
+elif msgspec is not None:
+    JSON_BACKEND = "msgspec"
+    JSONDecodeError = msgspec.DecodeError
+
+    _decoder = msgspec.json.Decoder()
+    _encoder = msgspec.json.Encoder()
+
+    def json_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """解码JSON"""
+        return _decoder.decode(data)
+
+    def json_dumps(obj: Any) -> bytes:
+        """编码为UTF-8的紧凑JSON"""
+        return _encoder.encode(obj)
+
+else:
+    JSON_BACKEND = "json"
+    JSONDecodeError = json.JSONDecodeError
+
+    def json_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """解码JSON"""
+        if isinstance(data, memoryview):
+            # 标准库不支持memoryview，直接按UTF-8解码，避免先复制成bytes
+            data = str(data, "utf-8")
+        return json.loads(data)
+
+    def json_dumps(obj: Any) -> bytes:
+        """编码为UTF-8的紧凑JSON"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
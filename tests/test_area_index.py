@@ -0,0 +1,59 @@
+"""分区索引的测试：搜索排序和按名称查找"""
+
+from src.core.area_index import AreaIndex
+
+AREA_LIST = [
+    {
+        "id": 2,
+        "name": "网游",
+        "list": [
+            {"id": 86, "name": "英雄联盟"},
+            {"id": 92, "name": "DOTA2"},
+            {"id": 87, "name": "英雄联盟手游"},
+            {"id": 89, "name": "CS:GO"},
+        ],
+    },
+    {
+        "id": 3,
+        "name": "手游",
+        "list": [
+            {"id": 35, "name": "王者荣耀"},
+            {"id": 255, "name": "英雄"},
+            {"id": 40, "name": "明日方舟"},
+        ],
+    },
+]
+
+
+def _ids(entries) -> list[int]:
+    return [entry.id for entry in entries]
+
+
+def test_search_ranking_order():
+    index = AreaIndex(AREA_LIST)
+    # 完全相同 > 前缀（短的在前）> 子串
+    assert _ids(index.search("英雄")) == [255, 86, 87]
+    # 子串匹配之后是"主分区名+子分区名"的模糊匹配
+    assert _ids(index.search("手游")) == [87, 255, 35, 40]
+    # 没有子串匹配时按字符顺序模糊匹配，跨度小的在前
+    assert _ids(index.search("英盟")) == [86, 87]
+    assert _ids(index.search("手游王者")) == [35]
+
+
+def test_search_options():
+    index = AreaIndex(AREA_LIST)
+    # 同一档内名称短的在前，长度相同按遍历顺序
+    assert _ids(index.search("网游", include_roots=True)) == [2, 86, 92, 89, 87]
+    assert _ids(index.search("英雄", limit=2)) == [255, 86]
+    assert index.search("  ") == []
+    # 忽略大小写和空白
+    assert _ids(index.search("cs: go")) == [89]
+
+
+def test_find_first_ignores_case():
+    index = AreaIndex(AREA_LIST)
+    assert index.find_first("dota").id == 92
+    assert index.find_first("DoTa2").id == 92
+    # 按遍历顺序：每个主分区先子分区后主分区
+    assert index.find_first("手游").id == 87
+    assert index.find_first("不存在") is None
@@ -0,0 +1,12 @@
+"""弹幕基准测试的冒烟测试：每个阶段都用小语料跑一次"""
+
+from tools.bench_danmaku import STAGE_NAMES, Corpus, run_benchmarks
+
+
+def test_every_stage_runs():
+    corpus = Corpus.synthetic(messages=200, batch_size=20)
+    results = run_benchmarks(corpus, repeat=1)
+
+    assert [stage["name"] for stage in results["stages"]] == list(STAGE_NAMES)
+    for stage in results["stages"]:
+        assert stage["ops_per_sec"] > 0, stage["name"]
@@ -0,0 +1,110 @@
+"""ConfigManager延迟保存的测试：文件内容在调用schedule_save()的线程中生成"""
+
+import asyncio
+import json
+
+from src.core.config import ConfigManager
+
+
+def _logged_in_manager(tmp_path) -> ConfigManager:
+    manager = ConfigManager(tmp_path / "config.json")
+    manager.config.user_id = 1
+    manager.config.csrf = "csrf"
+    manager.config.cookies = {"SESSDATA": "sessdata"}
+    return manager
+
+
+def _saved_title(tmp_path) -> str:
+    return json.loads((tmp_path / "config.json").read_bytes())["live"]["title"]
+
+
+def test_schedule_save_writes_snapshot_taken_at_call(tmp_path):
+    manager = _logged_in_manager(tmp_path)
+    manager.config.title = "scheduled"
+    manager.schedule_save(delay=0.05)
+    timer = manager._save_timer
+    # 计时期间的修改不会被后台线程读取
+    manager.config.title = "changed later"
+
+    timer.join(timeout=5)
+    assert not manager.has_pending_save
+    assert _saved_title(tmp_path) == "scheduled"
+
+
+def test_flush_writes_latest_config(tmp_path):
+    manager = _logged_in_manager(tmp_path)
+    manager.config.title = "scheduled"
+    manager.schedule_save(delay=60)
+    manager.config.title = "latest"
+
+    assert manager.flush()
+    assert not manager.has_pending_save
+    assert _saved_title(tmp_path) == "latest"
+
+
+def test_older_snapshot_does_not_overwrite_newer(tmp_path):
+    manager = _logged_in_manager(tmp_path)
+    manager.config.title = "old"
+    old = manager._take_snapshot()
+    manager.config.title = "new"
+    new = manager._take_snapshot()
+
+    assert manager._write_snapshot(new)
+    assert manager._write_snapshot(old)
+    assert _saved_title(tmp_path) == "new"
+
+
+def test_save_async(tmp_path):
+    manager = _logged_in_manager(tmp_path)
+    manager.config.title = "async"
+
+    assert asyncio.run(manager.save_async())
+    assert _saved_title(tmp_path) == "async"
+
+
+def _read_cache(tmp_path) -> dict:
+    return json.loads((tmp_path / "config_cache.json").read_bytes())
+
+
+def test_save_does_not_load_cold_data(tmp_path):
+    manager = _logged_in_manager(tmp_path)
+    manager.config.area_list = [{"id": 1, "name": "网游", "list": []}]
+    assert manager.save()
+
+    reloaded = ConfigManager(tmp_path / "config.json")
+    assert reloaded.load()
+    reloaded.config.room_data = {"title": "room"}
+    assert reloaded.save()
+
+    # 没有读取的分区列表保持原样，也不会为了保存而读取
+    assert reloaded.config._area_list is None
+    cache = _read_cache(tmp_path)
+    assert cache["room"] == {"title": "room"}
+    assert cache["area"] == [{"id": 1, "name": "网游", "list": []}]
+
+
+def test_unmodified_cold_data_is_not_reserialized(tmp_path, monkeypatch):
+    import src.core.config as config_module
+
+    manager = _logged_in_manager(tmp_path)
+    manager.config.area_list = [{"id": 1, "name": "网游", "list": []}]
+    assert manager.save()
+
+    dumped = []
+    real_dumps = config_module.json_dumps
+    monkeypatch.setattr(
+        config_module, "json_dumps", lambda obj: dumped.append(obj) or real_dumps(obj)
+    )
+    manager.config.title = "changed"
+    manager.schedule_save(delay=60)
+    assert dumped == []
+    # 配置没有修改时也不重新生成配置文件内容
+    assert manager._serialize() is manager._serialize()
+
+    manager.config.room_data = {"title": "room"}
+    manager.schedule_save(delay=60)
+    assert dumped == [{"title": "room"}]
+
+    assert manager.flush()
+    assert _saved_title(tmp_path) == "changed"
+    assert _read_cache(tmp_path)["area"] == [{"id": 1, "name": "网游", "list": []}]
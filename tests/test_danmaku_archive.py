@@ -0,0 +1,100 @@
+"""弹幕归档的测试"""
+
+import asyncio
+import gzip
+import threading
+
+from src.core import danmaku_archive
+from src.core.danmaku_archive import INDEX_SUFFIX, DanmakuArchive, read_archive
+
+
+def test_buffer_is_bounded_when_writer_stalls(tmp_path, monkeypatch):
+    # 写入线程被阻塞，模拟fsync变慢
+    gate = threading.Event()
+    write_buffers = DanmakuArchive._write_buffers
+
+    def stalled_write(self, buffers):
+        gate.wait(timeout=10)
+        write_buffers(self, buffers)
+
+    monkeypatch.setattr(DanmakuArchive, "_write_buffers", stalled_write)
+
+    async def run():
+        archive = DanmakuArchive(
+            tmp_path, flush_interval=0.01, max_pending_batches=2, max_buffered_records=50
+        )
+        try:
+            for i in range(300):
+                archive.append(1, {"cmd": "DANMU_MSG", "i": i}, ts=1000 + i)
+                await asyncio.sleep(0.001)
+            assert archive._pending_batches <= 2
+            assert archive._buffered_records <= 50
+            assert archive.dropped_records > 0
+        finally:
+            gate.set()
+            await archive.close()
+        return archive.dropped_records
+
+    dropped = asyncio.run(run())
+    written = list(read_archive(1, archive_dir=tmp_path))
+    assert len(written) + dropped == 300
+    # 写入的记录保持顺序
+    indexes = [record["command"]["i"] for record in written]
+    assert indexes == sorted(indexes)
+
+
+def _write_archive(tmp_path, room_id: int, timestamps, batch_size: int = 10):
+    """写入记录并关闭归档，每batch_size条写成一个gzip成员"""
+
+    async def run():
+        archive = DanmakuArchive(tmp_path, segment_duration=100, flush_interval=60)
+        for i, ts in enumerate(timestamps):
+            archive.append(room_id, {"cmd": "DANMU_MSG", "ts": ts}, ts=ts)
+            if (i + 1) % batch_size == 0:
+                await archive.flush()
+        await archive.close()
+
+    asyncio.run(run())
+
+
+def test_read_time_range_via_index(tmp_path, monkeypatch):
+    _write_archive(tmp_path, 1, range(1000, 1300))
+    _write_archive(tmp_path, 2, range(1000, 1300))
+    # 重新打开后追加到已有的分段
+    _write_archive(tmp_path, 1, range(1300, 1320))
+    assert sorted(path.name for path in (tmp_path / "1").glob(f"*{INDEX_SUFFIX}")) == [
+        f"1000{INDEX_SUFFIX}",
+        f"1100{INDEX_SUFFIX}",
+        f"1200{INDEX_SUFFIX}",
+        f"1300{INDEX_SUFFIX}",
+    ]
+
+    decompressed = []
+    real_decompress = gzip.decompress
+
+    def counting_decompress(data):
+        decompressed.append(len(data))
+        return real_decompress(data)
+
+    monkeypatch.setattr(danmaku_archive.gzip, "decompress", counting_decompress)
+
+    records = list(read_archive(1, 1055, 1215, archive_dir=tmp_path))
+    assert [record["ts"] for record in records] == list(range(1055, 1215))
+    assert all(record["command"]["ts"] == record["ts"] for record in records)
+    # 只解压时间范围有重叠的成员：1050-1059 ... 1210-1219
+    assert len(decompressed) == 17
+
+    assert [record["ts"] for record in read_archive(1, 1310, archive_dir=tmp_path)] == list(
+        range(1310, 1320)
+    )
+    assert list(read_archive(3, archive_dir=tmp_path)) == []
+
+
+def test_read_ignores_incomplete_index_entry(tmp_path):
+    _write_archive(tmp_path, 1, range(1000, 1020))
+    # 写入索引时中断，只写了一部分
+    with open(tmp_path / "1" / f"1000{INDEX_SUFFIX}", "ab") as f:
+        f.write(b"\x00" * 7)
+
+    records = list(read_archive(1, archive_dir=tmp_path))
+    assert [record["ts"] for record in records] == list(range(1000, 1020))
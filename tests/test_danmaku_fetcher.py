@@ -0,0 +1,95 @@
+"""弹幕客户端解压的测试：小包在事件循环中解压，大包放到线程池解压"""
+
+import asyncio
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import brotli
+import pytest
+
+from src.core.danmaku_fetcher import DanmakuClient
+from src.core.danmaku_handler import HandlerInterface
+from src.core.danmaku_protocol import HEADER_STRUCT, Operation, ProtoVer, make_packet
+
+THRESHOLD = 256
+
+
+class _RecordingExecutor(ThreadPoolExecutor):
+    """记录提交的解压任务的包体大小"""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted: list[int] = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        self.submitted.append(len(args[0]))
+        return super().submit(fn, *args, **kwargs)
+
+
+class _RecordingHandler(HandlerInterface):
+    def __init__(self):
+        self.commands: list[dict] = []
+
+    def handle(self, client, command):
+        self.commands.append(command)
+
+
+def _compressed_frame(ver: int, commands: list[dict]) -> bytes:
+    inner = b"".join(
+        make_packet(command, Operation.SEND_MSG_REPLY, ProtoVer.NORMAL)
+        for command in commands
+    )
+    compress = brotli.compress if ver == ProtoVer.BROTLI else zlib.compress
+    return make_packet(compress(inner), Operation.SEND_MSG_REPLY, ver)
+
+
+def _commands(start: int, count: int) -> list[dict]:
+    # 随机内容不容易压缩，保证大包压缩后仍超过阈值
+    return [
+        {"cmd": "DANMU_MSG", "i": i, "text": os.urandom(16).hex()}
+        for i in range(start, start + count)
+    ]
+
+
+async def _parse(frames: list[bytes], executor=None):
+    handler = _RecordingHandler()
+    async with aiohttp.ClientSession() as session:
+        client = DanmakuClient(
+            1,
+            session=session,
+            decompress_threshold=THRESHOLD,
+            decompress_executor=executor,
+        )
+        client.set_handler(handler)
+        for frame in frames:
+            await client._parse_ws_message(frame)
+        own_executor = client._decompress_executor
+    return handler.commands, own_executor
+
+
+@pytest.mark.parametrize("ver", [ProtoVer.DEFLATE, ProtoVer.BROTLI])
+def test_decompress_threshold_selects_inline_or_pool(ver):
+    small = _compressed_frame(ver, _commands(0, 1))
+    large = _compressed_frame(ver, _commands(1, 40))
+    body_size = len(large) - HEADER_STRUCT.size
+    assert len(small) - HEADER_STRUCT.size < THRESHOLD <= body_size
+
+    executor = _RecordingExecutor()
+    try:
+        commands, _ = asyncio.run(_parse([small, large, small], executor))
+    finally:
+        executor.shutdown()
+
+    # 只有达到阈值的大包提交到线程池
+    assert executor.submitted == [body_size]
+    # 混合解压方式时消息仍按到达顺序处理
+    assert [command["i"] for command in commands] == [0, *range(1, 41), 0]
+
+
+def test_pool_is_not_created_for_small_frames():
+    small = _compressed_frame(ProtoVer.DEFLATE, _commands(0, 1))
+    commands, own_executor = asyncio.run(_parse([small, small]))
+    assert len(commands) == 2
+    assert own_executor is None
@@ -0,0 +1,43 @@
+"""消息处理器订阅命令的测试：只有重写过的处理方法对应的命令需要解码"""
+
+from src.core.danmaku_handler import BaseHandler, UIPanelHandler
+
+
+class _DanmakuOnly(BaseHandler):
+    def _on_danmaku(self, client, message):
+        pass
+
+
+class _EntryEffect(BaseHandler):
+    def _on_entry_effect(self, client, data):
+        pass
+
+
+class _ExtraCmd(BaseHandler):
+    _CMD_CALLBACK_DICT = {
+        **BaseHandler._CMD_CALLBACK_DICT,
+        "LIKE_INFO_V3_CLICK": "_on_like_callback",
+    }
+
+    def _on_like_callback(self, client, command):
+        pass
+
+
+def test_noop_callbacks_are_not_subscribed():
+    cmds = _DanmakuOnly().get_subscribed_cmds()
+    assert cmds == {"DANMU_MSG", "DANMU_MSG_MIRROR"}
+    assert "ENTRY_EFFECT" not in cmds
+    assert "NOTICE_MSG" not in cmds
+
+
+def test_overridden_methods_are_subscribed():
+    assert _EntryEffect().get_subscribed_cmds() == {"ENTRY_EFFECT"}
+    assert UIPanelHandler(None).get_subscribed_cmds() == {
+        "DANMU_MSG",
+        "DANMU_MSG_MIRROR",
+        "SEND_GIFT",
+    }
+
+
+def test_callbacks_added_by_subclass_are_subscribed():
+    assert _ExtraCmd().get_subscribed_cmds() == {"LIKE_INFO_V3_CLICK"}
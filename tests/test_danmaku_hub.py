@@ -0,0 +1,61 @@
+"""uid获取失败时的测试：保持未知，之后再获取，不会固定为未登录"""
+
+import asyncio
+
+import aiohttp
+
+from src.core import danmaku_fetcher, danmaku_hub
+from src.core.danmaku_fetcher import DanmakuClient
+from src.core.danmaku_hub import DanmakuHub
+
+
+class _StubSigner:
+    need_refresh_wbi_key = False
+
+
+def _fetch_uid_sequence(*uids):
+    results = iter(uids)
+
+    async def fetch_uid(session, endpoints=None):
+        return next(results)
+
+    return fetch_uid
+
+
+async def _init_ok(*args, **kwargs):
+    return True
+
+
+def test_hub_keeps_uid_unknown_after_shared_init_fails(monkeypatch):
+    monkeypatch.setattr(danmaku_hub, "fetch_uid", _fetch_uid_sequence(None, None))
+    monkeypatch.setattr(danmaku_hub, "get_buvid", lambda session, endpoints: "buvid")
+    monkeypatch.setattr(danmaku_hub, "get_wbi_signer", lambda session, url: _StubSigner())
+    monkeypatch.setattr(danmaku_hub, "SHARED_INIT_MAX_RETRIES", 1)
+    monkeypatch.setattr(danmaku_hub, "SHARED_INIT_RETRY_INTERVAL", 0)
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            hub = DanmakuHub(session=session)
+            await hub._init_shared_with_retry()
+            return hub._uid
+
+    assert asyncio.run(run()) is None
+
+
+def test_client_retries_uid_on_next_connect(monkeypatch):
+    monkeypatch.setattr(danmaku_fetcher, "fetch_uid", _fetch_uid_sequence(None, 42))
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            client = DanmakuClient(1, session=session)
+            client._get_buvid = lambda: "buvid"
+            client._init_room_id_and_owner = _init_ok
+            client._init_host_server = _init_ok
+
+            await client._on_before_ws_connect(0)
+            # 这次按未登录连接，uid保持未知
+            first_uid = client.uid
+            await client._on_before_ws_connect(0)
+            return first_uid, client.uid
+
+    assert asyncio.run(run()) == (None, 42)
@@ -0,0 +1,63 @@
+"""弹幕协议解析测试"""
+
+import asyncio
+import itertools
+import struct
+
+import pytest
+
+from src.core.danmaku_fetcher import DanmakuClient
+from src.core.danmaku_protocol import HEADER_STRUCT, Operation, iter_packets, make_packet
+
+# 死循环时iter_packets会无限返回同一个包，最多取这么多个
+MAX_PACKETS = 10
+
+
+def _header(pack_len: int, raw_header_size: int) -> bytes:
+    return HEADER_STRUCT.pack(pack_len, raw_header_size, 0, Operation.SEND_MSG_REPLY, 1)
+
+
+def test_iter_packets_splits_concatenated_packets():
+    data = make_packet({"cmd": "A"}, Operation.SEND_MSG_REPLY) + make_packet(
+        {"cmd": "B"}, Operation.SEND_MSG_REPLY
+    )
+    bodies = [bytes(body) for _, body in iter_packets(data)]
+    assert bodies == [b'{"cmd":"A"}', b'{"cmd":"B"}']
+
+
+@pytest.mark.parametrize(
+    "pack_len, raw_header_size",
+    [
+        (0, 0),
+        (HEADER_STRUCT.size, 0),
+        (HEADER_STRUCT.size - 1, HEADER_STRUCT.size - 1),
+        (HEADER_STRUCT.size - 1, HEADER_STRUCT.size),
+        (HEADER_STRUCT.size + 100, HEADER_STRUCT.size),
+    ],
+)
+def test_iter_packets_rejects_invalid_header(pack_len, raw_header_size):
+    data = _header(pack_len, raw_header_size)
+    with pytest.raises(struct.error):
+        list(itertools.islice(iter_packets(data), MAX_PACKETS))
+
+
+def test_iter_packets_yields_valid_packets_before_invalid_one():
+    data = make_packet({"cmd": "A"}, Operation.SEND_MSG_REPLY) + _header(0, 0)
+    packets = iter_packets(data)
+    _, body = next(packets)
+    assert bytes(body) == b'{"cmd":"A"}'
+    with pytest.raises(struct.error):
+        next(packets)
+
+
+def test_client_drops_message_with_zero_length_header():
+    async def parse():
+        client = DanmakuClient(1)
+        # 连接后才会收到消息，此时房间ID已经初始化
+        client._room_id = 1
+        try:
+            await asyncio.wait_for(client._parse_ws_message(_header(0, 0)), timeout=5)
+        finally:
+            await client.close()
+
+    asyncio.run(parse())
@@ -0,0 +1,167 @@
+"""磁盘HTTP响应缓存的测试，请求发往进程内的aiohttp服务器"""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.core.http_cache import HttpCache
+
+TTL = 60
+
+
+class _Server:
+    """返回递增版本号的JSON接口，记录收到的请求"""
+
+    def __init__(self):
+        self.requests: list[web.Request] = []
+        self.version = 0
+        self.etag = ""
+        self.last_modified = ""
+        self.status = 200
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests.append(request)
+        if self.status != 200:
+            return web.Response(status=self.status)
+        if self.etag and request.headers.get("If-None-Match") == self.etag:
+            return web.Response(status=304)
+        if (
+            self.last_modified
+            and request.headers.get("If-Modified-Since") == self.last_modified
+        ):
+            return web.Response(status=304)
+        self.version += 1
+        headers = {}
+        if self.etag:
+            headers["ETag"] = self.etag
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified
+        return web.json_response(
+            {"code": 0, "data": {"version": self.version}}, headers=headers
+        )
+
+    async def __aenter__(self) -> "_Server":
+        app = web.Application()
+        app.router.add_get("/api", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/api"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._runner.cleanup()
+
+
+def test_key_params_separate_entries(tmp_path):
+    async def run():
+        cache = HttpCache(tmp_path)
+        async with _Server() as server, aiohttp.ClientSession() as session:
+            first = await cache.get_json(session, server.url, ttl=TTL, key_params={"uid": 1})
+            other = await cache.get_json(session, server.url, ttl=TTL, key_params={"uid": 2})
+            again = await cache.get_json(session, server.url, ttl=TTL, key_params={"uid": 1})
+            # key_params不随请求发送
+            assert all("uid" not in request.query for request in server.requests)
+        return first, other, again, len(server.requests)
+
+    first, other, again, request_count = asyncio.run(run())
+    assert request_count == 2
+    assert first["data"]["version"] == 1
+    assert other["data"]["version"] == 2
+    assert again == first
+
+
+def test_persist_false_keeps_entry_in_memory_only(tmp_path):
+    async def run():
+        cache = HttpCache(tmp_path)
+        async with _Server() as server, aiohttp.ClientSession() as session:
+            first = await cache.get_json(session, server.url, ttl=TTL, persist=False)
+            again = await cache.get_json(session, server.url, ttl=TTL, persist=False)
+        return first, again, len(server.requests)
+
+    first, again, request_count = asyncio.run(run())
+    assert request_count == 1
+    assert again == first
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def _expire(cache: HttpCache, url: str):
+    """把缓存时间改到有效期之前"""
+    entry = cache.get(url)
+    entry.stored_at -= TTL + 1
+    return entry
+
+
+@pytest.mark.parametrize(
+    "validator, header",
+    [
+        ("etag", "If-None-Match"),
+        ("last_modified", "If-Modified-Since"),
+    ],
+)
+def test_not_modified_refreshes_stored_at(tmp_path, validator, header):
+    async def run():
+        cache = HttpCache(tmp_path)
+        async with _Server() as server, aiohttp.ClientSession() as session:
+            if validator == "etag":
+                server.etag = '"v1"'
+            else:
+                server.last_modified = "Wed, 21 Oct 2026 07:28:00 GMT"
+            first = await cache.get_json(session, server.url, ttl=TTL)
+            entry = _expire(cache, server.url)
+            expired_at = entry.stored_at
+
+            again = await cache.get_json(session, server.url, ttl=TTL)
+            assert server.requests[-1].headers[header]
+            assert entry.stored_at > expired_at
+            assert entry.is_fresh(TTL)
+            # 刷新后的缓存时间也写入磁盘，重启后不再请求
+            reloaded = await HttpCache(tmp_path).get_json(session, server.url, ttl=TTL)
+        return first, again, reloaded, len(server.requests)
+
+    first, again, reloaded, request_count = asyncio.run(run())
+    assert request_count == 2
+    assert again == first == reloaded
+    assert first["data"]["version"] == 1
+
+
+def test_stale_entry_is_returned_on_server_error(tmp_path):
+    async def run():
+        cache = HttpCache(tmp_path)
+        async with _Server() as server, aiohttp.ClientSession() as session:
+            first = await cache.get_json(session, server.url, ttl=TTL)
+            entry = _expire(cache, server.url)
+            expired_at = entry.stored_at
+            server.status = 503
+            stale = await cache.get_json(session, server.url, ttl=TTL)
+        # 失败时不刷新缓存时间，下次仍然重新请求
+        assert entry.stored_at == expired_at
+        return first, stale, len(server.requests)
+
+    first, stale, request_count = asyncio.run(run())
+    assert request_count == 2
+    assert stale == first
+
+
+def test_stale_entry_is_returned_when_offline(tmp_path):
+    async def run():
+        cache = HttpCache(tmp_path)
+        async with aiohttp.ClientSession() as session:
+            async with _Server() as server:
+                first = await cache.get_json(session, server.url, ttl=TTL)
+            _expire(cache, server.url)
+            # 服务器已关闭，连接失败
+            stale = await cache.get_json(session, server.url, ttl=TTL)
+
+            with pytest.raises(aiohttp.ClientError):
+                await HttpCache(tmp_path / "empty").get_json(session, server.url, ttl=TTL)
+        return first, stale
+
+    first, stale = asyncio.run(run())
+    assert stale == first
@@ -0,0 +1,97 @@
+"""直播间信息缓存的测试：有效期、失效和合并同时发起的请求"""
+
+import asyncio
+
+import pytest
+
+from src.core import live
+from src.core.config import ConfigManager
+from src.core.live import AsyncLiveManager
+
+
+class _Clock:
+    """可手动推进的time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(live.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def manager(tmp_path):
+    config_manager = ConfigManager(tmp_path / "config.json")
+    config_manager.config.room_id = 100
+    manager = AsyncLiveManager(config_manager)
+    manager.requests = 0
+    manager.gate = None
+
+    async def request_json(method, url, **kwargs):
+        manager.requests += 1
+        title = f"title {manager.requests}"
+        if manager.gate is not None:
+            await manager.gate.wait()
+        return {"code": 0, "data": {"room_id": 100, "title": title}}
+
+    manager._request_json = request_json
+    yield manager
+    config_manager.flush()
+
+
+def test_room_info_is_cached_until_ttl_expires(manager, clock):
+    async def run():
+        first = await manager.fetch_room_info()
+        clock.now += manager.ROOM_INFO_TTL - 1
+        cached = await manager.fetch_room_info()
+        clock.now += 1
+        expired = await manager.fetch_room_info()
+        return first, cached, expired
+
+    first, cached, expired = asyncio.run(run())
+    assert cached is first
+    assert expired.title == "title 2"
+    assert manager.requests == 2
+
+
+def test_invalidate_discards_cache_and_in_flight_result(manager, clock):
+    async def run():
+        await manager.fetch_room_info()
+        manager.invalidate_room_info()
+        assert manager.cached_room_info is None
+
+        # 失效前发起的请求结果不写入缓存，失效后的调用重新请求
+        manager.gate = asyncio.Event()
+        stale = asyncio.create_task(manager.fetch_room_info(force=True))
+        await asyncio.sleep(0)
+        manager.invalidate_room_info()
+        fresh = asyncio.create_task(manager.fetch_room_info())
+        await asyncio.sleep(0)
+        manager.gate.set()
+        return await stale, await fresh
+
+    stale, fresh = asyncio.run(run())
+    assert manager.requests == 3
+    assert stale.title == "title 2"
+    assert fresh.title == "title 3"
+    assert manager.cached_room_info is fresh
+
+
+def test_concurrent_callers_share_one_request(manager, clock):
+    async def run():
+        manager.gate = asyncio.Event()
+        callers = [asyncio.create_task(manager.fetch_room_info()) for _ in range(5)]
+        await asyncio.sleep(0)
+        manager.gate.set()
+        return await asyncio.gather(*callers)
+
+    results = asyncio.run(run())
+    assert manager.requests == 1
+    assert all(info is results[0] for info in results)
@@ -0,0 +1,4 @@
+"""开发工具 - 本地模拟服务器、压测脚本等
+
+不属于应用本身，不会被打包。
+"""
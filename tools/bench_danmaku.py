@@ -0,0 +1,475 @@
+"""弹幕处理流程基准测试
+
+分别测量弹幕处理的每个阶段，以及从原始帧到富文本的完整流程：
+
+- make_packet: 构造业务包
+- unpack_header: 遍历包头（iter_packets）
+- decompress_brotli / decompress_zlib: 解压一帧
+- json_decode: 解码业务消息JSON
+- dispatch: BaseHandler.handle分发（包含消息类型转换）
+- as_danmaku: DanmakuMessage.as_danmaku
+- format_rich: 首次格式化富文本
+- end_to_end: DanmakuClient._parse_ws_message解析一帧，处理器转换并格式化弹幕
+
+每个阶段输出：
+- ops_per_sec: 不计时开销的批量吞吐量（取多轮中最好的一轮）
+- p50_us / p99_us: 逐次计时的单次耗时（已扣除计时器本身的开销）
+- alloc_bytes_per_op / alloc_blocks_per_op: 保留所有结果时，每次操作新增的内存和内存块数
+
+语料可以是合成的（与本地模拟服务器相同的消息分布），也可以是录制的抓包文件。
+
+命令行::
+
+    python -m tools.bench_danmaku --output after.json --compare before.json
+    python -m tools.bench_danmaku --capture room.bin --stages json_decode,end_to_end
+"""
+
+import argparse
+import asyncio
+import platform
+import sys
+import time
+import tracemalloc
+import zlib
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from brotli import decompress as brotli_decompress
+
+from src.core.danmaku_fetcher import DanmakuClient
+from src.core.danmaku_handler import BaseHandler
+from src.core.danmaku_models import DanmakuMessage
+from src.core.danmaku_protocol import Operation, ProtoVer, iter_packets, make_packet
+from src.core.danmaku_replay import iter_frames
+from src.utils.json_codec import JSON_BACKEND, json_dumps, json_loads
+
+from .danmaku_mock_server import make_business_packet, make_command, make_frame
+
+__all__ = (
+    "Corpus",
+    "StageResult",
+    "run_benchmarks",
+)
+
+DEFAULT_MESSAGES = 20000
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_REPEAT = 3
+# 逐次计时和内存统计最多使用的操作数
+LATENCY_SAMPLE_LIMIT = 20000
+ALLOC_SAMPLE_LIMIT = 2000
+
+
+# ===== 语料 =====
+
+
+@dataclass
+class Corpus:
+    """基准测试语料"""
+
+    name: str
+    commands: list[dict]
+    """解码后的业务命令"""
+    packets: list[bytes] = field(default_factory=list)
+    """未压缩的业务包"""
+    bodies: list[bytes] = field(default_factory=list)
+    """业务包的包体（JSON）"""
+    brotli_frames: list[bytes] = field(default_factory=list)
+    """brotli压缩的帧"""
+    zlib_frames: list[bytes] = field(default_factory=list)
+    """deflate压缩的帧"""
+    danmaku_infos: list[list] = field(default_factory=list)
+    """DANMU_MSG的info字段"""
+    batch_size: int = DEFAULT_BATCH_SIZE
+
+    @classmethod
+    def from_commands(
+        cls, name: str, commands: list[dict], batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> "Corpus":
+        corpus = cls(name, commands, batch_size=batch_size)
+        corpus.packets = [make_business_packet(command) for command in commands]
+        corpus.bodies = [json_dumps(command) for command in commands]
+        for i in range(0, len(corpus.packets), batch_size):
+            batch = corpus.packets[i : i + batch_size]
+            corpus.brotli_frames.append(make_frame(batch, ProtoVer.BROTLI))
+            corpus.zlib_frames.append(make_frame(batch, ProtoVer.DEFLATE))
+        corpus.danmaku_infos = [
+            command["info"]
+            for command in commands
+            if command.get("cmd", "").partition(":")[0] == "DANMU_MSG"
+        ]
+        return corpus
+
+    @classmethod
+    def synthetic(
+        cls, messages: int = DEFAULT_MESSAGES, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> "Corpus":
+        """与本地模拟服务器相同分布的合成语料"""
+        commands = [make_command(i, room_id=1) for i in range(messages)]
+        return cls.from_commands(f"synthetic-{messages}", commands, batch_size)
+
+    @classmethod
+    def from_capture(
+        cls, path: Path, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> "Corpus":
+        """从抓包文件提取业务命令，再按batch_size重新组帧"""
+        commands = []
+        for _, frame in iter_frames(path):
+            commands.extend(_extract_commands(frame))
+        return cls.from_commands(f"capture-{Path(path).name}", commands, batch_size)
+
+
+def _extract_commands(data: bytes) -> list[dict]:
+    commands = []
+    for header, body in iter_packets(data):
+        if header.operation != Operation.SEND_MSG_REPLY:
+            continue
+        if header.ver == ProtoVer.BROTLI:
+            commands.extend(_extract_commands(brotli_decompress(body)))
+        elif header.ver == ProtoVer.DEFLATE:
+            commands.extend(_extract_commands(zlib.decompress(body)))
+        elif header.ver == ProtoVer.NORMAL and len(body) != 0:
+            commands.append(json_loads(body))
+    return commands
+
+
+# ===== 测量 =====
+
+
+@dataclass
+class StageResult:
+    """单个阶段的测量结果"""
+
+    name: str
+    ops: int
+    """每轮的操作数"""
+    items_per_op: float
+    """每次操作包含的消息数"""
+    ops_per_sec: float
+    items_per_sec: float
+    p50_us: float
+    p99_us: float
+    alloc_bytes_per_op: float
+    alloc_blocks_per_op: float
+
+
+@dataclass
+class _Stage:
+    name: str
+    func: Callable[[Any], Any]
+    args: list
+    items_per_op: float = 1
+    fresh_args: Optional[Callable[[], list]] = None
+    """每轮重新生成参数（结果会被缓存的操作）"""
+
+    def get_args(self) -> list:
+        return self.args if self.fresh_args is None else self.fresh_args()
+
+
+def _timer_overhead_ns() -> int:
+    """两次perf_counter_ns调用本身的耗时"""
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(10000):
+        start = perf_counter_ns()
+        samples.append(perf_counter_ns() - start)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def _percentile(sorted_samples: list[int], q: float) -> int:
+    index = min(len(sorted_samples) - 1, int(len(sorted_samples) * q))
+    return sorted_samples[index]
+
+
+def _measure(stage: _Stage, repeat: int, timer_overhead_ns: int) -> StageResult:
+    func = stage.func
+    perf_counter = time.perf_counter
+    perf_counter_ns = time.perf_counter_ns
+
+    # 吞吐量：不逐次计时，取最好的一轮
+    best = float("inf")
+    for _ in range(repeat):
+        args = stage.get_args()
+        start = perf_counter()
+        for arg in args:
+            func(arg)
+        best = min(best, perf_counter() - start)
+    ops_per_sec = len(args) / best if best > 0 else 0.0
+
+    # 延迟：逐次计时
+    samples = []
+    for arg in stage.get_args()[:LATENCY_SAMPLE_LIMIT]:
+        start = perf_counter_ns()
+        func(arg)
+        samples.append(max(0, perf_counter_ns() - start - timer_overhead_ns))
+    samples.sort()
+
+    # 内存：保留所有结果，统计新增的内存
+    alloc_args = stage.get_args()[:ALLOC_SAMPLE_LIMIT]
+    results = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for arg in alloc_args:
+        results.append(func(arg))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    alloc_bytes = sum(stat.size_diff for stat in stats)
+    alloc_blocks = sum(stat.count_diff for stat in stats)
+    del results
+
+    return StageResult(
+        name=stage.name,
+        ops=len(args),
+        items_per_op=stage.items_per_op,
+        ops_per_sec=ops_per_sec,
+        items_per_sec=ops_per_sec * stage.items_per_op,
+        p50_us=_percentile(samples, 0.50) / 1000,
+        p99_us=_percentile(samples, 0.99) / 1000,
+        alloc_bytes_per_op=alloc_bytes / max(1, len(alloc_args)),
+        alloc_blocks_per_op=alloc_blocks / max(1, len(alloc_args)),
+    )
+
+
+# ===== 阶段 =====
+
+
+class _StubClient:
+    """BaseHandler.handle()用到的DanmakuClient属性"""
+
+    room_id = 1
+    frame_received_at = 0.0
+    metrics = None
+
+
+class _EndToEndHandler(BaseHandler):
+    """转换并格式化弹幕和礼物，与UI面板收到消息后的处理相同"""
+
+    def _on_danmaku(self, client, message):
+        message.format_rich()
+
+    def _on_gift(self, client, message):
+        message.format_rich()
+
+
+def _make_end_to_end_stage(
+    corpus: Corpus, loop: asyncio.AbstractEventLoop
+) -> tuple[_Stage, DanmakuClient]:
+    async def create_client() -> DanmakuClient:
+        # 阈值设为无穷大，全部在事件循环中解压，只测量解析本身
+        client = DanmakuClient(1, uid=0, decompress_threshold=sys.maxsize)
+        client._room_id = 1
+        client.set_handler(_EndToEndHandler())
+        return client
+
+    client = loop.run_until_complete(create_client())
+    parse = client._parse_ws_message
+
+    def parse_frame(frame: bytes):
+        # 不会真正挂起，直接驱动协程即可，避免事件循环调度的开销
+        coro = parse(frame)
+        try:
+            coro.send(None)
+        except StopIteration:
+            pass
+        else:
+            raise RuntimeError("_parse_ws_message() suspended unexpectedly")
+
+    stage = _Stage(
+        "end_to_end",
+        parse_frame,
+        corpus.brotli_frames,
+        len(corpus.commands) / max(1, len(corpus.brotli_frames)),
+    )
+    return stage, client
+
+
+def _build_stages(
+    corpus: Corpus, loop: asyncio.AbstractEventLoop
+) -> tuple[list[_Stage], list[DanmakuClient]]:
+    """构造所有阶段，同时返回需要关闭的客户端"""
+    handler = BaseHandler()
+    client = _StubClient()
+    items_per_frame = len(corpus.commands) / max(1, len(corpus.brotli_frames))
+
+    def unpack_header(packet: bytes):
+        return list(iter_packets(packet))
+
+    def decompress_brotli(frame: bytes):
+        return brotli_decompress(memoryview(frame)[16:])
+
+    def decompress_zlib(frame: bytes):
+        return zlib.decompress(memoryview(frame)[16:])
+
+    def dispatch(command: dict):
+        return handler.handle(client, command)  # type: ignore[arg-type]
+
+    def as_danmaku(info: list):
+        return DanmakuMessage.as_danmaku(info, live_room_id=1)
+
+    def format_rich(message: DanmakuMessage):
+        # 每次都是新对象，测量的是未命中缓存的格式化
+        return message.format_rich()
+
+    def make_send_msg_packet(command: dict):
+        return make_packet(command, Operation.SEND_MSG_REPLY, ProtoVer.NORMAL)
+
+    def fresh_messages() -> list[DanmakuMessage]:
+        return [as_danmaku(info) for info in corpus.danmaku_infos]
+
+    end_to_end_stage, end_to_end_client = _make_end_to_end_stage(corpus, loop)
+    stages = [
+        _Stage("make_packet", make_send_msg_packet, corpus.commands),
+        _Stage("unpack_header", unpack_header, corpus.packets),
+        _Stage("decompress_brotli", decompress_brotli, corpus.brotli_frames, items_per_frame),
+        _Stage("decompress_zlib", decompress_zlib, corpus.zlib_frames, items_per_frame),
+        _Stage("json_decode", json_loads, corpus.bodies),
+        _Stage("dispatch", dispatch, corpus.commands),
+        _Stage("as_danmaku", as_danmaku, corpus.danmaku_infos),
+        _Stage(
+            "format_rich",
+            format_rich,
+            corpus.danmaku_infos,
+            fresh_args=fresh_messages,
+        ),
+        end_to_end_stage,
+    ]
+    return stages, [end_to_end_client]
+
+
+STAGE_NAMES = (
+    "make_packet",
+    "unpack_header",
+    "decompress_brotli",
+    "decompress_zlib",
+    "json_decode",
+    "dispatch",
+    "as_danmaku",
+    "format_rich",
+    "end_to_end",
+)
+
+
+def run_benchmarks(
+    corpus: Corpus,
+    stages: Optional[list[str]] = None,
+    repeat: int = DEFAULT_REPEAT,
+) -> dict:
+    """运行基准测试
+
+    :param corpus: 语料
+    :param stages: 要运行的阶段，None表示全部
+    :param repeat: 吞吐量测量的轮数
+    :return: 可以直接保存为JSON的结果
+    """
+    loop = asyncio.new_event_loop()
+    clients: list[DanmakuClient] = []
+    try:
+        timer_overhead_ns = _timer_overhead_ns()
+        results = []
+        stage_list, clients = _build_stages(corpus, loop)
+        for stage in stage_list:
+            if stages is not None and stage.name not in stages:
+                continue
+            if not stage.args:
+                continue
+            results.append(asdict(_measure(stage, repeat, timer_overhead_ns)))
+    finally:
+        # 阶段出错时也要关闭客户端的会话
+        for client in clients:
+            loop.run_until_complete(client.close())
+        loop.close()
+
+    return {
+        "meta": {
+            "corpus": corpus.name,
+            "messages": len(corpus.commands),
+            "batch_size": corpus.batch_size,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "json_backend": JSON_BACKEND,
+            "timer_overhead_ns": timer_overhead_ns,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "stages": results,
+    }
+
+
+# ===== 输出 =====
+
+
+def format_results(results: dict, baseline: Optional[dict] = None) -> str:
+    """格式化为表格，有基准结果时附加对比"""
+    baseline_stages = {}
+    if baseline is not None:
+        baseline_stages = {stage["name"]: stage for stage in baseline["stages"]}
+
+    header = f"{'stage':<18}{'ops/s':>12}{'msgs/s':>12}{'p50 us':>10}{'p99 us':>10}{'B/op':>10}{'blk/op':>8}"
+    if baseline_stages:
+        header += f"{'ops/s Δ':>10}{'p99 Δ':>10}"
+    lines = [
+        f"corpus={results['meta']['corpus']} json={results['meta']['json_backend']} "
+        f"python={results['meta']['python']}",
+        header,
+    ]
+    for stage in results["stages"]:
+        line = (
+            f"{stage['name']:<18}{stage['ops_per_sec']:>12.0f}{stage['items_per_sec']:>12.0f}"
+            f"{stage['p50_us']:>10.2f}{stage['p99_us']:>10.2f}"
+            f"{stage['alloc_bytes_per_op']:>10.0f}{stage['alloc_blocks_per_op']:>8.1f}"
+        )
+        base = baseline_stages.get(stage["name"])
+        if base is not None:
+            line += f"{_change(stage['ops_per_sec'], base['ops_per_sec']):>10}"
+            line += f"{_change(stage['p99_us'], base['p99_us']):>10}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _change(value: float, base: float) -> str:
+    if base == 0:
+        return "-"
+    return f"{(value - base) / base * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="弹幕处理流程基准测试")
+    parser.add_argument("--capture", type=Path, help="使用录制的抓包文件作为语料")
+    parser.add_argument(
+        "--messages", type=int, default=DEFAULT_MESSAGES, help="合成语料的消息数"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="每帧包含的消息数"
+    )
+    parser.add_argument(
+        "--stages", help=f"逗号分隔的阶段名，默认全部：{','.join(STAGE_NAMES)}"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="吞吐量测量轮数")
+    parser.add_argument("--output", type=Path, help="把结果保存为JSON")
+    parser.add_argument("--compare", type=Path, help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+
+    if args.capture is not None:
+        corpus = Corpus.from_capture(args.capture, args.batch_size)
+    else:
+        corpus = Corpus.synthetic(args.messages, args.batch_size)
+    stages = args.stages.split(",") if args.stages else None
+    unknown = set(stages or ()) - set(STAGE_NAMES)
+    if unknown:
+        parser.error(f"unknown stages: {','.join(sorted(unknown))}")
+
+    results = run_benchmarks(corpus, stages, args.repeat)
+
+    baseline = None
+    if args.compare is not None:
+        baseline = json_loads(args.compare.read_bytes())
+    print(format_results(results, baseline))
+
+    if args.output is not None:
+        args.output.write_bytes(json_dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""启动速度基准测试
+
+在新的子进程中测量（每次都是冷启动，不受当前进程已导入模块的影响）：
+
+- import_ms: `python -X importtime -c "import src.ui.app"` 统计的导入总耗时
+- first_paint_ms: 从启动子进程到应用显示第一帧（Textual的Ready事件）的墙钟时间，
+  子进程在临时目录中以headless模式运行，没有配置文件，显示登录面板
+- eager_modules: 导入src.ui.app后已经被加载的重型模块，这些模块应当在第一次使用时才导入
+
+多次运行取最好的一次。任一项超出预算时以退出码1结束，可以放到CI中。
+
+命令行::
+
+    python -m tools.bench_startup
+    python -m tools.bench_startup --runs 5 --import-budget 300 --first-paint-budget 1500 --output startup.json
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from src.utils.json_codec import json_dumps, json_loads
+
+__all__ = (
+    "StartupResult",
+    "measure_import_time",
+    "measure_first_paint",
+    "find_eager_modules",
+    "run_benchmark",
+)
+
+# 被测的入口模块
+ENTRY_MODULE = "src.ui.app"
+# 启动时不应导入的模块（第一次使用时才导入）
+LAZY_MODULES = (
+    "aiohttp",
+    "yarl",
+    "brotli",
+    "qrcode",
+    "requests",
+    "src.core.danmaku_fetcher",
+    "src.core.danmaku_service",
+    "src.ui.screen.qr_display_screen",
+    "src.ui.panels.settings_panel",
+    "src.ui.panels.danmaku_panel",
+)
+
+DEFAULT_RUNS = 3
+DEFAULT_IMPORT_BUDGET_MS = 300.0
+DEFAULT_FIRST_PAINT_BUDGET_MS = 1000.0
+# 等待第一帧的超时时间（秒）
+FIRST_PAINT_TIMEOUT = 30
+# 结果中保留的最耗时模块数
+TOP_MODULES = 15
+
+# 子进程输出第一帧时打印的标记
+_READY_MARKER = "FIRST_PAINT"
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class StartupResult:
+    """启动测量结果"""
+
+    import_ms: float
+    """入口模块导入总耗时（毫秒）"""
+    first_paint_ms: float
+    """启动到第一帧的墙钟时间（毫秒）"""
+    eager_modules: list[str] = field(default_factory=list)
+    """启动时被导入的LAZY_MODULES"""
+    top_modules: list[tuple[str, float]] = field(default_factory=list)
+    """自身导入耗时最多的模块 (模块名, 毫秒)"""
+
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, (str(REPO_ROOT), env.get("PYTHONPATH")))
+    )
+    return env
+
+
+def _parse_importtime(stderr: str) -> tuple[float, list[tuple[str, float]]]:
+    """解析-X importtime的输出
+
+    :return: (入口模块累计耗时毫秒, 按自身耗时排序的模块)
+    """
+    total_us = 0
+    modules: list[tuple[str, float]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # 表头
+            continue
+        self_us, cumulative_us = int(parts[0]), int(parts[1])
+        name = parts[2].strip()
+        modules.append((name, self_us / 1000))
+        if name == ENTRY_MODULE:
+            total_us = cumulative_us
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000, modules
+
+
+def measure_import_time() -> tuple[float, list[tuple[str, float]]]:
+    """在子进程中测量入口模块的导入耗时
+
+    :return: (总耗时毫秒, 按自身耗时排序的模块)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {ENTRY_MODULE}"],
+        cwd=REPO_ROOT,
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return _parse_importtime(proc.stderr)
+
+
+def find_eager_modules() -> list[str]:
+    """导入入口模块后已经被加载的LAZY_MODULES"""
+    code = (
+        "import sys\n"
+        f"import {ENTRY_MODULE}\n"
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    output = proc.stdout.strip()
+    return output.split(",") if output else []
+
+
+def measure_first_paint() -> float:
+    """启动子进程运行应用，测量到第一帧的墙钟时间（毫秒）"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "tools.bench_startup", "--child"],
+            cwd=work_dir,
+            env=_child_env(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                if line.strip() == _READY_MARKER:
+                    return (time.perf_counter() - start) * 1000
+            _, stderr = proc.communicate(timeout=FIRST_PAINT_TIMEOUT)
+            raise RuntimeError(f"app exited before first paint:\n{stderr}")
+        finally:
+            if proc.poll() is None:
+                try:
+                    proc.wait(timeout=FIRST_PAINT_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+
+
+def _run_child():
+    """子进程：运行应用，显示第一帧后打印标记并退出"""
+    import inspect
+
+    from src.ui.app import BiliLiveApp
+
+    app_dir = Path(inspect.getfile(BiliLiveApp)).parent
+
+    class FirstPaintApp(BiliLiveApp):
+        # 相对路径按子类所在文件解析，这里换成绝对路径
+        CSS_PATH = [app_dir / path for path in BiliLiveApp.CSS_PATH]
+
+        def on_ready(self):
+            print(_READY_MARKER, flush=True)
+            self.exit()
+
+    FirstPaintApp().run(headless=True)
+
+
+def run_benchmark(runs: int = DEFAULT_RUNS) -> StartupResult:
+    """测量runs次，每项取最好的一次"""
+    import_ms = first_paint_ms = float("inf")
+    top_modules: list[tuple[str, float]] = []
+    for _ in range(runs):
+        total, modules = measure_import_time()
+        if total < import_ms:
+            import_ms, top_modules = total, modules[:TOP_MODULES]
+        first_paint_ms = min(first_paint_ms, measure_first_paint())
+    return StartupResult(import_ms, first_paint_ms, find_eager_modules(), top_modules)
+
+
+def check_budget(
+    result: StartupResult, import_budget_ms: float, first_paint_budget_ms: float
+) -> list[str]:
+    """检查预算
+
+    :return: 超出预算的说明，为空表示通过
+    """
+    failures = []
+    if result.import_ms > import_budget_ms:
+        failures.append(f"import {result.import_ms:.1f}ms > budget {import_budget_ms:.0f}ms")
+    if result.first_paint_ms > first_paint_budget_ms:
+        failures.append(
+            f"first paint {result.first_paint_ms:.1f}ms > budget {first_paint_budget_ms:.0f}ms"
+        )
+    if result.eager_modules:
+        failures.append(f"imported at startup: {', '.join(result.eager_modules)}")
+    return failures
+
+
+def format_result(result: StartupResult, baseline: Optional[dict] = None) -> str:
+    """格式化结果，提供baseline时附加变化比例"""
+
+    def change(key: str) -> str:
+        if baseline is None or not baseline.get(key):
+            return ""
+        return f"  ({(getattr(result, key) / baseline[key] - 1) * 100:+.1f}%)"
+
+    lines = [
+        f"import {ENTRY_MODULE}: {result.import_ms:8.1f} ms{change('import_ms')}",
+        f"first paint:          {result.first_paint_ms:8.1f} ms{change('first_paint_ms')}",
+        f"eager modules:        {', '.join(result.eager_modules) or '-'}",
+        "slowest imports (self):",
+    ]
+    for name, self_ms in result.top_modules:
+        lines.append(f"  {self_ms:8.2f} ms  {name}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动速度基准测试")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="测量次数，取最好的一次")
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=DEFAULT_IMPORT_BUDGET_MS,
+        help="导入耗时预算（毫秒）",
+    )
+    parser.add_argument(
+        "--first-paint-budget",
+        type=float,
+        default=DEFAULT_FIRST_PAINT_BUDGET_MS,
+        help="到第一帧的时间预算（毫秒）",
+    )
+    parser.add_argument("--output", type=Path, help="把结果保存为JSON")
+    parser.add_argument("--compare", type=Path, help="与之前保存的JSON结果对比")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child()
+        return
+
+    result = run_benchmark(args.runs)
+
+    baseline = None
+    if args.compare is not None:
+        baseline = json_loads(args.compare.read_bytes())
+    print(format_result(result, baseline))
+
+    if args.output is not None:
+        args.output.write_bytes(json_dumps(asdict(result)))
+
+    failures = check_budget(result, args.import_budget, args.first_paint_budget)
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
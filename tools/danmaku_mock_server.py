@@ -0,0 +1,463 @@
+"""本地模拟弹幕服务器
+
+实现DanmakuClient用到的HTTP接口和弹幕WebSocket协议，用于在本机压测客户端：
+- HTTP: 用户信息/WBI密钥、buvid、房间信息、弹幕服务器配置
+- WebSocket: AUTH -> AUTH_REPLY，HEARTBEAT -> HEARTBEAT_REPLY，
+  认证后按设定的速率和批量大小持续下发SEND_MSG_REPLY（NORMAL/DEFLATE/BROTLI）
+
+弹幕消息info[0][4]是发送时的毫秒时间戳，可以用来统计端到端延迟。
+
+连接本服务器的客户端需要使用server.endpoints，并且session的cookie_jar
+需要设置unsafe=True，否则IP地址的buvid cookie不会被保存::
+
+    server = MockBiliServer(rate=1000, batch_size=20)
+    await server.start()
+    session = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+    client = DanmakuClient(1, session=session, endpoints=server.endpoints)
+
+命令行::
+
+    python -m tools.danmaku_mock_server --port 8000 --rate 1000 --batch-size 20
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+import zlib
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Optional
+
+import brotli
+from aiohttp import WSMsgType, web
+
+from src.core.danmaku_fetcher import DanmakuEndpoints
+from src.core.danmaku_protocol import (
+    HEADER_STRUCT,
+    AuthReplyCode,
+    Operation,
+    ProtoVer,
+    iter_packets,
+    make_packet,
+)
+from src.utils.json_codec import json_loads
+
+logger = getLogger(__name__)
+
+__all__ = (
+    "MockBiliServer",
+    "MockServerStats",
+    "make_danmaku_command",
+    "make_gift_command",
+    "make_noise_command",
+    "make_command",
+    "make_business_packet",
+    "make_frame",
+    "make_endpoints",
+)
+
+# 路由
+NAV_PATH = "/x/web-interface/nav"
+ROOM_INIT_PATH = "/room/v1/Room/get_info"
+DANMAKU_SERVER_CONF_PATH = "/xlive/web-room/v1/index/getDanmuInfo"
+WS_PATH = "/sub"
+
+# 返回给客户端的WBI图片地址（取文件名作为密钥）
+MOCK_WBI_IMG = {
+    "img_url": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+    "sub_url": "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png",
+}
+MOCK_BUVID = "00000000-0000-0000-0000-000000000000infoc"
+MOCK_TOKEN = "mock-token"
+MOCK_POPULARITY = 1
+
+
+# ===== 消息生成 =====
+
+
+def make_danmaku_command(seq: int, room_id: int = 0) -> dict:
+    """生成一条DANMU_MSG，info[0][4]为当前毫秒时间戳"""
+    uid = 10000 + seq % 997
+    return {
+        "cmd": "DANMU_MSG",
+        "info": [
+            [0, 1, 25, 16777215, int(time.time() * 1000), seq, 0, "", 0, 0, 0, "", 0, "{}", "{}", {}],
+            f"模拟弹幕 {seq}",
+            [uid, f"用户{uid}", 0, 0, 0, 10000, 1, ""],
+            [seq % 30, "粉丝牌", "主播", room_id, 6067854, "", 0],
+            [seq % 60, 0, 9868950, ">50000", 0],
+            ["", ""],
+            0,
+            seq % 4,
+            None,
+            {"ts": int(time.time()), "ct": "00000000"},
+        ],
+    }
+
+
+def make_gift_command(seq: int, room_id: int = 0) -> dict:
+    """生成一条SEND_GIFT"""
+    uid = 10000 + seq % 997
+    return {
+        "cmd": "SEND_GIFT",
+        "data": {
+            "giftName": "辣条",
+            "giftId": 1,
+            "num": seq % 10 + 1,
+            "uname": f"用户{uid}",
+            "uid": uid,
+            "face": "",
+            "timestamp": int(time.time()),
+        },
+    }
+
+
+def make_noise_command(seq: int, room_id: int = 0) -> dict:
+    """生成一条处理器不关心的命令（进场消息）"""
+    uid = 10000 + seq % 997
+    return {
+        "cmd": "INTERACT_WORD",
+        "data": {
+            "uid": uid,
+            "uname": f"用户{uid}",
+            "msg_type": 1,
+            "roomid": room_id,
+            "timestamp": int(time.time()),
+        },
+    }
+
+
+def make_command(
+    seq: int, room_id: int = 0, gift_ratio: float = 0.1, noise_ratio: float = 0.3
+) -> dict:
+    """按比例生成弹幕、礼物或无关命令
+
+    用序号决定消息类型，同样的参数总是生成同样的消息分布。
+    """
+    position = (seq * 0.6180339887) % 1
+    if position < gift_ratio:
+        return make_gift_command(seq, room_id)
+    if position < gift_ratio + noise_ratio:
+        return make_noise_command(seq, room_id)
+    return make_danmaku_command(seq, room_id)
+
+
+def make_business_packet(command: dict) -> bytes:
+    """生成未压缩的业务包"""
+    return make_packet(command, Operation.SEND_MSG_REPLY, ProtoVer.NORMAL)
+
+
+def make_frame(packets: list[bytes], ver: int) -> bytes:
+    """把多个业务包合成一帧，按ver压缩"""
+    body = b"".join(packets)
+    if ver == ProtoVer.NORMAL:
+        return body
+    return _wrap_compressed(body, ver)
+
+
+def _wrap_compressed(body: bytes, ver: int) -> bytes:
+    """把多个业务包压缩成一个外层包"""
+    if ver == ProtoVer.BROTLI:
+        body = brotli.compress(body, quality=1)
+    else:
+        body = zlib.compress(body)
+    return (
+        HEADER_STRUCT.pack(
+            HEADER_STRUCT.size + len(body),
+            HEADER_STRUCT.size,
+            ver,
+            Operation.SEND_MSG_REPLY,
+            0,
+        )
+        + body
+    )
+
+
+# ===== 服务器 =====
+
+
+def make_endpoints(base_url: str) -> DanmakuEndpoints:
+    """客户端连接base_url上的模拟服务器使用的地址"""
+    base_url = base_url.rstrip("/")
+    return DanmakuEndpoints(
+        uid_init_url=base_url + NAV_PATH,
+        buvid_init_url=base_url + "/",
+        room_init_url=base_url + ROOM_INIT_PATH,
+        danmaku_server_conf_url=base_url + DANMAKU_SERVER_CONF_PATH,
+        wbi_key_url=base_url + NAV_PATH,
+        secure=False,
+    )
+
+
+@dataclass
+class MockServerStats:
+    """服务器统计"""
+
+    connections: int = 0
+    """累计连接数"""
+    active_connections: int = 0
+    """当前连接数"""
+    frames_sent: int = 0
+    """下发的帧数"""
+    messages_sent: int = 0
+    """下发的业务消息数"""
+    bytes_sent: int = 0
+    """下发的字节数"""
+    heartbeats: int = 0
+    """收到的心跳数"""
+
+
+class MockBiliServer:
+    """本地模拟弹幕服务器
+
+    :param host: 监听地址
+    :param port: 监听端口，0表示随机
+    :param rate: 每个连接每秒下发的消息数
+    :param batch_size: 每帧包含的消息数
+    :param protover: 下发帧的协议版本（NORMAL/DEFLATE/BROTLI）
+    :param gift_ratio: 礼物消息的比例
+    :param noise_ratio: 处理器不订阅的消息的比例
+    :param total_messages: 每个连接最多下发的消息数，None表示不限
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        rate: float = 100,
+        batch_size: int = 10,
+        protover: int = ProtoVer.BROTLI,
+        gift_ratio: float = 0.1,
+        noise_ratio: float = 0.3,
+        total_messages: Optional[int] = None,
+    ):
+        self._host = host
+        self._port = port
+        self._rate = rate
+        self._batch_size = batch_size
+        self._protover = protover
+        self._gift_ratio = gift_ratio
+        self._noise_ratio = noise_ratio
+        self._total_messages = total_messages
+
+        self.stats = MockServerStats()
+        """服务器统计"""
+        self._runner: Optional[web.AppRunner] = None
+        self._send_tasks: set[asyncio.Task] = set()
+
+    @property
+    def port(self) -> int:
+        """实际监听的端口（启动后可用）"""
+        return self._port
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self._host}:{self._port}"
+
+    @property
+    def endpoints(self) -> DanmakuEndpoints:
+        """客户端连接本服务器使用的地址"""
+        return make_endpoints(self.base_url)
+
+    async def start(self):
+        """启动服务器"""
+        app = web.Application()
+        app.router.add_get("/", self._handle_index)
+        app.router.add_get(NAV_PATH, self._handle_nav)
+        app.router.add_get(ROOM_INIT_PATH, self._handle_room_init)
+        app.router.add_get(DANMAKU_SERVER_CONF_PATH, self._handle_server_conf)
+        app.router.add_get(WS_PATH, self._handle_ws)
+
+        self._runner = web.AppRunner(app, handle_signals=False)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        self._port = self._runner.addresses[0][1]
+        logger.info("mock server listening on %s", self.base_url)
+
+    async def close(self):
+        """关闭服务器和所有连接"""
+        for task in list(self._send_tasks):
+            task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ===== HTTP =====
+
+    async def _handle_index(self, request: web.Request) -> web.Response:
+        response = web.Response(text="<html></html>", content_type="text/html")
+        response.set_cookie("buvid3", MOCK_BUVID)
+        return response
+
+    async def _handle_nav(self, request: web.Request) -> web.Response:
+        # 未登录时同样会返回wbi_img
+        return web.json_response(
+            {
+                "code": -101,
+                "message": "账号未登录",
+                "data": {"isLogin": False, "wbi_img": MOCK_WBI_IMG},
+            }
+        )
+
+    async def _handle_room_init(self, request: web.Request) -> web.Response:
+        room_id = int(request.query.get("room_id", 0))
+        return web.json_response(
+            {
+                "code": 0,
+                "message": "ok",
+                "data": {"room_id": room_id, "uid": room_id, "title": f"模拟直播间 {room_id}"},
+            }
+        )
+
+    async def _handle_server_conf(self, request: web.Request) -> web.Response:
+        host_server = {
+            "host": self._host,
+            "port": self._port,
+            "wss_port": self._port,
+            "ws_port": self._port,
+        }
+        return web.json_response(
+            {
+                "code": 0,
+                "message": "0",
+                "data": {"token": MOCK_TOKEN, "host_list": [host_server]},
+            }
+        )
+
+    # ===== WebSocket =====
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.stats.connections += 1
+        self.stats.active_connections += 1
+
+        send_task: Optional[asyncio.Task] = None
+        try:
+            async for message in websocket:
+                if message.type != WSMsgType.BINARY:
+                    continue
+                for header, body in iter_packets(message.data):
+                    if header.operation == Operation.AUTH:
+                        auth_params = json_loads(body)
+                        await websocket.send_bytes(
+                            make_packet({"code": AuthReplyCode.OK}, Operation.AUTH_REPLY)
+                        )
+                        if send_task is None:
+                            send_task = asyncio.create_task(
+                                self._send_coroutine(
+                                    websocket, auth_params.get("roomid") or 0
+                                )
+                            )
+                            self._send_tasks.add(send_task)
+                            send_task.add_done_callback(self._send_tasks.discard)
+                    elif header.operation == Operation.HEARTBEAT:
+                        self.stats.heartbeats += 1
+                        await websocket.send_bytes(
+                            make_packet(
+                                MOCK_POPULARITY.to_bytes(4, "big"),
+                                Operation.HEARTBEAT_REPLY,
+                            )
+                        )
+        finally:
+            if send_task is not None:
+                send_task.cancel()
+            self.stats.active_connections -= 1
+        return websocket
+
+    async def _send_coroutine(self, websocket: web.WebSocketResponse, room_id: int):
+        """按设定的速率下发消息"""
+        loop = asyncio.get_running_loop()
+        interval = self._batch_size / self._rate
+        next_time = loop.time()
+        sent = 0
+        seq = itertools.count()
+        try:
+            while self._total_messages is None or sent < self._total_messages:
+                count = self._batch_size
+                if self._total_messages is not None:
+                    count = min(count, self._total_messages - sent)
+                frame = self._make_frame(seq, count, room_id)
+                await websocket.send_bytes(frame)
+                sent += count
+
+                self.stats.frames_sent += 1
+                self.stats.messages_sent += count
+                self.stats.bytes_sent += len(frame)
+
+                # 落后于计划时不睡眠，但仍然让出事件循环
+                next_time += interval
+                await asyncio.sleep(max(0.0, next_time - loop.time()))
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+
+    def _make_frame(self, seq: "itertools.count[int]", count: int, room_id: int) -> bytes:
+        """生成一帧，包含count条业务消息"""
+        packets = [
+            make_business_packet(
+                make_command(next(seq), room_id, self._gift_ratio, self._noise_ratio)
+            )
+            for _ in range(count)
+        ]
+        return make_frame(packets, self._protover)
+
+
+# ===== 命令行 =====
+
+PROTOVER_CHOICES = {
+    "normal": ProtoVer.NORMAL,
+    "deflate": ProtoVer.DEFLATE,
+    "brotli": ProtoVer.BROTLI,
+}
+
+
+async def _serve(args: argparse.Namespace):
+    server = MockBiliServer(
+        args.host,
+        args.port,
+        rate=args.rate,
+        batch_size=args.batch_size,
+        protover=PROTOVER_CHOICES[args.protover],
+        gift_ratio=args.gift_ratio,
+        noise_ratio=args.noise_ratio,
+        total_messages=args.total_messages,
+    )
+    await server.start()
+    print(f"listening on {server.base_url}")
+    for name, value in vars(server.endpoints).items():
+        print(f"  {name}: {value}")
+    try:
+        while True:
+            await asyncio.sleep(5)
+            print(server.stats)
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟弹幕服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--rate", type=float, default=100, help="每个连接每秒下发的消息数")
+    parser.add_argument("--batch-size", type=int, default=10, help="每帧包含的消息数")
+    parser.add_argument(
+        "--protover", choices=list(PROTOVER_CHOICES), default="brotli", help="下发帧的压缩方式"
+    )
+    parser.add_argument("--gift-ratio", type=float, default=0.1, help="礼物消息的比例")
+    parser.add_argument("--noise-ratio", type=float, default=0.3, help="不订阅的消息的比例")
+    parser.add_argument(
+        "--total-messages", type=int, default=None, help="每个连接最多下发的消息数"
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
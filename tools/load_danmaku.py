@@ -0,0 +1,260 @@
+"""弹幕负载测试
+
+通过DanmakuHub把N个房间连接到本地模拟弹幕服务器，持续接收一段时间后报告：
+
+- 每个房间和全部房间合计每秒收到的消息数（处理器收到的弹幕和礼物）
+- 服务器每秒下发的消息数（进程内启动服务器时）
+- PipelineMetrics中network、decompress、decode、dispatch、end_to_end各阶段的p50/p99，
+  end_to_end为服务器时间戳到处理器收到弹幕的时间
+
+预热期间的消息不计入结果。默认在进程内启动模拟服务器，也可以用--url连接单独启动的服务器
+（此时没有服务器端统计）。
+
+命令行::
+
+    python -m tools.load_danmaku --rooms 50 --rate 200 --duration 30
+    python -m tools.load_danmaku --url http://127.0.0.1:8000 --rooms 100 --output load.json
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import aiohttp
+
+from src.core.danmaku_handler import BaseHandler
+from src.core.danmaku_hub import DanmakuHub
+from src.core.danmaku_metrics import PipelineMetrics
+from src.core.danmaku_models import DanmakuMessage, GiftMessage
+from src.utils.json_codec import json_dumps
+
+from .danmaku_mock_server import PROTOVER_CHOICES, MockBiliServer, make_endpoints
+
+__all__ = (
+    "LoadResult",
+    "RoomResult",
+    "run_load",
+)
+
+DEFAULT_ROOMS = 10
+DEFAULT_RATE = 100
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_DURATION = 10.0
+DEFAULT_WARMUP = 2.0
+# 负载测试时房间之间错峰连接的间隔（秒），比应用中的默认值小
+DEFAULT_CONNECT_INTERVAL = 0.01
+# 结果中报告的阶段
+REPORTED_STAGES = ("network", "decompress", "decode", "dispatch", "end_to_end")
+
+
+class _CountingHandler(BaseHandler):
+    """统计收到的消息数，并记录服务器时间戳到处理器的延迟"""
+
+    def __init__(self, metrics: PipelineMetrics):
+        self._metrics = metrics
+        self.messages = 0
+
+    def _on_danmaku(self, client, message: DanmakuMessage):
+        self.messages += 1
+        if message.timestamp:
+            self._metrics.end_to_end.record(time.time() - message.timestamp / 1000)
+
+    def _on_gift(self, client, message: GiftMessage):
+        self.messages += 1
+
+
+@dataclass
+class RoomResult:
+    """单个房间的结果"""
+
+    room_id: int
+    messages: int
+    """计时期间收到的消息数"""
+    msgs_per_sec: float
+
+
+@dataclass
+class LoadResult:
+    """负载测试结果"""
+
+    rooms: int
+    """房间数"""
+    connected_rooms: int
+    """计时期间收到过消息的房间数"""
+    duration: float
+    """计时时长（秒）"""
+    messages: int
+    """计时期间所有房间收到的消息数"""
+    msgs_per_sec: float
+    """所有房间合计每秒收到的消息数"""
+    server_msgs_per_sec: Optional[float]
+    """服务器每秒下发的消息数（包括处理器不订阅的消息），连接外部服务器时为None"""
+    stages: dict[str, dict[str, float]] = field(default_factory=dict)
+    """阶段名 -> {count, p50_ms, p99_ms, max_ms}"""
+    room_results: list[RoomResult] = field(default_factory=list)
+
+
+async def run_load(
+    endpoints_url: Optional[str] = None,
+    *,
+    rooms: int = DEFAULT_ROOMS,
+    rate: float = DEFAULT_RATE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    protover: str = "brotli",
+    duration: float = DEFAULT_DURATION,
+    warmup: float = DEFAULT_WARMUP,
+    connect_interval: float = DEFAULT_CONNECT_INTERVAL,
+) -> LoadResult:
+    """运行一次负载测试
+
+    :param endpoints_url: 外部模拟服务器的地址，None表示在进程内启动
+    :param rooms: 房间数
+    :param rate: 每个连接每秒下发的消息数（仅进程内服务器）
+    :param batch_size: 每帧包含的消息数（仅进程内服务器）
+    :param protover: 下发帧的压缩方式（仅进程内服务器）
+    :param duration: 计时时长（秒）
+    :param warmup: 计时前等待连接建立的时间（秒）
+    :param connect_interval: 房间之间错峰连接的间隔（秒）
+    """
+    server = None
+    if endpoints_url is None:
+        server = MockBiliServer(
+            rate=rate, batch_size=batch_size, protover=PROTOVER_CHOICES[protover]
+        )
+        await server.start()
+        endpoints = server.endpoints
+    else:
+        endpoints = make_endpoints(endpoints_url)
+
+    metrics = PipelineMetrics()
+    # 模拟服务器用IP地址，cookie_jar需要unsafe=True才会保存buvid
+    session = aiohttp.ClientSession(
+        cookie_jar=aiohttp.CookieJar(unsafe=True),
+        timeout=aiohttp.ClientTimeout(total=10),
+    )
+    hub = DanmakuHub(
+        uid=0,
+        session=session,
+        connect_interval=connect_interval,
+        endpoints=endpoints,
+        metrics=metrics,
+    )
+    handlers = {room_id: _CountingHandler(metrics) for room_id in range(1, rooms + 1)}
+    try:
+        for room_id, handler in handlers.items():
+            hub.add_room(room_id, handler)
+        hub.start()
+        await asyncio.sleep(warmup)
+
+        # 计时开始，清空预热期间的统计
+        metrics.reset()
+        start_counts = {room_id: handler.messages for room_id, handler in handlers.items()}
+        server_start = server.stats.messages_sent if server is not None else 0
+        start = time.perf_counter()
+        await asyncio.sleep(duration)
+        elapsed = time.perf_counter() - start
+        server_sent = server.stats.messages_sent - server_start if server is not None else 0
+    finally:
+        await hub.stop_and_close()
+        await session.close()
+        if server is not None:
+            await server.close()
+
+    room_results = []
+    for room_id, handler in handlers.items():
+        count = handler.messages - start_counts[room_id]
+        room_results.append(RoomResult(room_id, count, count / elapsed))
+    total = sum(room.messages for room in room_results)
+    stages = {}
+    for stage in REPORTED_STAGES:
+        histogram = metrics.get(stage)
+        stages[stage] = {
+            "count": histogram.count,
+            "p50_ms": histogram.percentile(0.50) * 1000,
+            "p99_ms": histogram.percentile(0.99) * 1000,
+            "max_ms": histogram.max * 1000,
+        }
+    return LoadResult(
+        rooms=rooms,
+        connected_rooms=sum(1 for room in room_results if room.messages),
+        duration=elapsed,
+        messages=total,
+        msgs_per_sec=total / elapsed,
+        server_msgs_per_sec=server_sent / elapsed if server is not None else None,
+        stages=stages,
+        room_results=room_results,
+    )
+
+
+def format_result(result: LoadResult) -> str:
+    """格式化结果"""
+    room_rates = [room.msgs_per_sec for room in result.room_results]
+    lines = [
+        f"rooms: {result.connected_rooms}/{result.rooms} receiving, {result.duration:.1f}s",
+        f"received: {result.msgs_per_sec:.0f} msgs/s total, per room "
+        f"min={min(room_rates, default=0):.0f} "
+        f"mean={result.msgs_per_sec / max(result.rooms, 1):.0f} "
+        f"max={max(room_rates, default=0):.0f}",
+    ]
+    if result.server_msgs_per_sec is not None:
+        lines.append(f"server sent: {result.server_msgs_per_sec:.0f} msgs/s (including noise)")
+    lines.append(f"{'stage':<12}{'count':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stage in result.stages.items():
+        lines.append(
+            f"{name:<12}{stage['count']:>10}{stage['p50_ms']:>10.2f}"
+            f"{stage['p99_ms']:>10.2f}{stage['max_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="弹幕负载测试")
+    parser.add_argument("--url", help="外部模拟服务器的地址，默认在进程内启动")
+    parser.add_argument("--rooms", type=int, default=DEFAULT_ROOMS, help="房间数")
+    parser.add_argument(
+        "--rate", type=float, default=DEFAULT_RATE, help="每个连接每秒下发的消息数"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="每帧包含的消息数"
+    )
+    parser.add_argument(
+        "--protover", choices=list(PROTOVER_CHOICES), default="brotli", help="下发帧的压缩方式"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=DEFAULT_DURATION, help="计时时长（秒）"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=DEFAULT_WARMUP, help="计时前等待连接建立的时间（秒）"
+    )
+    parser.add_argument(
+        "--connect-interval",
+        type=float,
+        default=DEFAULT_CONNECT_INTERVAL,
+        help="房间之间错峰连接的间隔（秒）",
+    )
+    parser.add_argument("--output", type=Path, help="把结果保存为JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        run_load(
+            args.url,
+            rooms=args.rooms,
+            rate=args.rate,
+            batch_size=args.batch_size,
+            protover=args.protover,
+            duration=args.duration,
+            warmup=args.warmup,
+            connect_interval=args.connect_interval,
+        )
+    )
+    print(format_result(result))
+
+    if args.output is not None:
+        args.output.write_bytes(json_dumps(asdict(result)))
+
+
+if __name__ == "__main__":
+    main()